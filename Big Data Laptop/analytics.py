@@ -0,0 +1,309 @@
+import argparse
+import os
+import sqlite3
+import time
+import pandas as pd
+from storage import dataset_columns, find_dataset, iter_dataset
+from csv_combiner import unify_results
+
+# --- 📜 CONFIGURATION ---
+
+# Rollup sentimen yang dimaterialisasi: jumlah per label dan total skor kepercayaan per grup, disimpan
+# di tabel kecil sehingga dashboard dan laporan tren tidak perlu memindai ulang seluruh hasil.
+ANALYTICS_DB_FILE = "combined_data/analytics.sqlite"
+# Dataset sumber (output dari indobert_process.py), tanpa ekstensi
+INPUT_DATASET = "combined_data/final_sentiment_results"
+
+BATCH_SIZE = 5000
+
+# Dimensi rollup: {nama: (kolom grup, kolom periode)}. None = tanpa grup / tanpa periode.
+# 'item' = URL artikel atau video.
+ROLLUP_DIMENSIONS = {
+    "keyword": ("keyword", None),
+    "source": ("source", None),
+    "item": ("item", None),
+    "day": (None, "day"),
+    "week": (None, "week"),
+    "keyword_day": ("keyword", "day"),
+    "keyword_week": ("keyword", "week"),
+    "source_week": ("source", "week"),
+    "item_week": ("item", "week"),
+}
+
+# Label yang tidak ikut dihitung sebagai sentimen (gagal diproses model)
+EXCLUDED_LABELS = {"error"}
+
+FACT_COLUMNS = ["content_hash", "keyword", "source", "item", "day", "week", "label", "score"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    content_hash TEXT PRIMARY KEY,
+    keyword      TEXT,
+    source       TEXT,
+    item         TEXT,
+    day          TEXT,
+    week         TEXT,           -- tanggal Senin awal minggu (YYYY-MM-DD)
+    label        TEXT,
+    score        REAL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    dimension  TEXT NOT NULL,
+    grp        TEXT NOT NULL,     -- '' jika dimensi tanpa grup
+    period     TEXT NOT NULL,     -- '' jika dimensi tanpa periode
+    label      TEXT NOT NULL,
+    n          INTEGER NOT NULL,
+    confidence REAL NOT NULL,     -- jumlah sentiment_score
+    PRIMARY KEY (dimension, grp, period, label)
+);
+CREATE TABLE IF NOT EXISTS refresh_state (
+    input_file  TEXT PRIMARY KEY,
+    fingerprint TEXT,
+    refreshed_at TEXT
+);
+"""
+
+
+def open_analytics(db_file=ANALYTICS_DB_FILE):
+    """
+    Opens (and creates if needed) the analytics database.
+    """
+    os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def to_facts(batch):
+    """
+    Maps a batch of the final results onto FACT_COLUMNS. The date is the publication date
+    when known (YouTube comments), otherwise the crawl time. Missing columns (legacy results
+    files) are filled in by csv_combiner.unify_results.
+    """
+    batch = unify_results(batch)
+    dates = pd.to_datetime(batch["published_at"], errors="coerce", utc=True, format="ISO8601")
+    crawled = pd.to_datetime(batch["timestamp"], errors="coerce", utc=True, format="ISO8601")
+    dates = dates.fillna(crawled).dt.tz_convert(None).dt.normalize()
+    weeks = dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+
+    facts = pd.DataFrame({
+        "content_hash": batch["content_hash"],
+        "keyword": batch["keyword"].fillna("").astype(str),
+        "source": batch["source"].fillna("").astype(str),
+        "item": batch["url"].fillna("").astype(str),
+        "day": dates.dt.strftime("%Y-%m-%d").fillna(""),
+        "week": weeks.dt.strftime("%Y-%m-%d").fillna(""),
+        "label": batch["sentiment_label"].fillna("unscored").astype(str),
+        "score": pd.to_numeric(batch["sentiment_score"], errors="coerce").fillna(0.0),
+    })
+    facts = facts[facts["content_hash"].notna() & ~facts["label"].isin(EXCLUDED_LABELS)]
+    return facts.drop_duplicates("content_hash", keep="last")
+
+
+def aggregate(facts, sign=1):
+    """
+    Rolls facts up into (dimension, grp, period, label, n, confidence) rows for every
+    dimension; sign=-1 produces the retraction of those facts.
+    """
+    frames = []
+    for dimension, (group_column, period_column) in ROLLUP_DIMENSIONS.items():
+        keys = pd.DataFrame({
+            "grp": facts[group_column] if group_column else "",
+            "period": facts[period_column] if period_column else "",
+            "label": facts["label"],
+            "score": facts["score"],
+        }, index=facts.index)
+        grouped = keys.groupby(["grp", "period", "label"], sort=False)["score"].agg(["size", "sum"]).reset_index()
+        grouped.insert(0, "dimension", dimension)
+        frames.append(grouped.rename(columns={"size": "n", "sum": "confidence"}))
+    rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    rows["n"] *= sign
+    rows["confidence"] *= sign
+    return rows
+
+
+def refresh_rollups(conn, input_file, batch_size=BATCH_SIZE, force=False):
+    """
+    Brings the rollups up to date with the results dataset. Only rows that are new, changed
+    (re-scored, new date) or gone since the last refresh touch the rollups: their old
+    contribution is retracted and the new one added. Returns a dict with the counts, or
+    None if the dataset did not change.
+    """
+    fingerprint = _fingerprint(input_file)
+    state = conn.execute("SELECT fingerprint FROM refresh_state WHERE input_file = ?", (input_file,)).fetchone()
+    if state and state[0] == fingerprint and not force:
+        return None
+
+    columns = ["content_hash", "keyword", "source", "url", "published_at", "timestamp",
+               "sentiment_label", "sentiment_score"]
+    available = dataset_columns(input_file)
+    # File lama tanpa content_hash dibaca utuh: hash dihitung dari teks, author, source dan url
+    columns = [column for column in columns if column in available] if "content_hash" in available else None
+    batches = [to_facts(batch) for batch in iter_dataset(input_file, columns=columns, batch_size=batch_size)]
+    new = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame(columns=FACT_COLUMNS)
+    new = new.drop_duplicates("content_hash", keep="last")
+    old = pd.read_sql_query(f"SELECT {', '.join(FACT_COLUMNS)} FROM facts", conn)
+
+    merged = old.merge(new, on="content_hash", how="outer", suffixes=("_old", ""), indicator=True)
+    compared = [column for column in FACT_COLUMNS if column != "content_hash"]
+    both = merged["_merge"] == "both"
+    changed = both & pd.concat(
+        [merged[f"{column}_old"].ne(merged[column]) for column in compared], axis=1).any(axis=1)
+    removed_mask = (merged["_merge"] == "left_only") | changed
+    added_mask = (merged["_merge"] == "right_only") | changed
+
+    removed = merged.loc[removed_mask, ["content_hash"] + [f"{column}_old" for column in compared]]
+    removed.columns = FACT_COLUMNS
+    added = merged.loc[added_mask, FACT_COLUMNS]
+
+    delta = pd.concat([aggregate(removed, -1), aggregate(added)], ignore_index=True)
+    delta = delta.groupby(["dimension", "grp", "period", "label"], sort=False)[["n", "confidence"]].sum().reset_index()
+    delta = delta[(delta["n"] != 0) | (delta["confidence"].abs() > 1e-9)]
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO rollups (dimension, grp, period, label, n, confidence) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(dimension, grp, period, label) DO UPDATE SET "
+            "n = n + excluded.n, confidence = confidence + excluded.confidence",
+            [(row.dimension, row.grp, row.period, row.label, int(row.n), float(row.confidence))
+             for row in delta.itertuples(index=False)],
+        )
+        conn.execute("DELETE FROM rollups WHERE n <= 0")
+        conn.executemany("DELETE FROM facts WHERE content_hash = ?", [(h,) for h in removed["content_hash"]])
+        conn.executemany(
+            f"INSERT INTO facts ({', '.join(FACT_COLUMNS)}) VALUES ({', '.join('?' * len(FACT_COLUMNS))})",
+            added[FACT_COLUMNS].itertuples(index=False, name=None),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO refresh_state (input_file, fingerprint, refreshed_at) VALUES (?, ?, ?)",
+            (input_file, fingerprint, pd.Timestamp.now().isoformat(timespec="seconds")),
+        )
+    return {"rows": len(new), "added": int((merged["_merge"] == "right_only").sum()),
+            "changed": int(changed.sum()), "removed": int((merged["_merge"] == "left_only").sum()),
+            "rollup_rows_touched": len(delta)}
+
+
+def read_rollup(conn, dimension, group=None, since=None, until=None):
+    """
+    Reads one materialised rollup as a table with one row per (group, period): counts per label,
+    'total', plain shares ('share_<label>') and confidence-weighted shares ('weighted_<label>',
+    the label's summed sentiment_score over the group's summed score).
+    """
+    if dimension not in ROLLUP_DIMENSIONS:
+        raise ValueError(f"Unknown rollup dimension '{dimension}'")
+    group_column, period_column = ROLLUP_DIMENSIONS[dimension]
+    clauses, params = ["dimension = ?"], [dimension]
+    if group is not None:
+        clauses.append("grp = ?")
+        params.append(group)
+    if since:
+        clauses.append("period >= ?")
+        params.append(since)
+    if until:
+        clauses.append("period < ?")
+        params.append(until)
+    rows = pd.read_sql_query(
+        f"SELECT grp, period, label, n, confidence FROM rollups WHERE {' AND '.join(clauses)}", conn, params=params)
+    index = [column for column, used in (("grp", group_column), ("period", period_column)) if used]
+    if rows.empty:
+        return pd.DataFrame(columns=["total"])
+
+    counts = rows.pivot_table(index=index, columns="label", values="n", aggfunc="sum", fill_value=0)
+    confidence = rows.pivot_table(index=index, columns="label", values="confidence", aggfunc="sum", fill_value=0.0)
+    table = counts.copy()
+    table["total"] = counts.sum(axis=1)
+    for label in counts.columns:
+        table[f"share_{label}"] = counts[label] / table["total"]
+        table[f"weighted_{label}"] = confidence[label] / confidence.sum(axis=1).where(lambda s: s > 0)
+    table.columns.name = None
+    table.index.names = [group_column if name == "grp" else name for name in table.index.names]
+    return table
+
+
+def trend(conn, period="week", by=None, group=None, since=None, until=None):
+    """
+    Sentiment over time per day or week, overall or for one keyword/source/item.
+    """
+    dimension = f"{by}_{period}" if by else period
+    if dimension not in ROLLUP_DIMENSIONS:
+        raise ValueError(f"No '{period}' rollup by '{by}'. Available: {', '.join(ROLLUP_DIMENSIONS)}")
+    table = read_rollup(conn, dimension, group, since, until)
+    return table.sort_index()
+
+
+# --- 🚦 MAIN SCRIPT ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precomputed sentiment rollups by keyword, source, time and item.")
+    parser.add_argument("--db", default=ANALYTICS_DB_FILE, help="Analytics database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = commands.add_parser("refresh", help="Update the rollups from the sentiment results")
+    refresh_parser.add_argument("--input", default=INPUT_DATASET, help="Dataset base name or file (default: %(default)s)")
+    refresh_parser.add_argument("--force", action="store_true", help="Compare all rows even if the file is unchanged")
+
+    show_parser = commands.add_parser("show", help="Print one rollup, e.g. show keyword")
+    show_parser.add_argument("dimension", choices=list(ROLLUP_DIMENSIONS))
+    show_parser.add_argument("--group", help="Only this keyword/source/item")
+    show_parser.add_argument("--top", type=int, default=20, help="Largest groups to print (default: %(default)s)")
+
+    trend_parser = commands.add_parser("trend", help="Sentiment per day/week, e.g. trend --by keyword --group X")
+    trend_parser.add_argument("--period", choices=["day", "week"], default="week")
+    trend_parser.add_argument("--by", choices=["keyword", "source", "item"])
+    trend_parser.add_argument("--group", help="Keyword/source/item to follow (requires --by)")
+    trend_parser.add_argument("--since", help="From date (YYYY-MM-DD, inclusive)")
+    trend_parser.add_argument("--until", help="Until date (YYYY-MM-DD, exclusive)")
+    args = parser.parse_args()
+
+    if args.command != "refresh" and not os.path.exists(args.db):
+        print(f"❌ ERROR: Analytics database not found at '{args.db}'. Run 'python analytics.py refresh' first.")
+        exit(1)
+
+    start_time = time.perf_counter()
+    conn = open_analytics(args.db)
+    pd.set_option("display.width", 200)
+    pd.set_option("display.precision", 3)
+
+    if args.command == "refresh":
+        input_file = args.input if os.path.splitext(args.input)[1] else find_dataset(args.input)
+        if input_file is None or not os.path.exists(input_file):
+            print(f"❌ ERROR: Dataset not found at '{args.input}'. Please run indobert_process.py first.")
+            exit(1)
+        result = refresh_rollups(conn, input_file, force=args.force)
+        if result is None:
+            print(f"✅ Rollups already up to date with '{input_file}'.")
+        else:
+            print(f"✅ Rollups refreshed from {result['rows']} rows in {time.perf_counter() - start_time:.2f}s: "
+                  f"{result['added']} new, {result['changed']} changed, {result['removed']} removed "
+                  f"({result['rollup_rows_touched']} rollup rows updated)")
+
+    elif args.command == "show":
+        table = read_rollup(conn, args.dimension, args.group)
+        if table.empty:
+            print("No matching rows.")
+        else:
+            if ROLLUP_DIMENSIONS[args.dimension][1]:
+                table = table.sort_index()
+            else:
+                table = table.sort_values("total", ascending=False)
+            print(table.head(args.top).to_string())
+        print(f"📊 Read in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+    elif args.command == "trend":
+        if args.group and not args.by:
+            print("❌ ERROR: --group requires --by.")
+            exit(1)
+        table = trend(conn, args.period, args.by, args.group, args.since, args.until)
+        print(table.to_string() if not table.empty else "No matching rows.")
+        print(f"📈 Read in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+    conn.close()
+    if args.command == "refresh":
+        # Refresh tanpa perubahan tidak menyentuh file; mtime menandai refresh yang berhasil untuk pipeline.py
+        os.utime(args.db)
@@ -0,0 +1,629 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import metrics
+
+# --- 📜 CONFIGURATION ---
+
+# Benchmark offline: semua layanan eksternal (detik, YouTube Data API v3, LM Studio) diganti
+# server lokal palsu, sehingga setiap tahap bisa diukur ulang di satu mesin tanpa internet.
+BENCHMARK_DIR = "benchmarks"
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+LAST_RUN_FILE = os.path.join(BENCHMARK_DIR, "last_run.json")
+
+# Selisih relatif terhadap baseline yang masih dianggap normal (0.15 = 15%)
+REGRESSION_TOLERANCE = 0.15
+
+# Latensi dan error yang disuntikkan oleh setiap server palsu
+FAKE_SERVICES = {
+    "detik": {"latency_ms": 40, "jitter_ms": 15, "error_rate": 0.02},
+    "youtube": {"latency_ms": 60, "jitter_ms": 20, "error_rate": 0.02},
+    "llm": {"latency_ms": 150, "jitter_ms": 50, "error_rate": 0.05, "ms_per_token": 1.5,
+            "summary_words": 80, "runaway_rate": 0.1},
+}
+
+# Ukuran beban kerja per tahap
+WORKLOAD = {
+    "news_keywords": ["pemilu damai", "toleransi beragama", "persatuan bangsa"],
+    "articles_per_keyword": 10,
+    "news_target_total": 40,
+    "news_search_depths": {"toleransi beragama": 5},  # Keyword sempit: hanya 5 hasil relevan
+    "results_per_search_page": 9,
+    "paragraphs_per_article": 12,
+    "youtube_keywords": ["indonesia damai", "jaga kerukunan", "stop hoaks"],
+    "videos_per_keyword": 3,
+    "comments_per_video": 250,
+    "reply_quota_budget": 500,
+    "llm_texts": 40,
+    "llm_workers": 1,
+    "queue_workers": 4,
+}
+
+RANDOM_SEED = 42
+
+# Metrik per tahap: histogram latensi request dari metrics.py dan counter jumlah item yang dihasilkan
+STAGE_METRICS = {
+    "crawl_news": {"latency": "http_request_seconds", "unit": "articles"},
+    "crawl_youtube": {"latency": "youtube_api_seconds", "unit": "comments"},
+    "crawl_youtube_replies": {"latency": "youtube_api_seconds", "unit": "comments"},
+    "crawl_news_queue": {"latency": "http_request_seconds", "unit": "articles"},
+    "clean_local": {"latency": "llm_request_seconds", "unit": "texts",
+                    "first_token": "llm_time_to_first_token_seconds"},
+}
+
+OFF_TOPIC_WORDS = "resep kuliner sepak bola liga transfer gawai promo diskon cuaca konser selebritas".split()
+WORDS = ("pemerintah masyarakat damai pemilu toleransi warga bangsa persatuan indonesia kerukunan "
+         "dialog tokoh agama pemuda kebijakan aparat keamanan hoaks media sosial kampanye daerah").split()
+
+
+# --- FAKE SERVERS ---
+
+class FakeService:
+    """
+    Runs a local HTTP server in a background thread. Every request first waits for the
+    configured latency (± jitter) and fails with HTTP 503 at the configured error rate.
+    """
+
+    def __init__(self, name, routes, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=RANDOM_SEED, **options):
+        self.name = name
+        self.routes = routes
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.options = options
+        self.random = random.Random(f"{seed}:{name}")
+        self.random_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.server = None
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                service.handle(self, None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                service.handle(self, self.rfile.read(length))
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name=f"fake-{self.name}", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def handle(self, request, body):
+        with self.random_lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+
+        url = urlparse(request.path)
+        route = next((handler for prefix, handler in self.routes.items() if url.path.startswith(prefix)), None)
+        time.sleep(delay)
+
+        if route is None:
+            status, content_type, payload = 404, "text/plain", b"not found"
+        elif fail:
+            status, content_type, payload = 503, "application/json", b'{"error": {"code": 503, "message": "injected"}}'
+        else:
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            base = f"http://{request.headers.get('Host')}"
+            status, content_type, payload = route(self, base, url.path, query, body)
+            if isinstance(payload, (dict, list)):
+                payload = json.dumps(payload).encode("utf-8")
+            elif isinstance(payload, str):
+                payload = payload.encode("utf-8")
+
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        if isinstance(payload, bytes):
+            request.send_header("Content-Length", str(len(payload)))
+            request.end_headers()
+            request.wfile.write(payload)
+            return
+
+        # Respons streaming (generator): dikirim per event sampai selesai atau klien menutup koneksi
+        request.send_header("Connection", "close")
+        request.end_headers()
+        request.close_connection = True
+        try:
+            for chunk in payload:
+                request.wfile.write(chunk.encode("utf-8"))
+                request.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            with self.random_lock:
+                self.cancelled += 1
+
+
+def fake_sentence(seed, words=14):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def detik_search(service, base, path, query, body):
+    """
+    Search result page with the markup NEWS_SITES["detik"] expects (article > a > h2).
+    A keyword has a limited number of relevant results (search_depths, default unlimited);
+    past that, pages mix repeats of page 1 with off-topic articles, like a real search.
+    """
+    keyword = query.get("query", "").replace("+", " ")
+    page = int(query.get("page", 1))
+    per_page = service.options["results_per_page"]
+    depth = service.options.get("search_depths", {}).get(keyword)
+    items = []
+    for i in range(per_page):
+        article_id = zlib.crc32(f"{keyword}|{page}|{i}".encode("utf-8"))
+        title = fake_sentence(article_id, 8)
+        if depth is not None and (page - 1) * per_page + i >= depth:
+            if i % 2:
+                article_id = zlib.crc32(f"{keyword}|1|{i}".encode("utf-8"))
+                title = fake_sentence(article_id, 8)
+            else:
+                rng = random.Random(article_id)
+                title = " ".join(rng.choice(OFF_TOPIC_WORDS) for _ in range(8)).capitalize() + "."
+        items.append(
+            f'<article class="list-content__item"><div class="media">'
+            f'<a class="media__link" href="{base}/berita/d-{article_id}/{keyword.replace(" ", "-")}">'
+            f'<h2 class="media__title">{title}</h2></a>'
+            f'<span class="media__date">{page} jam yang lalu</span></div></article>'
+        )
+    navigation = "".join(f'<a href="{base}/kanal/{i}">Kanal {i}</a>' for i in range(60))
+    html = (f'<html><head><title>Hasil pencarian</title></head><body><nav>{navigation}</nav>'
+            f'<div class="list-content">{"".join(items)}</div></body></html>')
+    return 200, "text/html; charset=utf-8", html
+
+
+def detik_article(service, base, path, query, body):
+    """
+    Article page with h1.detail__title and div.detail__body-text paragraphs, plus the
+    boilerplate (navigation, scripts, 'SCROLL TO CONTINUE') a real detik page carries.
+    """
+    article_id = path.rstrip("/").split("/")[-2]
+    paragraphs = [f"<p>{fake_sentence(f'{article_id}:{i}', 30)}</p>"
+                  for i in range(service.options["paragraphs_per_article"])]
+    paragraphs.insert(3, '<p class="para_caption">SCROLL TO CONTINUE WITH CONTENT</p>')
+    paragraphs.append("<p><strong>Tonton juga Video:</strong></p>")
+    navigation = "".join(f'<li><a href="{base}/kanal/{i}">Kanal {i}</a></li>' for i in range(120))
+    scripts = "<script>var dtk = {};</script>" * 20
+    html = (f'<html><head><title>{article_id}</title>{scripts}</head><body><ul class="nav">{navigation}</ul>'
+            f'<article class="detail"><h1 class="detail__title">{fake_sentence(article_id, 10)}</h1>'
+            f'<div class="detail__body-text itp_bodycontent">{"".join(paragraphs)}</div></article>'
+            f'<div class="related">{navigation}</div></body></html>')
+    return 200, "text/html; charset=utf-8", html
+
+
+def youtube_search(service, base, path, query, body):
+    keyword = query.get("q", "")
+    max_results = int(query.get("maxResults", 5))
+    items = [{"kind": "youtube#searchResult",
+              "id": {"kind": "youtube#video", "videoId": f"v{zlib.crc32(f'{keyword}|{i}'.encode('utf-8')):08x}"},
+              "snippet": {"title": f"{keyword.title()} - {fake_sentence(f'{keyword}|{i}', 6)}",
+                          "description": fake_sentence(f"{keyword}|{i}|description", 20)}}
+             for i in range(max_results)]
+    return 200, "application/json", {"kind": "youtube#searchListResponse", "items": items}
+
+
+def fake_reply_count(comment_index):
+    """
+    Every 4th comment has 2 replies and every 10th a long thread of 12, so both embedded
+    and truncated reply threads occur.
+    """
+    return 12 if comment_index % 10 == 0 else 2 if comment_index % 4 == 0 else 0
+
+
+def fake_reply(thread_id, i):
+    return {"kind": "youtube#comment", "id": f"{thread_id}.r{i}", "snippet": {
+        "parentId": thread_id,
+        "authorDisplayName": f"@pembalas{i % 31}",
+        "textDisplay": fake_sentence(f"{thread_id}:reply:{i}", 8),
+        "publishedAt": "2025-01-16T10:00:00Z",
+    }}
+
+
+def youtube_comment_threads(service, base, path, query, body):
+    """
+    commentThreads.list with pageToken paging over a fixed number of comments per video.
+    With part=snippet,replies up to 5 replies are embedded per thread, like the real API.
+    """
+    video_id = query.get("videoId", "")
+    offset = int(query.get("pageToken") or 0)
+    page_size = min(100, int(query.get("maxResults", 20)))
+    total = service.options["comments_per_video"]
+    end = min(total, offset + page_size)
+
+    items = []
+    for i in range(offset, end):
+        items.append({
+            "kind": "youtube#commentThread",
+            "id": f"{video_id}.{i}",
+            "snippet": {
+                "videoId": video_id,
+                "totalReplyCount": fake_reply_count(i),
+                "topLevelComment": {"id": f"{video_id}.{i}", "snippet": {
+                    "authorDisplayName": f"@penonton{i % 97}",
+                    "textDisplay": fake_sentence(f"{video_id}:{i}", 12),
+                    "publishedAt": "2025-01-15T08:30:00Z",
+                }},
+            },
+        })
+        if "replies" in query.get("part", "") and fake_reply_count(i):
+            thread_id = f"{video_id}.{i}"
+            items[-1]["replies"] = {"comments": [fake_reply(thread_id, r) for r in range(min(5, fake_reply_count(i)))]}
+    response = {"kind": "youtube#commentThreadListResponse", "items": items}
+    if end < total:
+        response["nextPageToken"] = str(end)
+    return 200, "application/json", response
+
+
+def youtube_comments(service, base, path, query, body):
+    """
+    comments.list(parentId=...) with pageToken paging over the replies of one thread.
+    """
+    thread_id = query.get("parentId", "")
+    total = fake_reply_count(int(thread_id.rsplit(".", 1)[-1]))
+    offset = int(query.get("pageToken") or 0)
+    end = min(total, offset + min(100, int(query.get("maxResults", 20))))
+    response = {"kind": "youtube#commentListResponse", "items": [fake_reply(thread_id, i) for i in range(offset, end)]}
+    if end < total:
+        response["nextPageToken"] = str(end)
+    return 200, "application/json", response
+
+
+def chat_completions(service, base, path, query, body):
+    """
+    OpenAI-compatible /v1/chat/completions, plain or streamed as SSE ("stream": true).
+    Generation time grows with the completion length; at 'runaway_rate' the model keeps
+    repeating itself until max_tokens, like a runaway generation.
+    """
+    request = json.loads(body or b"{}")
+    prompt = request.get("messages", [{}])[-1].get("content", "")
+    content = prompt.split("---")[1].strip() if prompt.count("---") >= 2 else prompt
+    max_tokens = request.get("max_tokens", 500)
+    words = content.split()[:service.options.get("summary_words", len(content.split()))]
+    with service.random_lock:
+        runaway = service.random.random() < service.options.get("runaway_rate", 0)
+    if runaway and words:
+        words = (words * (max_tokens // len(words) + 1))[:max_tokens]
+    words = words[:max_tokens]
+    completion = " ".join(words)
+    completion_tokens = len(words)
+    ms_per_token = service.options.get("ms_per_token", 0)
+
+    if request.get("stream"):
+        def events():
+            for i, word in enumerate(words):
+                time.sleep(ms_per_token / 1000)
+                delta = {"role": "assistant", "content": word} if i == 0 else {"content": " " + word}
+                chunk = {"id": "chatcmpl-benchmark", "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            final = {"id": "chatcmpl-benchmark", "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "length" if runaway else "stop"}],
+                     "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": completion_tokens,
+                               "total_tokens": len(prompt.split()) + completion_tokens}}
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+        return 200, "text/event-stream", events()
+
+    time.sleep(completion_tokens * ms_per_token / 1000)
+    return 200, "application/json", {
+        "id": "chatcmpl-benchmark",
+        "object": "chat.completion",
+        "model": request.get("model"),
+        "choices": [{"index": 0, "finish_reason": "length" if runaway else "stop",
+                     "message": {"role": "assistant", "content": completion}}],
+        "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": completion_tokens,
+                  "total_tokens": len(prompt.split()) + completion_tokens},
+    }
+
+
+def start_services(services_config, workload, seed):
+    """
+    Starts the three fake services and returns {name: FakeService}.
+    """
+    return {
+        "detik": FakeService("detik", {"/search/searchall": detik_search, "/berita/": detik_article},
+                             seed=seed, results_per_page=workload["results_per_search_page"],
+                             paragraphs_per_article=workload["paragraphs_per_article"],
+                             search_depths=workload["news_search_depths"],
+                             **services_config["detik"]).start(),
+        "youtube": FakeService("youtube", {"/youtube/v3/search": youtube_search,
+                                           "/youtube/v3/commentThreads": youtube_comment_threads,
+                                           "/youtube/v3/comments": youtube_comments},
+                               seed=seed, comments_per_video=workload["comments_per_video"],
+                               **services_config["youtube"]).start(),
+        "llm": FakeService("llm", {"/v1/chat/completions": chat_completions},
+                           seed=seed, **services_config["llm"]).start(),
+    }
+
+
+# --- STAGES ---
+
+def bench_crawl_news(services, workload):
+    """
+    crawler_berita.iter_news_articles against the fake detik, without politeness delays.
+    """
+    import crawler_berita
+
+    site = {**crawler_berita.NEWS_SITES["detik"],
+            "search_url": services["detik"].base_url + "/search/searchall?query={}&page={}"}
+    delays = dict(crawler_berita.CRAWL_DELAYS)
+    crawler_berita.CRAWL_DELAYS.update({name: 0 for name in delays})
+    try:
+        articles = list(crawler_berita.iter_news_articles(
+            keywords=workload["news_keywords"], sites={"detik": site},
+            articles_per_keyword_site=workload["articles_per_keyword"],
+            target_total=workload["news_target_total"],
+        ))
+    finally:
+        crawler_berita.CRAWL_DELAYS.update(delays)
+    return len(articles)
+
+
+def bench_crawl_youtube(services, workload):
+    """
+    crawler_sosmedYT.iter_youtube_comments against the fake YouTube Data API v3.
+    """
+    import crawler_sosmedYT
+
+    client = crawler_sosmedYT.build_client("benchmark", api_endpoint=services["youtube"].base_url)
+    comments = list(crawler_sosmedYT.iter_youtube_comments(
+        client, keywords=workload["youtube_keywords"],
+        videos_per_keyword=workload["videos_per_keyword"],
+        comments_per_video=workload["comments_per_video"],
+    ))
+    return len(comments)
+
+
+def bench_crawl_youtube_replies(services, workload):
+    """
+    crawl_youtube with reply expansion: embedded replies plus concurrently fetched truncated threads.
+    """
+    import crawler_sosmedYT
+
+    client = crawler_sosmedYT.build_client("benchmark", api_endpoint=services["youtube"].base_url)
+    comments = list(crawler_sosmedYT.iter_youtube_comments(
+        client, keywords=workload["youtube_keywords"],
+        videos_per_keyword=workload["videos_per_keyword"],
+        comments_per_video=workload["comments_per_video"],
+        include_replies=True, reply_quota_budget=workload["reply_quota_budget"],
+    ))
+    return len(comments)
+
+
+def bench_crawl_news_queue(services, workload):
+    """
+    crawler_berita in work-queue mode: a coordinator plus queue_workers worker threads sharing a
+    fresh SQLite queue, with the per-host rate limit switched off like the politeness delays.
+    """
+    import tempfile
+    import crawl_queue
+    import crawler_berita
+
+    site = {**crawler_berita.NEWS_SITES["detik"],
+            "search_url": services["detik"].base_url + "/search/searchall?query={}&page={}"}
+    original_site, crawler_berita.NEWS_SITES["detik"] = crawler_berita.NEWS_SITES["detik"], site
+    intervals = (dict(crawl_queue.HOST_MIN_INTERVALS), crawl_queue.DEFAULT_HOST_INTERVAL)
+    crawl_queue.HOST_MIN_INTERVALS.clear()
+    crawl_queue.DEFAULT_HOST_INTERVAL = 0
+    try:
+        with tempfile.TemporaryDirectory() as queue_dir:
+            args = argparse.Namespace(queue="coordinator", queue_db=os.path.join(queue_dir, "queue.sqlite"),
+                                      workers=workload["queue_workers"], reset_queue=True)
+            crawler_berita.RATE_LIMITER = crawl_queue.HostRateLimiter(args.queue_db)
+            seeds = [crawler_berita.news_search_task(keyword, "detik", workload["articles_per_keyword"])
+                     for keyword in workload["news_keywords"]]
+            articles = crawl_queue.run_queue_role(args, seeds, crawler_berita.QUEUE_HANDLERS, "news_article")
+    finally:
+        crawler_berita.NEWS_SITES["detik"] = original_site
+        crawler_berita.RATE_LIMITER = None
+        crawl_queue.HOST_MIN_INTERVALS.update(intervals[0])
+        crawl_queue.DEFAULT_HOST_INTERVAL = intervals[1]
+    return len(articles)
+
+
+def bench_clean_local(services, workload):
+    """
+    localLLM.format_text_with_local_llm against the fake LM Studio, half news and half comments.
+    """
+    import localLLM
+
+    texts = []
+    for i in range(workload["llm_texts"]):
+        if i % 2:
+            texts.append(("comment", fake_sentence(f"comment:{i}", 15)))
+        else:
+            texts.append(("news", " ".join(fake_sentence(f"news:{i}:{p}", 30) for p in range(8))))
+
+    original_url = localLLM.LM_STUDIO_URL
+    localLLM.LM_STUDIO_URL = services["llm"].base_url + "/v1/chat/completions"
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workload["llm_workers"])) as executor:
+            results = list(executor.map(lambda item: localLLM.format_text_with_local_llm(item[1], item[0]), texts))
+    finally:
+        localLLM.LM_STUDIO_URL = original_url
+    return sum(1 for result in results if not result.startswith("Error:"))
+
+
+STAGES = {
+    "crawl_news": bench_crawl_news,
+    "crawl_youtube": bench_crawl_youtube,
+    "crawl_youtube_replies": bench_crawl_youtube_replies,
+    "crawl_news_queue": bench_crawl_news_queue,
+    "clean_local": bench_clean_local,
+}
+
+
+def run_stage(name, services, workload):
+    """
+    Runs one stage with a fresh metrics registry and returns its throughput and latency summary.
+    """
+    metrics.reset()
+    for service in services.values():
+        service.requests = service.errors = service.cancelled = 0
+
+    start = time.perf_counter()
+    items = STAGES[name](services, workload)
+    elapsed = time.perf_counter() - start
+
+    latency = metrics.histogram(STAGE_METRICS[name]["latency"]).summary()
+    result = {
+        "items": items,
+        "unit": STAGE_METRICS[name]["unit"],
+        "seconds": round(elapsed, 3),
+        "throughput": round(items / elapsed, 3) if elapsed else None,
+        "requests": latency["count"],
+        "p50_ms": round(latency["p50"] * 1000, 1) if latency["p50"] is not None else None,
+        "p95_ms": round(latency["p95"] * 1000, 1) if latency["p95"] is not None else None,
+        "injected_errors": sum(service.errors for service in services.values()),
+    }
+    first_token_metric = STAGE_METRICS[name].get("first_token")
+    if first_token_metric:
+        first_token = metrics.histogram(first_token_metric).summary()
+        if first_token["count"]:
+            result["ttft_p50_ms"] = round(first_token["p50"] * 1000, 1)
+            result["ttft_p95_ms"] = round(first_token["p95"] * 1000, 1)
+        result["cancelled_streams"] = sum(service.cancelled for service in services.values())
+    return result
+
+
+# --- BASELINES ---
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("stages", {})
+
+
+def save_results(results, path, workload, services_config):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(timespec="seconds"), "workload": workload,
+                   "services": services_config, "stages": results}, f, indent=2)
+
+
+def compare(result, baseline, tolerance):
+    """
+    Returns (change descriptions, regressed?) for one stage. Throughput should not drop,
+    p50/p95 should not rise by more than the tolerance.
+    """
+    changes, regressed = [], False
+    for key, higher_is_better in (("throughput", True), ("p50_ms", False), ("p95_ms", False)):
+        old, new = baseline.get(key), result.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = change < -tolerance if higher_is_better else change > tolerance
+        regressed = regressed or worse
+        changes.append(f"{key} {change:+.0%}{' ⚠️' if worse else ''}")
+    return changes, regressed
+
+
+# --- 🚦 MAIN SCRIPT ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the crawl and clean stages against local fake services.")
+    parser.add_argument("stages", nargs="*", help=f"Stages to benchmark: {', '.join(STAGES)} (default: all)")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiply all injected latencies by this factor (0 = no latency)")
+    parser.add_argument("--error-rate", type=float, help="Override the injected error rate of every service")
+    parser.add_argument("--llm-workers", type=int, default=WORKLOAD["llm_workers"],
+                        help="Parallel requests in the clean_local stage (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED)
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file (default: %(default)s)")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="Allowed relative change before a stage counts as regressed (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    services_config = {
+        name: {**config,
+               "latency_ms": config["latency_ms"] * args.latency_scale,
+               "jitter_ms": config["jitter_ms"] * args.latency_scale,
+               "error_rate": config["error_rate"] if args.error_rate is None else args.error_rate}
+        for name, config in FAKE_SERVICES.items()
+    }
+    workload = {**WORKLOAD, "llm_workers": args.llm_workers}
+    stage_names = args.stages or list(STAGES)
+    unknown = [name for name in stage_names if name not in STAGES]
+    if unknown:
+        print(f"❌ ERROR: Unknown stage(s): {', '.join(unknown)}. Available: {', '.join(STAGES)}")
+        exit(2)
+
+    # Log per-request dari crawler/cleaner tidak relevan di sini
+    metrics.LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING")
+
+    print("🚀 Starting offline benchmark (fake detik, YouTube Data API v3 and LM Studio)...")
+    services = start_services(services_config, workload, args.seed)
+    results = {}
+    try:
+        for name in stage_names:
+            print(f"⏱️  Running {name}...")
+            results[name] = run_stage(name, services, workload)
+    finally:
+        for service in services.values():
+            service.stop()
+
+    baseline = load_baseline(args.baseline)
+    regressions = []
+    print("\n" + "="*104)
+    print(f"{'stage':<22} {'items':>7} {'seconds':>8} {'items/s':>9} {'requests':>9} {'p50 ms':>8} {'p95 ms':>8}  vs baseline")
+    print("-"*104)
+    for name, result in results.items():
+        if name in baseline:
+            changes, regressed = compare(result, baseline[name], args.tolerance)
+            if regressed:
+                regressions.append(name)
+            versus = ", ".join(changes) or "-"
+        else:
+            versus = "no baseline"
+        print(f"{name:<22} {result['items']:>7} {result['seconds']:>8.2f} {result['throughput'] or 0:>9.2f} "
+              f"{result['requests']:>9} {result['p50_ms'] or 0:>8.1f} {result['p95_ms'] or 0:>8.1f}  {versus}")
+    for name, result in results.items():
+        if "ttft_p50_ms" in result:
+            print(f"   {name}: time to first token p50 {result['ttft_p50_ms']:.1f} ms, p95 {result['ttft_p95_ms']:.1f} ms, "
+                  f"{result['cancelled_streams']} streams cancelled early")
+    print("="*104)
+
+    save_results(results, LAST_RUN_FILE, workload, services_config)
+    print(f"💾 Results saved to '{LAST_RUN_FILE}'")
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        save_results(merged, args.baseline, workload, services_config)
+        print(f"📌 Baseline updated: '{args.baseline}'")
+
+    if regressions and not args.save_baseline:
+        print(f"❌ Regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        exit(1)
@@ -0,0 +1,400 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+import pandas as pd
+from storage import find_dataset, iter_dataset
+from csv_combiner import unify_results
+
+# --- 📜 CONFIGURATION ---
+
+# Database korpus: artikel, komentar, ringkasan LLM dan hasil sentimen dalam tabel ternormalisasi,
+# dengan indeks FTS5, sehingga pencarian ad-hoc tidak perlu memuat seluruh CSV/Parquet.
+CORPUS_DB_FILE = "combined_data/corpus.sqlite"
+# Dataset sumber (output dari indobert_process.py), tanpa ekstensi
+INPUT_DATASET = "combined_data/final_sentiment_results"
+
+# Nilai kolom 'source' yang berisi komentar; sumber lain dianggap artikel berita
+COMMENT_SOURCES = {"youtube"}
+
+BATCH_SIZE = 2000
+DEFAULT_LIMIT = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id           INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    keyword      TEXT,
+    source       TEXT,
+    url          TEXT,
+    title        TEXT,
+    content      TEXT,
+    published_at TEXT,
+    crawled_at   TEXT,
+    doc_date     TEXT              -- published_at, atau waktu crawl jika tidak ada
+);
+CREATE TABLE IF NOT EXISTS comments (
+    id           INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    keyword      TEXT,
+    source       TEXT,
+    video_url    TEXT,
+    author       TEXT,
+    parent_id    TEXT,             -- thread induk untuk balasan
+    comment_text TEXT,
+    published_at TEXT,
+    crawled_at   TEXT,
+    doc_date     TEXT
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    content_hash   TEXT PRIMARY KEY,
+    gemini_summary TEXT
+);
+CREATE TABLE IF NOT EXISTS sentiment (
+    content_hash    TEXT PRIMARY KEY,
+    sentiment_label TEXT,
+    sentiment_score REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_articles_keyword ON articles(keyword);
+CREATE INDEX IF NOT EXISTS idx_articles_source ON articles(source);
+CREATE INDEX IF NOT EXISTS idx_articles_date ON articles(doc_date);
+CREATE INDEX IF NOT EXISTS idx_comments_keyword ON comments(keyword);
+CREATE INDEX IF NOT EXISTS idx_comments_source ON comments(source);
+CREATE INDEX IF NOT EXISTS idx_comments_date ON comments(doc_date);
+CREATE INDEX IF NOT EXISTS idx_comments_video ON comments(video_url);
+CREATE INDEX IF NOT EXISTS idx_sentiment_label ON sentiment(sentiment_label);
+
+-- rowid FTS = id di tabel artikel/komentar
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, content, gemini_summary, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+    comment_text, gemini_summary, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Per jenis dokumen: tabel, tabel FTS, {kolom_tabel: kolom_dataset}, kolom teks yang diindeks FTS
+DOCUMENT_KINDS = {
+    "article": {
+        "table": "articles",
+        "fts": "articles_fts",
+        "columns": {"content_hash": "content_hash", "keyword": "keyword", "source": "source", "url": "url",
+                    "title": "title", "content": "text", "published_at": "published_at",
+                    "crawled_at": "timestamp"},
+        "fts_columns": ["title", "content"],
+        "url_column": "url",
+    },
+    "comment": {
+        "table": "comments",
+        "fts": "comments_fts",
+        "columns": {"content_hash": "content_hash", "keyword": "keyword", "source": "source",
+                    "video_url": "url", "author": "author", "parent_id": "parent_id", "comment_text": "text",
+                    "published_at": "published_at", "crawled_at": "timestamp"},
+        "fts_columns": ["comment_text"],
+        "url_column": "video_url",
+    },
+}
+
+
+def open_corpus(db_file=CORPUS_DB_FILE):
+    """
+    Opens (and creates if needed) the corpus database.
+    """
+    os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # Database yang dibuat sebelum kolom parent_id ada
+    if "parent_id" not in {row["name"] for row in conn.execute("PRAGMA table_info(comments)")}:
+        conn.execute("ALTER TABLE comments ADD COLUMN parent_id TEXT")
+    return conn
+
+
+def to_text(value):
+    """
+    Converts a dataset value to something SQLite can store: timestamps as ISO text, missing as None.
+    """
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value if isinstance(value, (int, float)) else str(value)
+
+
+def upsert_documents(conn, kind, batch):
+    """
+    Inserts or updates one batch of documents of one kind, their summary and sentiment,
+    and refreshes their full-text index entries. Returns the number of documents.
+    """
+    config = DOCUMENT_KINDS[kind]
+    table_columns = list(config["columns"]) + ["doc_date"]
+    records = batch.to_dict("records")
+    rows = []
+    for record in records:
+        row = {column: to_text(record.get(source)) for column, source in config["columns"].items()}
+        row["doc_date"] = row["published_at"] or row["crawled_at"]
+        rows.append(row)
+    if not rows:
+        return 0
+
+    placeholders = ", ".join(f":{column}" for column in table_columns)
+    updates = ", ".join(f"{column} = excluded.{column}" for column in table_columns if column != "content_hash")
+    conn.executemany(
+        f"INSERT INTO {config['table']} ({', '.join(table_columns)}) VALUES ({placeholders}) "
+        f"ON CONFLICT(content_hash) DO UPDATE SET {updates}",
+        rows,
+    )
+
+    summaries = [(row["content_hash"], to_text(record.get("gemini_summary"))) for row, record in zip(rows, records)]
+    conn.executemany("INSERT OR REPLACE INTO summaries (content_hash, gemini_summary) VALUES (?, ?)", summaries)
+    if "sentiment_label" in batch.columns:
+        conn.executemany(
+            "INSERT OR REPLACE INTO sentiment (content_hash, sentiment_label, sentiment_score) VALUES (?, ?, ?)",
+            [(row["content_hash"], to_text(record.get("sentiment_label")), to_text(record.get("sentiment_score")))
+             for row, record in zip(rows, records)],
+        )
+
+    # Indeks FTS diperbarui lewat rowid = id dokumen
+    hashes = [row["content_hash"] for row in rows]
+    ids = {}
+    for start in range(0, len(hashes), 500):
+        part = hashes[start:start + 500]
+        query = f"SELECT id, content_hash FROM {config['table']} WHERE content_hash IN ({', '.join('?' * len(part))})"
+        ids.update((item["content_hash"], item["id"]) for item in conn.execute(query, part))
+
+    fts_columns = config["fts_columns"] + ["gemini_summary"]
+    conn.executemany(f"DELETE FROM {config['fts']} WHERE rowid = ?", [(ids[h],) for h in hashes])
+    conn.executemany(
+        f"INSERT INTO {config['fts']} (rowid, {', '.join(fts_columns)}) VALUES (?{', ?' * len(fts_columns)})",
+        [(ids[row["content_hash"]], *[row[column] for column in config["fts_columns"]], summary)
+         for row, (_, summary) in zip(rows, summaries)],
+    )
+    return len(rows)
+
+
+def load_dataset(conn, input_file, batch_size=BATCH_SIZE):
+    """
+    Streams a results dataset into the corpus. Rows whose source is in COMMENT_SOURCES
+    become comments, all other rows articles. Legacy files without the unified columns are
+    mapped onto them first (see csv_combiner.unify_results). Returns {kind: rows}.
+    """
+    counts = {kind: 0 for kind in DOCUMENT_KINDS}
+    for batch in iter_dataset(input_file, batch_size=batch_size):
+        batch = unify_results(batch)
+        # File lama belum di-dedup oleh csv_combiner.py; hash ganda dalam satu batch merusak indeks FTS
+        batch = batch[batch["content_hash"].notna()].drop_duplicates("content_hash", keep="last")
+        is_comment = batch["source"].fillna("").str.lower().isin(COMMENT_SOURCES)
+        with conn:
+            counts["article"] += upsert_documents(conn, "article", batch[~is_comment])
+            counts["comment"] += upsert_documents(conn, "comment", batch[is_comment])
+    return counts
+
+
+def _filters(alias, keyword=None, source=None, since=None, until=None, label=None):
+    clauses, params = [], []
+    if keyword:
+        clauses.append(f"{alias}.keyword = ?")
+        params.append(keyword)
+    if source:
+        clauses.append(f"lower({alias}.source) = lower(?)")
+        params.append(source)
+    if since:
+        clauses.append(f"{alias}.doc_date >= ?")
+        params.append(since)
+    if until:
+        clauses.append(f"{alias}.doc_date < ?")
+        params.append(until)
+    if label:
+        clauses.append("s.sentiment_label = ?")
+        params.append(label)
+    return clauses, params
+
+
+def fts_query(query, raw=False):
+    """
+    Turns plain search terms into an FTS5 query: every whitespace-separated term becomes a quoted
+    phrase (so 'anti-hoax' or 'KPU-Bawaslu' are not read as column filters), all terms must match,
+    and a trailing '*' keeps prefix search ('toler*'). With raw=True the query is passed as FTS5 syntax.
+    """
+    if raw:
+        return query
+    phrases = []
+    for term in query.split():
+        prefix = term.endswith("*") and len(term.rstrip("*")) > 0
+        term = term.rstrip("*") if prefix else term
+        phrases.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(phrases)
+
+
+def search(conn, query, kinds=None, keyword=None, source=None, since=None, until=None, label=None,
+           limit=DEFAULT_LIMIT, raw=False):
+    """
+    Full-text search over articles and/or comments, with optional filters. The query is plain terms
+    (see fts_query), or FTS5 syntax with raw=True (e.g. 'pemilu AND damai', '"politik identitas"').
+    Returns a list of dicts ordered by relevance; an invalid raw query raises sqlite3.OperationalError.
+    """
+    query = fts_query(query, raw)
+    results = []
+    for kind in kinds or list(DOCUMENT_KINDS):
+        config = DOCUMENT_KINDS[kind]
+        clauses, params = _filters("d", keyword, source, since, until, label)
+        where = "".join(f" AND {clause}" for clause in clauses)
+        sql = (
+            f"SELECT '{kind}' AS kind, d.content_hash, d.keyword, d.source, d.{config['url_column']} AS url, "
+            f"d.doc_date, {'d.title' if kind == 'article' else 'd.author'} AS title_or_author, "
+            f"snippet({config['fts']}, -1, '[', ']', ' … ', 12) AS snippet, "
+            f"s.sentiment_label, s.sentiment_score, bm25({config['fts']}) AS rank "
+            f"FROM {config['fts']} f JOIN {config['table']} d ON d.id = f.rowid "
+            f"LEFT JOIN sentiment s ON s.content_hash = d.content_hash "
+            f"WHERE {config['fts']} MATCH ?{where} ORDER BY rank LIMIT ?"
+        )
+        results.extend(dict(row) for row in conn.execute(sql, [query] + params + [limit]))
+    results.sort(key=lambda row: row["rank"])
+    return results[:limit]
+
+
+def sentiment_breakdown(conn, query=None, group_by="keyword", kinds=None, raw=False, **filters):
+    """
+    Counts sentiment labels per group ('keyword', 'source', 'day' or 'kind'), optionally
+    restricted to documents matching a full-text query (as in search). Returns a DataFrame.
+    """
+    if query:
+        query = fts_query(query, raw)
+    group_sql = {"keyword": "d.keyword", "source": "d.source", "day": "substr(d.doc_date, 1, 10)"}
+    parts, params = [], []
+    for kind in kinds or list(DOCUMENT_KINDS):
+        config = DOCUMENT_KINDS[kind]
+        clauses, filter_params = _filters("d", **filters)
+        if query:
+            clauses.insert(0, f"d.id IN (SELECT rowid FROM {config['fts']} WHERE {config['fts']} MATCH ?)")
+            filter_params.insert(0, query)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        group = f"'{kind}'" if group_by == "kind" else group_sql[group_by]
+        parts.append(
+            f"SELECT {group} AS grp, coalesce(s.sentiment_label, 'unscored') AS label FROM {config['table']} d "
+            f"LEFT JOIN sentiment s ON s.content_hash = d.content_hash {where}"
+        )
+        params.extend(filter_params)
+
+    sql = f"SELECT grp AS {group_by}, label, count(*) AS n FROM ({' UNION ALL '.join(parts)}) GROUP BY grp, label"
+    rows = pd.DataFrame([dict(row) for row in conn.execute(sql, params)], columns=[group_by, "label", "n"])
+    if rows.empty:
+        return rows
+    table = rows.pivot_table(index=group_by, columns="label", values="n", fill_value=0, aggfunc="sum")
+    table["total"] = table.sum(axis=1)
+    return table.sort_values("total", ascending=False)
+
+
+def corpus_stats(conn):
+    """
+    Returns the number of rows per table.
+    """
+    return {table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ("articles", "comments", "summaries", "sentiment")}
+
+
+# --- 🚦 MAIN SCRIPT ---
+
+def add_filter_arguments(parser):
+    parser.add_argument("--kind", choices=sorted(DOCUMENT_KINDS), help="Only articles or only comments")
+    parser.add_argument("--keyword", help="Exact crawl keyword")
+    parser.add_argument("--source", help="Source, e.g. detik or YouTube")
+    parser.add_argument("--since", help="From date (YYYY-MM-DD, inclusive)")
+    parser.add_argument("--until", help="Until date (YYYY-MM-DD, exclusive)")
+    parser.add_argument("--label", help="Sentiment label, e.g. negative")
+    parser.add_argument("--raw", action="store_true",
+                        help="Treat the query as FTS5 syntax (AND/OR/NOT, \"phrases\", NEAR) instead of plain terms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Corpus database with full-text search over articles and comments.")
+    parser.add_argument("--db", default=CORPUS_DB_FILE, help="Corpus database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load_parser = commands.add_parser("load", help="Load (upsert) a sentiment results dataset into the corpus")
+    load_parser.add_argument("--input", default=INPUT_DATASET, help="Dataset base name or file (default: %(default)s)")
+
+    search_parser = commands.add_parser("search", help="Full-text search, e.g. search 'anti-hoax pemilu'")
+    search_parser.add_argument("query", help="Search terms (all must match), or FTS5 syntax with --raw")
+    search_parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    search_parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    add_filter_arguments(search_parser)
+
+    stats_parser = commands.add_parser("stats", help="Sentiment counts per keyword/source/day/kind")
+    stats_parser.add_argument("query", nargs="?", help="Optional search terms to restrict the documents")
+    stats_parser.add_argument("--by", choices=["keyword", "source", "day", "kind"], default="keyword")
+    add_filter_arguments(stats_parser)
+
+    sql_parser = commands.add_parser("sql", help="Run a read-only SQL query against the corpus")
+    sql_parser.add_argument("statement")
+    args = parser.parse_args()
+
+    if args.command != "load" and not os.path.exists(args.db):
+        print(f"❌ ERROR: Corpus database not found at '{args.db}'. Run 'python corpus_store.py load' first.")
+        exit(1)
+
+    start_time = time.perf_counter()
+    conn = open_corpus(args.db)
+
+    if args.command == "load":
+        input_file = args.input if os.path.splitext(args.input)[1] else find_dataset(args.input)
+        if input_file is None or not os.path.exists(input_file):
+            print(f"❌ ERROR: Dataset not found at '{args.input}'. Please run indobert_process.py first.")
+            exit(1)
+        print(f"📖 Loading '{input_file}' into '{args.db}'...")
+        counts = load_dataset(conn, input_file)
+        print(f"✅ Loaded {counts['article']} articles and {counts['comment']} comments "
+              f"in {time.perf_counter() - start_time:.1f}s")
+        print(f"🗃️  Corpus now holds: {corpus_stats(conn)}")
+
+    elif args.command == "search":
+        try:
+            results = search(conn, args.query, kinds=[args.kind] if args.kind else None, keyword=args.keyword,
+                             source=args.source, since=args.since, until=args.until, label=args.label,
+                             limit=args.limit, raw=args.raw)
+        except sqlite3.OperationalError as e:
+            print(f"❌ ERROR: Invalid query '{args.query}': {e}")
+            exit(1)
+        for row in results:
+            if args.json:
+                print(json.dumps(row, ensure_ascii=False))
+            else:
+                score = f"{row['sentiment_score']:.2f}" if row["sentiment_score"] is not None else "-"
+                print(f"[{row['kind']}] {row['sentiment_label'] or 'unscored'} ({score}) "
+                      f"{(row['doc_date'] or '')[:10]} {row['source']} | {row['title_or_author'] or ''}")
+                print(f"    {row['snippet']}")
+                print(f"    {row['url']}")
+        print(f"🔎 {len(results)} results in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+    elif args.command == "stats":
+        try:
+            table = sentiment_breakdown(conn, args.query, group_by=args.by,
+                                        kinds=[args.kind] if args.kind else None, raw=args.raw,
+                                        keyword=args.keyword, source=args.source, since=args.since,
+                                        until=args.until, label=args.label)
+        except sqlite3.OperationalError as e:
+            print(f"❌ ERROR: Invalid query '{args.query}': {e}")
+            exit(1)
+        print(table.to_string() if not table.empty else "No matching documents.")
+        print(f"📊 Computed in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+    elif args.command == "sql":
+        conn.execute("PRAGMA query_only = ON")
+        rows = pd.read_sql_query(args.statement, conn)
+        print(rows.to_string(index=False))
+
+    conn.close()
+    if args.command == "load":
+        # Upsert tanpa perubahan tidak menyentuh file; mtime menandai load yang berhasil untuk pipeline.py
+        os.utime(args.db)
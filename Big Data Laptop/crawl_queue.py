@@ -0,0 +1,378 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+import metrics
+from records import as_dict
+
+# --- 📜 CONFIGURATION ---
+
+# Mode antrian kerja: coordinator mengisi antrian tugas (keyword, halaman pencarian, URL artikel, video)
+# di satu file SQLite, lalu worker di beberapa proses atau mesin (folder bersama) mengambil tugas dengan lease.
+# Tugas yang lease-nya habis (worker mati) otomatis diambil worker lain; kunci unik per tugas mencegah
+# URL/video yang sama di-fetch dua kali.
+QUEUE_DB_FILE = "crawl_queue/queue.sqlite"
+LEASE_SECONDS = 300           # Visibility timeout per tugas
+MAX_ATTEMPTS = 3              # Setelah ini tugas ditandai gagal
+IDLE_POLL_SECONDS = 0.25      # Jeda worker saat belum ada tugas siap
+PROGRESS_INTERVAL_SECONDS = 10
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+
+# Jarak minimum (detik) antar request ke satu host, berlaku global untuk semua worker.
+# Dicocokkan dengan akhiran nama host (news.detik.com → detik.com).
+HOST_MIN_INTERVALS = {"detik.com": 1.0, "googleapis.com": 0.1}
+DEFAULT_HOST_INTERVAL = 0.5
+
+QUEUE_ROLES = ("coordinator", "worker")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id          INTEGER PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    key         TEXT NOT NULL UNIQUE,   -- mis. news_article:<url>; tugas dengan kunci sama hanya sekali
+    payload     TEXT NOT NULL,
+    priority    INTEGER NOT NULL DEFAULT 0,
+    state       TEXT NOT NULL DEFAULT 'pending',  -- pending, leased, done, failed
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    error       TEXT,
+    created_at  REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks(state, priority DESC, id);
+CREATE TABLE IF NOT EXISTS results (
+    id      INTEGER PRIMARY KEY,
+    task_id INTEGER NOT NULL,
+    kind    TEXT NOT NULL,
+    record  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_kind ON results(kind, id);
+CREATE TABLE IF NOT EXISTS hosts (
+    host      TEXT PRIMARY KEY,
+    next_slot REAL NOT NULL            -- waktu paling awal request berikutnya boleh dikirim
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def add_queue_arguments(parser):
+    """
+    Adds the shared work-queue options to a crawler's argument parser.
+    """
+    parser.add_argument("--queue", choices=QUEUE_ROLES,
+                        help="Work-queue mode: 'coordinator' enqueues the crawl and writes the results once the "
+                             "queue is drained, 'worker' processes tasks (run as many as you like)")
+    parser.add_argument("--queue-db", default=QUEUE_DB_FILE,
+                        help="Queue database shared by coordinator and workers (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker threads in this process (default: 1 for a worker, 0 for the coordinator)")
+    parser.add_argument("--reset-queue", action="store_true",
+                        help="Coordinator: delete all tasks and results of a previous crawl first")
+
+
+def _host_key(url_or_host):
+    host = urlparse(url_or_host).netloc if "//" in url_or_host else url_or_host
+    host = host.split(":")[0].lower()
+    for suffix in HOST_MIN_INTERVALS:
+        if host == suffix or host.endswith("." + suffix):
+            return suffix
+    return host
+
+
+class CrawlQueue:
+    """
+    Durable task queue in one SQLite file. Use one instance per thread.
+    """
+
+    def __init__(self, db_file=QUEUE_DB_FILE):
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _insert_tasks(self, tasks):
+        inserted = 0
+        now = time.time()
+        for kind, key, payload, priority in tasks:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO tasks (kind, key, payload, priority, created_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, key, json.dumps(payload, ensure_ascii=False), priority, now),
+            )
+            inserted += cursor.rowcount
+        return inserted
+
+    def enqueue(self, tasks):
+        """
+        Adds (kind, key, payload, priority) tasks; keys already in the queue are ignored.
+        Returns the number of new tasks.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            inserted = self._insert_tasks(tasks)
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return inserted
+
+    def known_keys(self, keys):
+        """
+        Returns the subset of keys that already exist as tasks (in any state).
+        """
+        keys, known = list(keys), set()
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            rows = self.conn.execute(f"SELECT key FROM tasks WHERE key IN ({', '.join('?' * len(part))})", part)
+            known.update(row[0] for row in rows)
+        return known
+
+    def lease(self, worker_id, lease_seconds=LEASE_SECONDS):
+        """
+        Leases the highest-priority ready task: pending, or leased with an expired lease.
+        Returns {"id", "kind", "key", "payload", "attempts"} or None.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT id, kind, key, payload, attempts FROM tasks "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) "
+                "ORDER BY priority DESC, id LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            if row[4] >= MAX_ATTEMPTS:
+                # Worker terakhir mati di tengah tugas ini terlalu sering
+                self.conn.execute("UPDATE tasks SET state = 'failed', error = 'lease expired', finished_at = ? "
+                                  "WHERE id = ?", (now, row[0]))
+                self.conn.execute("COMMIT")
+                return self.lease(worker_id, lease_seconds)
+            self.conn.execute(
+                "UPDATE tasks SET state = 'leased', lease_owner = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE id = ?", (worker_id, now + lease_seconds, row[0]))
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return {"id": row[0], "kind": row[1], "key": row[2], "payload": json.loads(row[3]), "attempts": row[4] + 1}
+
+    def complete(self, task, worker_id, records=(), follow_ups=()):
+        """
+        Stores the task's result records and follow-up tasks and marks it done, atomically and
+        only if this worker still holds the lease. Returns False if the lease was lost (the task
+        was handed to another worker after the visibility timeout), in which case nothing is stored.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            updated = self.conn.execute(
+                "UPDATE tasks SET state = 'done', finished_at = ?, error = NULL "
+                "WHERE id = ? AND state = 'leased' AND lease_owner = ?", (time.time(), task["id"], worker_id)
+            ).rowcount
+            if updated:
+                self.conn.executemany(
+                    "INSERT INTO results (task_id, kind, record) VALUES (?, ?, ?)",
+                    [(task["id"], task["kind"], json.dumps(as_dict(record), ensure_ascii=False, default=str))
+                     for record in records],
+                )
+                self._insert_tasks(follow_ups)
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return bool(updated)
+
+    def fail(self, task, worker_id, error):
+        """
+        Releases a task after an error: back to pending for another attempt, or failed after MAX_ATTEMPTS.
+        """
+        state = "failed" if task["attempts"] >= MAX_ATTEMPTS else "pending"
+        self.conn.execute(
+            "UPDATE tasks SET state = ?, error = ?, lease_owner = NULL, lease_until = NULL, finished_at = ? "
+            "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+            (state, str(error)[:500], time.time() if state == "failed" else None, task["id"], worker_id),
+        )
+        return state
+
+    def counts(self):
+        """
+        Number of tasks per state, e.g. {"pending": 3, "leased": 2, "done": 40, "failed": 0}.
+        """
+        counts = {state: 0 for state in ("pending", "leased", "done", "failed")}
+        counts.update(self.conn.execute("SELECT state, count(*) FROM tasks GROUP BY state").fetchall())
+        return counts
+
+    def is_drained(self):
+        """
+        True once the coordinator has seeded the queue and no task is pending or leased.
+        """
+        if self.get_meta("seeded") != "1":
+            return False
+        counts = self.counts()
+        return counts["pending"] == 0 and counts["leased"] == 0
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def iter_results(self, kind):
+        """
+        Yields the result records of one task kind in insertion order.
+        """
+        for (record,) in self.conn.execute("SELECT record FROM results WHERE kind = ? ORDER BY id", (kind,)):
+            yield json.loads(record)
+
+    def reset(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        for table in ("tasks", "results", "hosts", "meta"):
+            self.conn.execute(f"DELETE FROM {table}")
+        self.conn.execute("COMMIT")
+
+    def reserve_host_slot(self, url_or_host):
+        """
+        Reserves the next free request slot for the URL's host, shared by all workers.
+        Returns the seconds to wait before sending the request.
+        """
+        host = _host_key(url_or_host)
+        interval = HOST_MIN_INTERVALS.get(host, DEFAULT_HOST_INTERVAL)
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute("SELECT next_slot FROM hosts WHERE host = ?", (host,)).fetchone()
+            slot = max(now, row[0]) if row else now
+            self.conn.execute("INSERT OR REPLACE INTO hosts (host, next_slot) VALUES (?, ?)", (host, slot + interval))
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return slot - now
+
+
+class HostRateLimiter:
+    """
+    Global per-host rate limit backed by the queue database; safe to call from any thread.
+    """
+
+    def __init__(self, db_file=QUEUE_DB_FILE):
+        self.db_file = db_file
+        self.local = threading.local()
+
+    def wait(self, url_or_host):
+        if not hasattr(self.local, "queue"):
+            self.local.queue = CrawlQueue(self.db_file)
+        delay = self.local.queue.reserve_host_slot(url_or_host)
+        if delay > 0:
+            metrics.histogram("queue_rate_limit_wait_seconds", "Wait for the per-host rate limit").observe(
+                delay, host=_host_key(url_or_host))
+            time.sleep(delay)
+
+
+def run_worker(db_file, handlers, worker_id=None):
+    """
+    Leases and processes tasks until the queue is drained. A handler takes (payload, queue) and
+    returns (result records, follow-up tasks); an exception releases the task for a retry.
+    Returns the number of tasks completed by this worker.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    queue = CrawlQueue(db_file)
+    logger = metrics.get_logger("crawl_queue")
+    completed = 0
+    try:
+        while True:
+            task = queue.lease(worker_id)
+            if task is None:
+                if queue.is_drained():
+                    break
+                time.sleep(IDLE_POLL_SECONDS)
+                continue
+
+            handler = handlers.get(task["kind"])
+            outcome = "done"
+            try:
+                if handler is None:
+                    raise ValueError(f"no handler for task kind '{task['kind']}'")
+                with metrics.timer("queue_task_seconds", "Task processing time", kind=task["kind"]):
+                    records, follow_ups = handler(task["payload"], queue)
+                if queue.complete(task, worker_id, records, follow_ups):
+                    completed += 1
+                else:
+                    outcome = "lease_lost"
+                    logger.warning("lease lost, result discarded", task=task["key"], worker=worker_id)
+            except Exception as e:
+                outcome = queue.fail(task, worker_id, e)
+                logger.error("task failed", task=task["key"], attempt=task["attempts"], state=outcome, error=str(e))
+            metrics.counter("queue_tasks_total", "Queue tasks by outcome").inc(kind=task["kind"], outcome=outcome)
+    finally:
+        queue.close()
+    logger.info("worker finished", worker=worker_id, completed=completed)
+    return completed
+
+
+def run_workers(db_file, handlers, count, worker_prefix=None):
+    """
+    Runs `count` worker threads in this process until the queue is drained.
+    """
+    prefix = worker_prefix or f"{socket.gethostname()}-{os.getpid()}"
+    threads = [threading.Thread(target=run_worker, args=(db_file, handlers, f"{prefix}-{i}"),
+                                name=f"queue-worker-{i}", daemon=True)
+               for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def run_queue_role(args, seeds, handlers, result_kind):
+    """
+    Runs the --queue role of a crawler. The coordinator enqueues the seed tasks, optionally runs
+    local workers, waits until the queue is drained and returns the result records of
+    `result_kind`. A worker processes tasks until the queue is drained and returns None.
+    """
+    workers = args.workers if args.workers is not None else (1 if args.queue == "worker" else 0)
+    queue = CrawlQueue(args.queue_db)
+
+    if args.queue == "worker":
+        queue.close()
+        print(f"👷 Working on queue '{args.queue_db}' with {workers} worker thread(s)...")
+        for thread in run_workers(args.queue_db, handlers, max(1, workers)):
+            thread.join()
+        return None
+
+    if args.reset_queue:
+        queue.reset()
+    added = queue.enqueue(seeds)
+    queue.set_meta("seeded", "1")
+    print(f"📥 Enqueued {added} new seed task(s) in '{args.queue_db}' ({queue.counts()})")
+    threads = run_workers(args.queue_db, handlers, workers) if workers > 0 else []
+    if not threads:
+        print("⏳ Waiting for workers (start them with --queue worker)...")
+
+    last_progress = time.time()
+    while not queue.is_drained():
+        time.sleep(IDLE_POLL_SECONDS)
+        if time.time() - last_progress >= PROGRESS_INTERVAL_SECONDS:
+            last_progress = time.time()
+            print(f"   queue: {queue.counts()}")
+    for thread in threads:
+        thread.join()
+
+    counts = queue.counts()
+    print(f"✅ Queue drained: {counts['done']} tasks done, {counts['failed']} failed")
+    records = list(queue.iter_results(result_kind))
+    queue.close()
+    return records
@@ -1,15 +1,27 @@
+import argparse
+import itertools
 import requests
 from bs4 import BeautifulSoup
 import time
 import os
-import csv
+from collections import deque
 from datetime import datetime
+from urllib.parse import urlparse
 from dotenv import load_dotenv
-from keywords_config import NEWS_KEYWORDS, SCRAPING_LIMITS
+from keywords_config import NEWS_KEYWORDS, SCRAPING_LIMITS, LIMIT_NEWS_KEYWORDS
+from storage import dataset_path, write_dataset
+from records import NewsArticle, NEWS_COLUMNS, records_to_frame
+import metrics
+import profiling
+import crawl_queue
+import planner
+from relevance import RelevanceScorer, RELEVANCE_MIN_SCORE
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = metrics.get_logger("crawler_berita")
+
 # Create directories if they don't exist
 os.makedirs("news_portal", exist_ok=True)
 os.makedirs("social_media", exist_ok=True)
@@ -27,9 +39,33 @@ HEADERS = {
 }
 
 # Crawler Limit
+NEWS_KEYWORDS = NEWS_KEYWORDS[:LIMIT_NEWS_KEYWORDS]  # LIMIT_NEWS_KEYWORDS = None: semua keyword
 MAX_ARTICLES_PER_KEYWORD = 30  # Increase to 30 per keyword per site
 MAX_LINKS_TO_SCRAPE = 100  # Maximum links to try per search
 TARGET_TOTAL_ARTICLES = 1000  # Overall target - 1000 articles
+LINK_BUFFER_FACTOR = 2  # Link yang dikumpulkan per artikel yang dibutuhkan; cadangan untuk scrape yang gagal
+
+# Politeness delays (seconds) between requests
+CRAWL_DELAYS = {
+    "search_page": 2,  # Between search result pages
+    "article": 1,      # Between article pages
+    "site": 3,         # Between sites for the same keyword
+}
+
+# Adaptive pagination: keyword berhenti paginasi begitu satu halaman hasil pencarian hanya berisi sedikit
+# link baru yang relevan; halaman yang tidak terpakai (dari max_pages) dipakai keyword yang masih produktif.
+ADAPTIVE_PAGINATION = True
+MIN_PAGE_YIELD = 0.25               # Bagian minimum hasil per halaman yang baru dan relevan
+MAX_EXTRA_PAGES_PER_KEYWORD = 5     # Halaman tambahan maksimum per keyword dari anggaran yang dihemat
+# Putaran kedua bergiliran (round-robin) antar keyword agar satu keyword tidak menghabiskan sisa target
+REALLOCATION_TURN_ARTICLES = 5                          # Artikel maksimum per keyword per giliran
+MAX_EXTRA_ARTICLES_PER_KEYWORD = MAX_ARTICLES_PER_KEYWORD  # Artikel tambahan maksimum per keyword dan situs
+# Hasil pencarian dengan skor relevansi judul di bawah ini tidak di-scrape (None = scrape semua)
+SEARCH_RESULT_MIN_RELEVANCE = RELEVANCE_MIN_SCORE
+YIELD_BUCKETS = (0, 0.1, 0.25, 0.5, 0.75, 0.9, 1)
+
+# Mode antrian kerja (--queue): rate limit global per host untuk semua worker, menggantikan CRAWL_DELAYS
+RATE_LIMITER = None  # crawl_queue.HostRateLimiter, diisi saat --queue dipakai
 
 #Taget Config
 NEWS_SITES = {
@@ -41,115 +77,194 @@ NEWS_SITES = {
         "full_title_selector": {"tag": "h1", "class": "detail__title"},
         "content_selector": {"tag": "div", "class": "detail__body-text"},
         "paragraph_selector": "p",
-        "csv_file": "news_portal/news_detik.csv",
+        "output_file": dataset_path("news_portal/news_detik"),
         "max_pages": 5  # Scrape multiple pages of search results
     }
 }
 
-def save_to_csv(articles, csv_file):
+def save_articles(articles, output_file):
     """
-    Saves scraped articles to CSV file (overwrites existing file).
+    Saves scraped articles to the site's dataset file (overwrites existing file).
     """
     if not articles:
-        print(f"No articles to save for {csv_file}")
+        logger.warning("no articles to save", output_file=output_file)
         return
     
-    # CSV headers
-    fieldnames = ['timestamp', 'keyword', 'source', 'title', 'url', 'content', 'paragraph_count']
-    
     try:
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for article in articles:
-                writer.writerow({
-                    'timestamp': article.get('timestamp', ''),
-                    'keyword': article.get('keyword', ''),
-                    'source': article.get('source', ''),
-                    'title': article.get('title', ''),
-                    'url': article.get('url', ''),
-                    'content': article.get('content', ''),
-                    'paragraph_count': article.get('paragraph_count', 0)
-                })
+        df = records_to_frame(articles, NEWS_COLUMNS)
+        df['paragraph_count'] = df['paragraph_count'].fillna(0)
+        write_dataset(df, output_file)
         
-        print(f"💾 Saved {len(articles)} articles to {csv_file}")
+        logger.info("articles saved", count=len(articles), output_file=output_file)
     
     except Exception as e:
-        print(f"❌ Error saving to CSV: {e}")
+        logger.error("saving dataset failed", output_file=output_file, error=str(e))
+
+
+def fetch(url, timeout=15):
+    """
+    GET request that records latency, status and downloaded bytes per host.
+    """
+    host = urlparse(url).netloc
+    if RATE_LIMITER is not None:
+        RATE_LIMITER.wait(url)
+    start = time.perf_counter()
+    try:
+        response = requests.get(url, headers=HEADERS, timeout=timeout)
+    except requests.exceptions.RequestException:
+        metrics.counter("http_errors_total", "Failed HTTP requests").inc(host=host)
+        raise
+    finally:
+        metrics.histogram("http_request_seconds", "HTTP request latency").observe(
+            time.perf_counter() - start, host=host
+        )
+    metrics.counter("http_requests_total", "HTTP responses by status").inc(host=host, status=response.status_code)
+    metrics.counter("http_bytes_total", "Downloaded bytes").inc(len(response.content), host=host)
+    return response
+
+
+def search_page_url(keyword, site_config, page):
+    """
+    Formats the site's search URL for a keyword and result page.
+    """
+    if '{}' in site_config["search_url"]:
+        # Check if URL has two placeholders (keyword and page)
+        if site_config["search_url"].count('{}') == 2:
+            return site_config["search_url"].format(keyword.replace(' ', '+'), page)
+        # Only keyword placeholder
+        return site_config["search_url"].format(keyword.replace(' ', '+'))
+    return site_config["search_url"]
+
+
+def fetch_search_results(keyword, site_name, site_config, page):
+    """
+    Fetches one search result page. Returns [(url, title)], an empty list if the page has
+    no results, or None if the request failed.
+    """
+    search_url = search_page_url(keyword, site_config, page)
+    logger.debug("fetching search page", page=page, url=search_url)
+    try:
+        response = fetch(search_url)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logger.error("search page failed", site=site_name, keyword=keyword, page=page, error=str(e))
+        return None
+
+    soup = BeautifulSoup(response.text, 'html.parser')
+    results = []
+    for article in soup.find_all(site_config["article_selector"].split('[')[0]):
+        link_tag = article.find(site_config["link_selector"])
+        if link_tag and link_tag.get('href'):
+            url = link_tag['href']
+
+            if url.startswith('/'):
+                base_domain = f"https://www.{site_name}"
+                url = base_domain + url
+            elif not url.startswith('http'):
+                url = f"https://www.{site_name}/{url}"
+
+            title_tag = article.find(site_config.get("title_in_article", "h2"))
+            results.append((url, title_tag.get_text(strip=True) if title_tag else ""))
+    return results
 
 
-def get_article_links_paginated(keyword, site_name, site_config, articles_needed):
+class SearchPager:
+    """
+    Pages through the search results of one keyword on one site. Per page it records the
+    yield: the share of results that are new (not seen under any keyword) and relevant
+    (search-result title scored with relevance.py). Links that were found but not scraped
+    yet stay in `pending`.
+    """
+
+    def __init__(self, keyword, site_name, site_config, seen_urls=None, scorer=None):
+        self.keyword = keyword
+        self.site_name = site_name
+        self.site_config = site_config
+        self.seen_urls = seen_urls if seen_urls is not None else set()
+        self.scorer = scorer
+        self.next_page = 1
+        self.pages_fetched = 0
+        self.last_yield = None
+        self.exhausted = False
+        self.pending = []
+
+    @property
+    def producing(self):
+        """
+        True while the next page is worth fetching.
+        """
+        if self.exhausted:
+            return False
+        return not ADAPTIVE_PAGINATION or self.last_yield is None or self.last_yield >= MIN_PAGE_YIELD
+
+    def fetch_next(self):
+        """
+        Fetches the next result page and adds its new, relevant links to `pending`.
+        """
+        page = self.next_page
+        self.next_page += 1
+        self.pages_fetched += 1
+        results = fetch_search_results(self.keyword, self.site_name, self.site_config, page)
+        if not results:
+            if results is not None:
+                logger.info("no articles on search page", site=self.site_name, keyword=self.keyword, page=page)
+            self.exhausted = True
+            self.last_yield = 0.0
+            return
+
+        new_links, seen, irrelevant = [], 0, 0
+        for url, title in results:
+            if url in self.seen_urls:
+                seen += 1
+                continue
+            self.seen_urls.add(url)
+            if (self.scorer is not None and title
+                    and self.scorer.score({"title": title})[0] < SEARCH_RESULT_MIN_RELEVANCE):
+                irrelevant += 1
+                continue
+            new_links.append(url)
+
+        self.pending.extend(new_links)
+        self.last_yield = len(new_links) / len(results)
+        results_counter = metrics.counter("search_results_total", "Search results by outcome")
+        results_counter.inc(len(new_links), site=self.site_name, outcome="new")
+        results_counter.inc(seen, site=self.site_name, outcome="seen")
+        results_counter.inc(irrelevant, site=self.site_name, outcome="irrelevant")
+        metrics.histogram("search_page_yield", "Share of new, relevant links per search page",
+                          buckets=YIELD_BUCKETS).observe(self.last_yield, site=self.site_name)
+        logger.info("search page parsed", site=self.site_name, keyword=self.keyword, page=page,
+                    new_links=len(new_links), seen=seen, irrelevant=irrelevant, page_yield=round(self.last_yield, 2))
+
+        # Small delay between pages
+        time.sleep(CRAWL_DELAYS["search_page"])
+
+    def take(self, count):
+        """
+        Removes and returns up to `count` pending links.
+        """
+        links, self.pending = self.pending[:count], self.pending[count:]
+        return links
+
+
+def get_article_links_paginated(keyword, site_name, site_config, articles_needed, pager=None):
     """
     Gets article links from search results with pagination support.
-    Continues scraping pages until we have enough articles.
+    Continues until LINK_BUFFER_FACTOR × the needed links were found, the site's max_pages is
+    reached or, with ADAPTIVE_PAGINATION, a page's yield of new relevant links drops below MIN_PAGE_YIELD.
     """
-    print(f"\n--- [Step 1] Getting article links from {site_name} for '{keyword}' ---")
-    print(f"   Target: {articles_needed} articles")
-    
-    all_links = []
-    max_pages = site_config.get("max_pages", 5)
-    
-    for page in range(1, max_pages + 1):
-        if len(all_links) >= articles_needed * 2:
-            break
-            
-        try:
-            # Format search URL with pagination
-            if '{}' in site_config["search_url"]:
-                # Check if URL has two placeholders (keyword and page)
-                if site_config["search_url"].count('{}') == 2:
-                    search_url = site_config["search_url"].format(
-                        keyword.replace(' ', '+'), 
-                        page
-                    )
-                else:
-                    # Only keyword placeholder
-                    search_url = site_config["search_url"].format(keyword.replace(' ', '+'))
-            else:
-                search_url = site_config["search_url"]
-            
-            print(f"   📄 Page {page}/{max_pages}: {search_url[:80]}...")
-            
-            response = requests.get(search_url, headers=HEADERS, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+    logger.info("collecting article links", site=site_name, keyword=keyword, target=articles_needed)
 
-            articles = soup.find_all(site_config["article_selector"].split('[')[0])
-            
-            if not articles:
-                print(f"No articles found on page {page}")
-                break
+    pager = pager or SearchPager(keyword, site_name, site_config)
+    max_pages = site_config.get("max_pages", 5)
 
-            page_links = []
-            for article in articles:
-                link_tag = article.find(site_config["link_selector"])
-                if link_tag and link_tag.get('href'):
-                    url = link_tag['href']
-
-                    if url.startswith('/'):
-                        base_domain = f"https://www.{site_name}"
-                        url = base_domain + url
-                    elif not url.startswith('http'):
-                        url = f"https://www.{site_name}/{url}"
-                    
-                    # Avoid duplicates
-                    if url not in all_links:
-                        page_links.append(url)
-            
-            all_links.extend(page_links)
-            print(f"   ✓ Found {len(page_links)} new links (total: {len(all_links)})")
-            
-            # Small delay between pages
-            time.sleep(2)
+    while (len(pager.pending) < articles_needed * LINK_BUFFER_FACTOR and pager.pages_fetched < max_pages
+           and pager.producing):
+        pager.fetch_next()
 
-        except requests.exceptions.RequestException as e:
-            print(f"   ❌ Error on page {page}: {e}")
-            break
-    
-    # Limit to what we need
-    all_links = all_links[:articles_needed]
-    print(f"Total links collected: {len(all_links)}")
+    # Limit to what we need; the rest stays pending in the pager as spare links
+    all_links = pager.take(articles_needed)
+    logger.info("article links collected", site=site_name, keyword=keyword, links=len(all_links),
+                pages=pager.pages_fetched)
     return all_links
 
 
@@ -158,8 +273,9 @@ def scrape_article_content(url, site_name, site_config):
     Scrapes full content (title and paragraphs) from an article URL.
     """
     try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
+        response = fetch(url)
         response.raise_for_status()
+        parse_start = time.perf_counter()
         soup = BeautifulSoup(response.text, 'html.parser')
 
         # Extract title
@@ -198,122 +314,321 @@ def scrape_article_content(url, site_name, site_config):
 
         # Combine all paragraphs into full content
         full_content = "\n".join(paragraphs) if paragraphs else "No content found"
+        metrics.histogram("article_parse_seconds", "HTML parse + extraction time per article").observe(
+            time.perf_counter() - parse_start, site=site_name
+        )
 
-        return {
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "title": title,
-            "url": url,
-            "content": full_content,
-            "paragraph_count": len(paragraphs),
-            "source": site_name
-        }
+        return NewsArticle(
+            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            title=title,
+            url=url,
+            content=full_content,
+            paragraph_count=len(paragraphs),
+            source=site_name,
+        )
 
     except requests.exceptions.RequestException as e:
-        print(f"Error scraping article: {e}")
+        logger.error("article request failed", url=url, error=str(e))
         return None
     except Exception as e:
-        print(f"Parsing error: {e}")
+        metrics.counter("article_parse_errors_total", "Articles that could not be parsed").inc(site=site_name)
+        logger.error("article parsing failed", url=url, error=str(e))
         return None
 
 
-def scrape_news_site(keyword, site_name, site_config, articles_needed):
+def iter_scraped_articles(links, keyword, site_name, site_config, articles_needed):
     """
-    Main function to scrape a news site: get links, then scrape each article.
+    Scrapes the given article links, yielding each article as soon as it is scraped.
     """
-    print(f"\n{'='*70}")
-    print(f"🔍 Scraping {site_name} for keyword: '{keyword}'")
-    print(f"   Target: {articles_needed} articles")
-    print(f"{'='*70}")
-    
-    # Step 1: Get article links with pagination
-    article_links = get_article_links_paginated(keyword, site_name, site_config, articles_needed)
-    
-    if not article_links:
-        return []
-    
-    # Step 2: Scrape each article
-    scraped_articles = []
-    for i, link in enumerate(article_links, 1):
-        print(f"\n[Article {i}/{len(article_links)}] {link[:60]}...")
+    scraped_count = 0
+    for i, link in enumerate(links, 1):
         article_data = scrape_article_content(link, site_name, site_config)
         if article_data:
-            article_data["keyword"] = keyword
-            scraped_articles.append(article_data)
-            print(f"   ✅ Title: {article_data['title'][:60]}...")
-            print(f"   📝 Paragraphs: {article_data['paragraph_count']}")
-        
-        # Add Delay
-        time.sleep(1)
+            article_data.keyword = keyword
+            scraped_count += 1
+            metrics.counter("articles_scraped_total", "Articles scraped").inc(site=site_name)
+            logger.info("article scraped", index=i, of=len(links), url=link,
+                        title=article_data.title[:60], paragraphs=article_data.paragraph_count)
+            yield article_data
         
         # Stop if limit reached
-        if len(scraped_articles) >= articles_needed:
+        if scraped_count >= articles_needed:
             break
-    
-    return scraped_articles
+        
+        # Add Delay
+        time.sleep(CRAWL_DELAYS["article"])
 
 
-# --- Main ---
+def iter_pending_articles(pager, articles_needed):
+    """
+    Scrapes the pager's pending links until `articles_needed` articles were scraped or no links
+    are left; each failed scrape is replaced by the next pending link.
+    """
+    scraped = 0
+    while scraped < articles_needed and pager.pending:
+        links = pager.take(articles_needed - scraped)
+        for article in iter_scraped_articles(links, pager.keyword, pager.site_name, pager.site_config, len(links)):
+            scraped += 1
+            yield article
 
-if __name__ == "__main__":
-    print("Starting Enhanced News Web Scraper...")
-    print(f"Total keywords to process: {len(NEWS_KEYWORDS)}")
-    print(f"News sites: {', '.join(NEWS_SITES.keys())}")
-    print(f"Target: {TARGET_TOTAL_ARTICLES} total articles")
-    print(f"Strategy: {MAX_ARTICLES_PER_KEYWORD} articles per keyword per site\n")
-    
-    # Dictionary to store articles per site
-    articles_by_site = {site: [] for site in NEWS_SITES.keys()}
+
+def iter_news_site(keyword, site_name, site_config, articles_needed, pager=None):
+    """
+    Main function to scrape a news site: get links, then scrape each article.
+    Yields each article as soon as it is scraped.
+    """
+    logger.info("scraping site", site=site_name, keyword=keyword, target=articles_needed)
+    pager = pager or SearchPager(keyword, site_name, site_config)
     
-    # Calculate distribution
-    total_keywords = len(NEWS_KEYWORDS)
-    total_sites = len(NEWS_SITES)
-    articles_per_keyword_site = MAX_ARTICLES_PER_KEYWORD
+    # Step 1: Get article links with pagination
+    article_links = get_article_links_paginated(keyword, site_name, site_config, articles_needed, pager)
     
-    print(f"Calculation:")
-    print(f"   {total_keywords} keywords × {total_sites} sites × {articles_per_keyword_site} articles")
-    print(f"   = ~{total_keywords * total_sites * articles_per_keyword_site} maximum articles\n")
+    if not article_links:
+        return
     
+    # Step 2: Scrape each article
+    scraped = 0
+    for article in iter_scraped_articles(article_links, keyword, site_name, site_config, articles_needed):
+        scraped += 1
+        yield article
+
+    # Step 3: Replace failed scrapes with the spare links
+    yield from iter_pending_articles(pager, articles_needed - scraped)
+
+
+def scrape_news_site(keyword, site_name, site_config, articles_needed):
+    """
+    Scrapes a news site for one keyword and returns the articles as a list.
+    """
+    return list(iter_news_site(keyword, site_name, site_config, articles_needed))
+
+
+def iter_news_articles(keywords=NEWS_KEYWORDS, sites=NEWS_SITES,
+                       articles_per_keyword_site=MAX_ARTICLES_PER_KEYWORD,
+                       target_total=TARGET_TOTAL_ARTICLES):
+    """
+    Crawls every keyword on every site until the overall target is reached.
+    Yields articles one by one, so downstream steps can start before the crawl is finished.
+
+    With ADAPTIVE_PAGINATION, search pages that narrow keywords did not use are saved and,
+    after the first pass, spent on the keywords that are still producing. The second pass goes
+    round-robin, highest last-page yield first, with at most REALLOCATION_TURN_ARTICLES per turn
+    and MAX_EXTRA_ARTICLES_PER_KEYWORD in total per keyword and site.
+    """
+    total_keywords = len(keywords)
     total_scraped = 0
+
+    # URL yang sudah ditemukan (di keyword mana pun) tidak di-scrape ulang
+    seen_urls = set()
+    scorer = RelevanceScorer() if ADAPTIVE_PAGINATION and SEARCH_RESULT_MIN_RELEVANCE is not None else None
+    saved_pages = 0
+    producing = []  # (-yield halaman terakhir, urutan, pager) untuk putaran kedua
+    order = itertools.count()
     
-    for keyword_idx, keyword in enumerate(NEWS_KEYWORDS, 1):
-        print(f"\n\n{'#'*70}")
-        print(f"# Keyword {keyword_idx}/{total_keywords}: '{keyword}'")
-        print(f"# Progress: {total_scraped}/{TARGET_TOTAL_ARTICLES} articles collected")
-        print(f"{'#'*70}")
+    for keyword_idx, keyword in enumerate(keywords, 1):
+        logger.info("keyword started", keyword=keyword, index=keyword_idx, of=total_keywords,
+                    collected=total_scraped, target=target_total)
         
         # Check if we've reached target
-        if total_scraped >= TARGET_TOTAL_ARTICLES:
-            print(f"\n🎉 Target of {TARGET_TOTAL_ARTICLES} articles reached! Stopping.")
+        if total_scraped >= target_total:
+            logger.info("target reached", target=target_total)
             break
         
         # Scrape each news site
-        for site_name, site_config in NEWS_SITES.items():
+        for site_name, site_config in sites.items():
             # Calculate how many more articles we need
-            remaining_target = TARGET_TOTAL_ARTICLES - total_scraped
+            remaining_target = target_total - total_scraped
             articles_to_get = min(articles_per_keyword_site, remaining_target)
             
             if articles_to_get <= 0:
                 break
-                
-            articles = scrape_news_site(keyword, site_name, site_config, articles_to_get)
-            articles_by_site[site_name].extend(articles)
-            total_scraped += len(articles)
             
-            print(f"\n   📊 Site summary: {len(articles)} articles scraped")
-            print(f"   🎯 Overall progress: {total_scraped}/{TARGET_TOTAL_ARTICLES}")
+            pager = SearchPager(keyword, site_name, site_config, seen_urls, scorer)
+            site_count = 0
+            for article in iter_news_site(keyword, site_name, site_config, articles_to_get, pager):
+                site_count += 1
+                total_scraped += 1
+                yield article
+
+            metrics.counter("search_pages_total", "Search result pages fetched").inc(
+                pager.pages_fetched, site=site_name, phase="first")
+            if ADAPTIVE_PAGINATION:
+                saved_pages += max(0, site_config.get("max_pages", 5) - pager.pages_fetched)
+                if pager.producing or pager.pending:
+                    producing.append((-(pager.last_yield or 0.0), next(order), pager))
+            
+            logger.info("site finished", site=site_name, keyword=keyword, scraped=site_count,
+                        collected=total_scraped, target=target_total, pages=pager.pages_fetched)
             
-            time.sleep(3)  # Delay between sites
+            time.sleep(CRAWL_DELAYS["site"])  # Delay between sites
+
+    if not ADAPTIVE_PAGINATION:
+        return
+
+    # Putaran kedua: halaman yang dihemat keyword sempit dipakai keyword yang masih produktif
+    metrics.counter("search_pages_saved_total", "Search pages left unused by low-yield keywords").inc(saved_pages)
+    logger.info("reallocating saved search pages", saved_pages=saved_pages, producing_keywords=len(producing))
+    turns = deque(pager for _, _, pager in sorted(producing, key=lambda item: item[:2]))
+    extra_pages, extra_articles = {}, {}
+    while turns and total_scraped < target_total:
+        pager = turns.popleft()
+        articles_used = extra_articles.get(id(pager), 0)
+        if articles_used >= MAX_EXTRA_ARTICLES_PER_KEYWORD:
+            continue
+        if not pager.pending:
+            pages_used = extra_pages.get(id(pager), 0)
+            if saved_pages <= 0 or pages_used >= MAX_EXTRA_PAGES_PER_KEYWORD or not pager.producing:
+                continue
+            pager.fetch_next()
+            saved_pages -= 1
+            extra_pages[id(pager)] = pages_used + 1
+            metrics.counter("search_pages_total", "Search result pages fetched").inc(
+                site=pager.site_name, phase="reallocated")
+
+        turn_target = min(REALLOCATION_TURN_ARTICLES, MAX_EXTRA_ARTICLES_PER_KEYWORD - articles_used,
+                          target_total - total_scraped)
+        for article in iter_pending_articles(pager, turn_target):
+            total_scraped += 1
+            articles_used += 1
+            yield article
+        extra_articles[id(pager)] = articles_used
+
+        if pager.producing or pager.pending:
+            turns.append(pager)
+    logger.info("reallocation finished", unused_pages=saved_pages, collected=total_scraped, target=target_total)
+
+
+# --- Work queue ---
+
+_queue_scorer = None
+
+
+def news_search_task(keyword, site_name, articles_needed=MAX_ARTICLES_PER_KEYWORD, page=1, links_so_far=0):
+    """
+    Queue task for one search result page of a keyword on a site.
+    """
+    payload = {"keyword": keyword, "site": site_name, "articles_needed": articles_needed,
+               "page": page, "links_so_far": links_so_far}
+    return "news_search", f"news_search:{site_name}:{keyword}:{page}", payload, 0
+
+
+def handle_news_search_task(payload, queue):
+    """
+    Fetches one search page and enqueues its new, relevant article URLs (one task per URL, so an
+    article found under several keywords is fetched once) plus, while the keyword still yields
+    enough new links, the next search page.
+    """
+    global _queue_scorer
+    if _queue_scorer is None and SEARCH_RESULT_MIN_RELEVANCE is not None:
+        _queue_scorer = RelevanceScorer()
+    keyword, site_name, page = payload["keyword"], payload["site"], payload["page"]
+    site_config = NEWS_SITES[site_name]
+    results = fetch_search_results(keyword, site_name, site_config, page)
+    if results is None:
+        raise RuntimeError(f"search page {page} for '{keyword}' failed")
+
+    known = queue.known_keys(f"news_article:{url}" for url, _ in results)
+    new_links, seen, irrelevant = [], 0, 0
+    for url, title in dict(results).items():
+        if f"news_article:{url}" in known:
+            seen += 1
+        elif (_queue_scorer is not None and title
+              and _queue_scorer.score({"title": title})[0] < SEARCH_RESULT_MIN_RELEVANCE):
+            irrelevant += 1
+        else:
+            new_links.append(url)
+
+    page_yield = len(new_links) / len(results) if results else 0.0
+    results_counter = metrics.counter("search_results_total", "Search results by outcome")
+    results_counter.inc(len(new_links), site=site_name, outcome="new")
+    results_counter.inc(seen, site=site_name, outcome="seen")
+    results_counter.inc(irrelevant, site=site_name, outcome="irrelevant")
+    metrics.counter("search_pages_total", "Search result pages fetched").inc(site=site_name, phase="queue")
+
+    articles_needed = payload["articles_needed"]
+    links = new_links[:articles_needed - payload["links_so_far"]]
+    follow_ups = [("news_article", f"news_article:{url}", {"url": url, "keyword": keyword, "site": site_name}, 1)
+                  for url in links]
+    links_so_far = payload["links_so_far"] + len(links)
+    if (results and links_so_far < articles_needed and page < site_config.get("max_pages", 5)
+            and (not ADAPTIVE_PAGINATION or page_yield >= MIN_PAGE_YIELD)):
+        follow_ups.append(news_search_task(keyword, site_name, articles_needed, page + 1, links_so_far))
+    logger.info("search page queued", site=site_name, keyword=keyword, page=page, new_links=len(links),
+                seen=seen, irrelevant=irrelevant, page_yield=round(page_yield, 2))
+    return [], follow_ups
+
+
+def handle_news_article_task(payload, queue):
+    """
+    Scrapes one article URL; a failed request is retried by the queue.
+    """
+    article = scrape_article_content(payload["url"], payload["site"], NEWS_SITES[payload["site"]])
+    if article is None:
+        raise RuntimeError(f"article {payload['url']} could not be scraped")
+    article.keyword = payload["keyword"]
+    metrics.counter("articles_scraped_total", "Articles scraped").inc(site=payload["site"])
+    return [article], []
+
+
+QUEUE_HANDLERS = {"news_search": handle_news_search_task, "news_article": handle_news_article_task}
+
+
+# --- Main ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape news articles for every keyword in keywords_config.py.")
+    parser.add_argument("--fixed-pages", action="store_true",
+                        help="Always page up to max_pages per keyword (no yield-based stop or page reallocation)")
+    crawl_queue.add_queue_arguments(parser)
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    ADAPTIVE_PAGINATION = not args.fixed_pages
+
+    if args.queue:
+        RATE_LIMITER = crawl_queue.HostRateLimiter(args.queue_db)
+    if args.queue == "worker":
+        crawl_queue.run_queue_role(args, [], QUEUE_HANDLERS, "news_article")
+        print(f"\n📈 Metrics saved to {metrics.export_metrics('crawl_news_worker')}")
+        exit()
+    if args.profile:
+        profiling.start_profiling("crawl_news", os.path.dirname(NEWS_SITES["detik"]["output_file"]), args.profile)
+
+    print("Starting Enhanced News Web Scraper...")
+    print(f"Total keywords to process: {len(NEWS_KEYWORDS)}")
+    print(f"News sites: {', '.join(NEWS_SITES.keys())}")
+    print(f"Target: {TARGET_TOTAL_ARTICLES} total articles")
+    print(f"Strategy: {MAX_ARTICLES_PER_KEYWORD} articles per keyword per site"
+          f"{', adaptive pagination' if ADAPTIVE_PAGINATION else ''}\n")
+    
+    # Dictionary to store articles per site
+    articles_by_site = {site: [] for site in NEWS_SITES.keys()}
+    
+    # Perkiraan dari riwayat metrik run sebelumnya (lihat planner.py)
+    plan = planner.plan_news(NEWS_KEYWORDS, NEWS_SITES, MAX_ARTICLES_PER_KEYWORD, TARGET_TOTAL_ARTICLES,
+                             {} if args.queue else CRAWL_DELAYS, planner.Estimator(planner.MetricsHistory()))
+    print(f"Estimate:")
+    print(f"   {len(NEWS_KEYWORDS)} keywords × {len(NEWS_SITES)} sites → ~{plan['items']} articles, "
+          f"{plan['requests']} requests, ~{planner.format_duration(plan['seconds'])}\n")
+    
+    if args.queue:
+        seeds = [news_search_task(keyword, site_name) for keyword in NEWS_KEYWORDS for site_name in NEWS_SITES]
+        articles = [NewsArticle(**record)
+                    for record in crawl_queue.run_queue_role(args, seeds, QUEUE_HANDLERS, "news_article")]
+    else:
+        articles = iter_news_articles()
+    for article in articles:
+        articles_by_site[article.source].append(article)
     
     print("\n\n" + "="*70)
     print(f"✅ Web Scraping Complete!")
     print("="*70)
     
-    # Save each site's articles to its respective CSV file
+    # Save each site's articles to its respective dataset file
     for site_name, site_config in NEWS_SITES.items():
         articles = articles_by_site[site_name]
-        csv_file = site_config['csv_file']
-        save_to_csv(articles, csv_file)
-        print(f"   {site_name}: {len(articles)} articles → {csv_file}")
+        output_file = site_config['output_file']
+        save_articles(articles, output_file)
+        print(f"   {site_name}: {len(articles)} articles → {output_file}")
     
     # Calculate total
     total_articles = sum(len(articles) for articles in articles_by_site.values())
@@ -326,7 +641,7 @@ if __name__ == "__main__":
     keyword_stats = {}
     for articles in articles_by_site.values():
         for article in articles:
-            kw = article['keyword']
+            kw = article.keyword
             if kw not in keyword_stats:
                 keyword_stats[kw] = 0
             keyword_stats[kw] += 1
@@ -343,8 +658,12 @@ if __name__ == "__main__":
     
     if first_article:
         print("\n📄 Sample Article (first one):")
-        print(f"   Source: {first_article['source']}")
-        print(f"   Keyword: {first_article['keyword']}")
-        print(f"   Title: {first_article['title'][:100]}...")
-        print(f"   Content length: {len(first_article['content'])} characters")
-        print(f"   Paragraphs: {first_article['paragraph_count']}")
\ No newline at end of file
+        print(f"   Source: {first_article.source}")
+        print(f"   Keyword: {first_article.keyword}")
+        print(f"   Title: {first_article.title[:100]}...")
+        print(f"   Content length: {len(first_article.content)} characters")
+        print(f"   Paragraphs: {first_article.paragraph_count}")
+    
+    # Save run metrics (HTTP latency/bytes per host, parse time per article)
+    metrics_file = metrics.export_metrics("crawl_news")
+    print(f"\n📈 Metrics saved to {metrics_file}")
\ No newline at end of file
@@ -1,64 +1,160 @@
 import sys
 
-import csv
+import argparse
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+from storage import dataset_path, write_dataset
+from records import YouTubeComment, COMMENT_COLUMNS, records_to_frame
+import metrics
+import crawl_queue
+import planner
+from relevance import RelevanceScorer, RELEVANCE_MIN_SCORE
+
+# --- REVISI: Mengambil limit dari SCRAPING_LIMITS di keywords_config.py ---
+from keywords_config import YOUTUBE_KEYWORDS, SCRAPING_LIMITS, LIMIT_YOUTUBE_KEYWORDS
 
 load_dotenv()
 
 # Get API key from .env
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 
-if not YOUTUBE_API_KEY:
-    print("ERROR: YOUTUBE_API_KEY not found in .env file")
-    exit(1)
-
-OUTPUT_FILE = "social_media/youtube.csv"
+OUTPUT_FILE = dataset_path("social_media/youtube")
 
 # Create directory if not exists
 os.makedirs("social_media", exist_ok=True)
 
-# Build YouTube client through API
-yt_client = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+# --- REVISI: Menambahkan keywords baru untuk mencapai target 1500 komentar ---
+ADDITIONAL_YOUTUBE_KEYWORDS = [
+    "seruan indonesia damai",
+    "ajakan jaga kerukunan",
+    "himbauan pasca pemilu",
+    "diskusi kebangsaan",
+    "peran pemuda untuk perdamaian",
+    "menjaga keutuhan NKRI",
+    "stop politik identitas",
+    "narasi persatuan bangsa",
+    "indonesia rukun dan damai",
+    "pentingnya toleransi antar umat",
+    "kolaborasi membangun negeri",
+    "kontra narasi hoaks",
+    "menuju indonesia emas damai"
+]
+# Menggabungkan keywords dari config dengan keywords tambahan
+ALL_YOUTUBE_KEYWORDS = (YOUTUBE_KEYWORDS + ADDITIONAL_YOUTUBE_KEYWORDS)[:LIMIT_YOUTUBE_KEYWORDS]  # None: semua
+
+YOUTUBE_VIDEOS_PER_KEYWORD = SCRAPING_LIMITS["youtube_videos_per_keyword"]
+YOUTUBE_COMMENTS_PER_VIDEO = SCRAPING_LIMITS["youtube_comments_per_video"]
+
+OUTPUT_FIELDNAMES = COMMENT_COLUMNS
+
+# Mode balasan (--replies): commentThreads.list diminta dengan part=snippet,replies sehingga hingga 5 balasan
+# per thread ikut gratis; hanya thread yang terpotong (totalReplyCount > balasan yang disertakan) diambil
+# lengkap lewat comments.list(parentId), paralel dan dibatasi anggaran kuota per run.
+EXPAND_REPLIES = False
+REPLY_FETCH_WORKERS = 4
+REPLY_QUOTA_BUDGET = SCRAPING_LIMITS["youtube_reply_quota_budget"]
+
+# Video dengan judul + deskripsi di bawah skor relevansi ini dilewati sebelum komentarnya diambil
+# (hemat kuota API dan biaya LLM). None = ambil semua video; aktifkan dengan --min-video-relevance.
+MIN_VIDEO_RELEVANCE = None
+
+# Biaya kuota YouTube Data API v3 per pemanggilan (unit)
+YOUTUBE_QUOTA_COSTS = {"search.list": 100, "commentThreads.list": 1, "comments.list": 1}
+
+# Mode antrian kerja (--queue): rate limit global per host untuk semua worker
+RATE_LIMITER = None  # crawl_queue.HostRateLimiter, diisi saat --queue dipakai
+
+logger = metrics.get_logger("crawler_youtube")
+
+
+def build_client(api_key=YOUTUBE_API_KEY, api_endpoint=None):
+    """Build YouTube client through API (api_endpoint overrides the Google host, e.g. for benchmarks)"""
+    client_options = {"api_endpoint": api_endpoint} if api_endpoint else None
+    return build("youtube", "v3", developerKey=api_key, client_options=client_options)
+
+
+def execute_request(method, request, http=None):
+    """
+    Executes an API request, recording its latency, outcome and quota cost.
+    `http` executes it on another connection (the client's own connection is not thread-safe).
+    """
+    metrics.counter("youtube_quota_units_total", "YouTube Data API quota units spent").inc(
+        YOUTUBE_QUOTA_COSTS.get(method, 1), method=method)
+    if RATE_LIMITER is not None:
+        RATE_LIMITER.wait(request.uri)
+    try:
+        with metrics.timer("youtube_api_seconds", "YouTube Data API request latency", method=method):
+            response = request.execute(http=http) if http is not None else request.execute()
+    except HttpError as e:
+        metrics.counter("youtube_api_requests_total", "YouTube Data API requests").inc(
+            method=method, status=e.resp.status)
+        raise
+    metrics.counter("youtube_api_requests_total", "YouTube Data API requests").inc(method=method, status=200)
+    return response
 
 
 def search_videos(client, query, max_results=3):
-    """Search for videos by keyword"""
+    """Search for videos by keyword, returns [{"video_id", "title", "description"}]"""
     try:
-        response = client.search().list(
+        response = execute_request("search.list", client.search().list(
             part="snippet",
             q=query,
             type="video",
             maxResults=max_results
-        ).execute()
+        ))
         
-        video_ids = []
+        videos = []
         for item in response.get("items", []):
-            video_ids.append(item["id"]["videoId"])
+            snippet = item.get("snippet", {})
+            videos.append({
+                "video_id": item["id"]["videoId"],
+                "title": snippet.get("title", ""),
+                "description": snippet.get("description", ""),
+            })
         
-        return video_ids
+        return videos
     except HttpError as e:
-        print(f"Error searching videos: {e.resp.status}")
+        logger.error("error searching videos", query=query, status=e.resp.status)
         return []
 
 
-def get_comments(client, video_id, max_results=1500):
-    """Get comments from a video"""
+class QuotaBudget:
+    """
+    Thread-safe budget of API quota units shared by the reply fetchers of one run.
+    """
+
+    def __init__(self, units):
+        self.remaining = units
+        self.lock = threading.Lock()
+
+    def try_spend(self, units):
+        with self.lock:
+            if self.remaining < units:
+                return False
+            self.remaining -= units
+            return True
+
+
+def get_comments(client, video_id, max_results=1500, include_replies=False):
+    """Get comment threads from a video (with up to 5 embedded replies each if include_replies)"""
     comments = []
     next_token = None
     
     try:
         while len(comments) < max_results:
-            response = client.commentThreads().list(
-                part="snippet",
+            response = execute_request("commentThreads.list", client.commentThreads().list(
+                part="snippet,replies" if include_replies else "snippet",
                 videoId=video_id,
                 textFormat="plainText",
                 maxResults=min(100, max_results - len(comments)),
                 pageToken=next_token,
-            ).execute()
+            ))
             
             comments += response.get("items", [])
             next_token = response.get("nextPageToken")
@@ -69,82 +165,263 @@ def get_comments(client, video_id, max_results=1500):
         return comments[:max_results]
     
     except HttpError as e:
-        print(f"Error fetching comments: {e.resp.status}")
+        logger.error("error fetching comments", video_id=video_id, status=e.resp.status)
         return []
 
 
-# Collect all comments
-all_comments = []
+def get_replies(client, parent_id, budget, http=None):
+    """
+    Pages through all replies of one comment thread with comments.list, as long as the
+    quota budget allows. Returns (replies, complete?).
+    """
+    replies = []
+    next_token = None
+    while budget.try_spend(YOUTUBE_QUOTA_COSTS["comments.list"]):
+        try:
+            response = execute_request("comments.list", client.comments().list(
+                part="snippet",
+                parentId=parent_id,
+                textFormat="plainText",
+                maxResults=100,
+                pageToken=next_token,
+            ), http=http)
+        except HttpError as e:
+            logger.error("error fetching replies", parent_id=parent_id, status=e.resp.status)
+            return replies, False
+        replies += response.get("items", [])
+        next_token = response.get("nextPageToken")
+        if not next_token:
+            return replies, True
+    metrics.counter("youtube_reply_budget_exhausted_total", "Reply threads cut off by the quota budget").inc()
+    return replies, False
 
-# --- REVISI: Mengambil limit dari SCRAPING_LIMITS di keywords_config.py ---
-from keywords_config import YOUTUBE_KEYWORDS, SCRAPING_LIMITS
 
-# --- REVISI: Menambahkan keywords baru untuk mencapai target 1500 komentar ---
-ADDITIONAL_YOUTUBE_KEYWORDS = [
-    "seruan indonesia damai",
-    "ajakan jaga kerukunan",
-    "himbauan pasca pemilu",
-    "diskusi kebangsaan",
-    "peran pemuda untuk perdamaian",
-    "menjaga keutuhan NKRI",
-    "stop politik identitas",
-    "narasi persatuan bangsa",
-    "indonesia rukun dan damai",
-    "pentingnya toleransi antar umat",
-    "kolaborasi membangun negeri",
-    "kontra narasi hoaks",
-    "menuju indonesia emas damai"
-]
-# Menggabungkan keywords dari config dengan keywords tambahan
-YOUTUBE_KEYWORDS.extend(ADDITIONAL_YOUTUBE_KEYWORDS)
+def expand_replies(client, threads, budget, workers=REPLY_FETCH_WORKERS):
+    """
+    Returns {thread id: [reply resources]} for the given threads: the embedded replies, or the
+    full reply list fetched concurrently for threads whose embedded replies are truncated.
+    """
+    replies = {}
+    truncated = []
+    for thread in threads:
+        embedded = thread.get("replies", {}).get("comments", [])
+        replies[thread["id"]] = embedded
+        metrics.counter("youtube_replies_total", "Replies collected").inc(len(embedded), origin="embedded")
+        if thread["snippet"].get("totalReplyCount", 0) > len(embedded):
+            truncated.append(thread["id"])
+    if not truncated:
+        return replies
 
+    # Satu koneksi HTTP per thread pekerja; request tetap dibangun dari client yang sama
+    local = threading.local()
 
-YOUTUBE_VIDEOS_PER_KEYWORD = SCRAPING_LIMITS["youtube_videos_per_keyword"]
-YOUTUBE_COMMENTS_PER_VIDEO = SCRAPING_LIMITS["youtube_comments_per_video"]
+    def fetch(parent_id):
+        if not hasattr(local, "http"):
+            local.http = build_http()
+        return parent_id, get_replies(client, parent_id, budget, http=local.http)
 
-for keyword in YOUTUBE_KEYWORDS:
-    print(f"\nSearching videos for keyword: '{keyword}'")
-    
-    # Search videos
-    video_ids = search_videos(yt_client, keyword, max_results=YOUTUBE_VIDEOS_PER_KEYWORD) # Menggunakan limit dari config
-    
-    if not video_ids:
-        print(f"   No videos found for '{keyword}'")
-        continue
-    
-    print(f"   Found {len(video_ids)} videos")
-    
-    # Get comments from each video
-    for vid_id in video_ids:
-        print(f"   Fetching comments from video: {vid_id}")
-        comments = get_comments(yt_client, vid_id, max_results=YOUTUBE_COMMENTS_PER_VIDEO) # Menggunakan limit dari config
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="yt-replies") as executor:
+        for parent_id, (fetched, complete) in executor.map(fetch, truncated):
+            # Balasan yang sudah disertakan dipertahankan jika pengambilan lengkap gagal di tengah jalan
+            if complete or len(fetched) > len(replies[parent_id]):
+                metrics.counter("youtube_replies_total", "Replies collected").inc(
+                    max(0, len(fetched) - len(replies[parent_id])), origin="fetched")
+                replies[parent_id] = fetched
+    metrics.counter("youtube_reply_threads_expanded_total", "Truncated reply threads fetched").inc(len(truncated))
+    return replies
+
+
+def comment_record(resource, keyword, video, parent_id=None):
+    """
+    One output row for a top-level comment or reply resource.
+    """
+    snippet = resource["snippet"]
+    return YouTubeComment(
+        timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        keyword=keyword,
+        source="YouTube",
+        video_url=f"https://www.youtube.com/watch?v={video['video_id']}",
+        video_title=video["title"],
+        comment_id=resource.get("id"),
+        parent_id=parent_id,
+        commenter_name=snippet["authorDisplayName"],
+        comment_text=snippet["textDisplay"],
+        comment_date=snippet["publishedAt"],
+    )
+
+
+def iter_youtube_comments(client, keywords=ALL_YOUTUBE_KEYWORDS,
+                          videos_per_keyword=YOUTUBE_VIDEOS_PER_KEYWORD,
+                          comments_per_video=YOUTUBE_COMMENTS_PER_VIDEO,
+                          min_video_relevance=MIN_VIDEO_RELEVANCE,
+                          include_replies=EXPAND_REPLIES,
+                          reply_quota_budget=REPLY_QUOTA_BUDGET):
+    """
+    Yields comment records video by video, so callers can process them while the crawl continues.
+    Off-topic videos (title + description below min_video_relevance) are skipped. With
+    include_replies, every top-level comment is followed by its replies (parent_id = thread id).
+    """
+    scorer = RelevanceScorer() if min_video_relevance is not None else None
+    budget = QuotaBudget(reply_quota_budget) if include_replies else None
+    for keyword in keywords:
+        logger.info("searching videos", keyword=keyword)
         
-        for comment in comments:
-            snippet = comment["snippet"]["topLevelComment"]["snippet"]
-            
-            all_comments.append({
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "keyword": keyword,
-                "source": "YouTube",
-                "video_url": f"https://www.youtube.com/watch?v={vid_id}",
-                "commenter_name": snippet["authorDisplayName"],
-                "comment_text": snippet["textDisplay"],
-                "comment_date": snippet["publishedAt"]
-            })
+        # Search videos
+        videos = search_videos(client, keyword, max_results=videos_per_keyword) # Menggunakan limit dari config
+        
+        if not videos:
+            logger.info("no videos found", keyword=keyword)
+            continue
+        
+        logger.info("found videos", keyword=keyword, videos=len(videos))
         
-        print(f"     Collected {len(comments)} comments")
+        # Get comments from each video
+        for video in videos:
+            vid_id = video["video_id"]
+            if scorer is not None:
+                score, matched = scorer.score({"title": video["title"], "description": video["description"]})
+                if score < min_video_relevance:
+                    metrics.counter("youtube_videos_skipped_total", "Off-topic videos skipped").inc()
+                    logger.info("skipping off-topic video", video_id=vid_id, title=video["title"][:60],
+                                score=score)
+                    continue
+            comments = get_comments(client, vid_id, max_results=comments_per_video, # Menggunakan limit dari config
+                                    include_replies=include_replies)
+            replies = expand_replies(client, comments, budget) if include_replies else {}
+            
+            for comment in comments:
+                yield comment_record(comment["snippet"]["topLevelComment"], keyword, video)
+                for reply in replies.get(comment["id"], []):
+                    yield comment_record(reply, keyword, video, parent_id=comment["id"])
+            
+            reply_count = sum(len(items) for items in replies.values())
+            metrics.counter("youtube_comments_total", "Comments collected").inc(len(comments))
+            logger.info("collected comments", video_id=vid_id, comments=len(comments), replies=reply_count)
 
-# Save to CSV
-print(f"\nTotal comments collected: {len(all_comments)}")
 
-if all_comments:
-    with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as file:
-        fieldnames = ["timestamp", "keyword", "source", "video_url", "commenter_name", "comment_text", "comment_date"]
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(all_comments)
-    
-    print(f"Saved to {OUTPUT_FILE}")
-else:
-    print("No comments collected")
+# --- Work queue ---
+
+def youtube_search_task(keyword, videos_per_keyword=YOUTUBE_VIDEOS_PER_KEYWORD,
+                        comments_per_video=YOUTUBE_COMMENTS_PER_VIDEO, min_video_relevance=MIN_VIDEO_RELEVANCE,
+                        include_replies=EXPAND_REPLIES, reply_quota_per_video=0):
+    """
+    Queue task for the video search of one keyword. The crawl settings travel in the payload,
+    so workers do not need the coordinator's command-line options.
+    """
+    payload = {"keyword": keyword, "videos": videos_per_keyword, "comments": comments_per_video,
+               "min_relevance": min_video_relevance, "replies": include_replies,
+               "reply_quota": reply_quota_per_video}
+    return "youtube_search", f"youtube_search:{keyword}", payload, 0
+
+
+def make_queue_handlers(client_factory=build_client):
+    """
+    Task handlers for crawl_queue workers; every worker thread builds its own API client.
+    """
+    local = threading.local()
+    scorer = RelevanceScorer()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = client_factory()
+        return local.client
+
+    def handle_search(payload, queue):
+        videos = search_videos(client(), payload["keyword"], max_results=payload["videos"])
+        follow_ups = []
+        for video in videos:
+            min_relevance = payload["min_relevance"]
+            if (min_relevance is not None
+                    and scorer.score({"title": video["title"], "description": video["description"]})[0] < min_relevance):
+                metrics.counter("youtube_videos_skipped_total", "Off-topic videos skipped").inc()
+                continue
+            # Kunci per video: video yang muncul di beberapa keyword hanya diambil sekali
+            follow_ups.append(("youtube_video", f"youtube_video:{video['video_id']}", {**payload, "video": video}, 1))
+        logger.info("found videos", keyword=payload["keyword"], videos=len(videos), queued=len(follow_ups))
+        return [], follow_ups
+
+    def handle_video(payload, queue):
+        video, keyword = payload["video"], payload["keyword"]
+        comments = get_comments(client(), video["video_id"], max_results=payload["comments"],
+                                include_replies=payload["replies"])
+        replies = (expand_replies(client(), comments, QuotaBudget(payload["reply_quota"]), workers=1)
+                   if payload["replies"] else {})
+        records = []
+        for comment in comments:
+            records.append(comment_record(comment["snippet"]["topLevelComment"], keyword, video))
+            records += [comment_record(reply, keyword, video, parent_id=comment["id"])
+                        for reply in replies.get(comment["id"], [])]
+        metrics.counter("youtube_comments_total", "Comments collected").inc(len(comments))
+        logger.info("collected comments", video_id=video["video_id"], comments=len(comments),
+                    replies=len(records) - len(comments))
+        return records, []
+
+    return {"youtube_search": handle_search, "youtube_video": handle_video}
+
+
+# --- Main ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl YouTube comments for the configured keywords.")
+    parser.add_argument("--replies", action="store_true", default=EXPAND_REPLIES,
+                        help="Also collect reply threads (embedded replies, plus truncated threads "
+                             "fetched concurrently within the reply quota budget)")
+    parser.add_argument("--reply-quota", type=int, default=REPLY_QUOTA_BUDGET,
+                        help="Max API units for fetching truncated reply threads (default: %(default)s)")
+    parser.add_argument("--min-video-relevance", type=float, default=MIN_VIDEO_RELEVANCE,
+                        help=f"Skip videos whose title + description score below this, e.g. {RELEVANCE_MIN_SCORE} "
+                             "(default: keep all videos)")
+    crawl_queue.add_queue_arguments(parser)
+    args = parser.parse_args()
+
+    if not YOUTUBE_API_KEY:
+        print("ERROR: YOUTUBE_API_KEY not found in .env file")
+        exit(1)
+
+    # Perkiraan kuota sebelum kuota dipakai (lihat planner.py)
+    plan = planner.plan_youtube(ALL_YOUTUBE_KEYWORDS, YOUTUBE_VIDEOS_PER_KEYWORD, YOUTUBE_COMMENTS_PER_VIDEO,
+                                args.replies, args.reply_quota, YOUTUBE_QUOTA_COSTS,
+                                planner.Estimator(planner.MetricsHistory()),
+                                skip_videos=args.min_video_relevance is not None)
+    print(f"Estimate: {len(ALL_YOUTUBE_KEYWORDS)} keywords → ~{plan['items']} comments, {plan['requests']} requests, "
+          f"~{plan['quota']} quota units, ~{planner.format_duration(plan['seconds'])}")
+    if plan["quota"] > planner.YOUTUBE_DAILY_QUOTA:
+        print(f"WARNING: more than the default daily quota of {planner.YOUTUBE_DAILY_QUOTA} units")
+
+    if args.queue:
+        RATE_LIMITER = crawl_queue.HostRateLimiter(args.queue_db)
+        handlers = make_queue_handlers()
+        if args.queue == "worker":
+            crawl_queue.run_queue_role(args, [], handlers, "youtube_video")
+            print(f"Metrics saved to {metrics.export_metrics('crawl_youtube_worker')}")
+            exit()
+        # Anggaran balasan dibagi rata per video, karena video tersebar di banyak worker
+        reply_quota_per_video = args.reply_quota // max(1, len(ALL_YOUTUBE_KEYWORDS) * YOUTUBE_VIDEOS_PER_KEYWORD)
+        seeds = [youtube_search_task(keyword, min_video_relevance=args.min_video_relevance,
+                                     include_replies=args.replies, reply_quota_per_video=reply_quota_per_video)
+                 for keyword in ALL_YOUTUBE_KEYWORDS]
+        all_comments = [YouTubeComment(**record)
+                        for record in crawl_queue.run_queue_role(args, seeds, handlers, "youtube_video")]
+    else:
+        yt_client = build_client()
+
+        # Collect all comments
+        all_comments = list(iter_youtube_comments(yt_client, min_video_relevance=args.min_video_relevance,
+                                                  include_replies=args.replies,
+                                                  reply_quota_budget=args.reply_quota))
+
+    # Save to dataset file
+    print(f"\nTotal comments collected: {len(all_comments)}")
+    if args.min_video_relevance is not None:
+        skipped = metrics.counter("youtube_videos_skipped_total", "Off-topic videos skipped").value()
+        print(f"Videos skipped (relevance below {args.min_video_relevance}): {skipped}")
+
+    if all_comments:
+        write_dataset(records_to_frame(all_comments, OUTPUT_FIELDNAMES), OUTPUT_FILE)
+        
+        print(f"Saved to {OUTPUT_FILE}")
+    else:
+        print("No comments collected")
 
+    metrics_file = metrics.export_metrics("crawl_youtube")
+    print(f"Metrics saved to {metrics_file}")
@@ -1,66 +1,229 @@
 import sys
 
+import argparse
 import pandas as pd
-import glob
+import hashlib
 import os
+from storage import dataset_path, find_datasets, iter_dataset, DatasetWriter
+import metrics
+import profiling
 
 # --- 📜 CONFIGURATION ---
 
-# Folder tempat file-file CSV yang sudah dibersihkan oleh gemini.py berada
+# Folder tempat dataset yang sudah dibersihkan oleh gemini.py/localLLM.py berada
 # Script ini akan mencari file di dalam folder 'news_portal' dan 'social_media'
 INPUT_FOLDERS = ["news_portal", "social_media"]
 
 # File output master yang akan berisi gabungan semua data
 OUTPUT_FOLDER = "combined_data"
-COMBINED_CSV_FILE = os.path.join(OUTPUT_FOLDER, "combined_all_sources_cleaned.csv")
+COMBINED_DATASET = dataset_path(os.path.join(OUTPUT_FOLDER, "combined_all_sources_cleaned"))
+
+# Jumlah baris yang dibaca per potongan; memori tetap datar berapapun ukuran input
+CHUNK_SIZE = 2000
+
+# Skema gabungan yang eksplisit. Setiap sumber dipetakan ke kolom-kolom ini,
+# sehingga output tidak lagi berupa tabel lebar yang sebagian besar NaN.
+UNIFIED_COLUMNS = [
+    "content_hash",    # Hash teks (+ author; source + url jika teks kosong), dipakai untuk dedup lintas sumber
+    "timestamp",       # Waktu crawling
+    "published_at",    # Waktu publikasi asli (jika tersedia)
+    "keyword",
+    "source",
+    "url",
+    "author",
+    "parent_id",       # Komentar induk untuk balasan YouTube (kosong untuk komentar utama dan artikel)
+    "title",
+    "gemini_summary",
+    "text",            # Teks mentah: isi artikel atau komentar
+]
+
+# Pemetaan kolom per sumber: {kolom_gabungan: kolom_asli}.
+# Dicocokkan berdasarkan awalan nama file '*_cleaned'.
+SOURCE_SCHEMAS = {
+    "news_": {
+        "timestamp": "timestamp",
+        "keyword": "keyword",
+        "source": "source",
+        "url": "url",
+        "title": "title",
+        "gemini_summary": "gemini_summary",
+        "text": "content",
+    },
+    "youtube": {
+        "timestamp": "timestamp",
+        "published_at": "comment_date",
+        "keyword": "keyword",
+        "source": "source",
+        "url": "video_url",
+        "author": "commenter_name",
+        "parent_id": "parent_id",
+        "gemini_summary": "gemini_summary",
+        "text": "comment_text",
+    },
+}
+
+
+def find_schema(file_path):
+    """
+    Returns the column mapping for a cleaned file based on its file name, or None.
+    """
+    file_name = os.path.basename(file_path)
+    for prefix, schema in SOURCE_SCHEMAS.items():
+        if file_name.startswith(prefix):
+            return schema
+    return None
+
+
+def content_hash(text, author="", source="", url=""):
+    """
+    Short hash of the normalised text. The author is included so that identical
+    short comments ("Aamiin") from different people are kept, while the same article
+    scraped under several keywords is only stored once. Rows without text are told apart
+    by source and URL instead, so they are not all dropped as duplicates of each other.
+    """
+    normalised = " ".join(str(text).split()).lower()
+    key = f"{normalised}\x00{author}" if normalised else f"\x00{author}\x00{source}\x00{url}"
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def unify_chunk(chunk, schema):
+    """
+    Maps a raw chunk onto UNIFIED_COLUMNS. Columns a source does not have stay empty.
+    """
+    unified = pd.DataFrame(index=chunk.index, columns=UNIFIED_COLUMNS, dtype=object)
+    for unified_col, source_col in schema.items():
+        if source_col in chunk.columns:
+            unified[unified_col] = chunk[source_col]
+
+    texts = unified["text"].fillna("").astype(str)
+    authors = unified["author"].fillna("").astype(str)
+    sources = unified["source"].fillna("").astype(str)
+    urls = unified["url"].fillna("").astype(str)
+    unified["content_hash"] = [content_hash(text, author, source, url)
+                               for text, author, source, url in zip(texts, authors, sources, urls)]
+    return unified
+
+
+def unify_results(batch):
+    """
+    Brings a batch of a results dataset onto UNIFIED_COLUMNS, keeping any other columns
+    (e.g. the sentiment). Legacy wide files, with one column set per source and no
+    content_hash, are mapped through SOURCE_SCHEMAS and hashed here.
+    """
+    if all(column in batch.columns for column in UNIFIED_COLUMNS):
+        return batch
+
+    batch = batch.copy()
+    for schema in SOURCE_SCHEMAS.values():
+        for unified_col, source_col in schema.items():
+            if source_col == unified_col or source_col not in batch.columns:
+                continue
+            if unified_col in batch.columns:
+                batch[unified_col] = batch[unified_col].fillna(batch[source_col])
+            else:
+                batch[unified_col] = batch[source_col]
+    for column in UNIFIED_COLUMNS:
+        if column not in batch.columns:
+            batch[column] = None
+
+    missing = batch["content_hash"].isna()
+    if missing.any():
+        rows = batch.loc[missing, ["text", "author", "source", "url"]].fillna("").astype(str)
+        batch.loc[missing, "content_hash"] = [content_hash(*values) for values in rows.itertuples(index=False)]
+    return batch
+
+
+def combine_sources(input_files, output_file, chunk_size=CHUNK_SIZE):
+    """
+    Streams every input dataset in chunks, maps it onto the unified schema, drops rows whose
+    content hash was already written, and appends the rest to the output dataset.
+    Returns (rows_written, duplicates_dropped).
+    """
+    seen_hashes = set()
+    rows_written = 0
+    duplicates_dropped = 0
+
+    # DatasetWriter menulis ke file sementara dulu agar file master lama tidak rusak jika proses gagal
+    with DatasetWriter(output_file, columns=UNIFIED_COLUMNS) as writer:
+        for file_path in input_files:
+            schema = find_schema(file_path)
+            if schema is None:
+                print(f"⚠️  No schema mapping for '{file_path}', skipping.")
+                continue
+
+            # Baris dihitung per chunk: chunk yang sudah ditulis tetap ada di output walau file gagal di tengah
+            file_rows = 0
+            try:
+                # Hanya kolom yang dipetakan yang dibaca (column projection pada Parquet)
+                for chunk in iter_dataset(file_path, columns=list(schema.values()), batch_size=chunk_size):
+                    metrics.counter("combine_rows_read_total", "Rows read per input file").inc(
+                        len(chunk), file=os.path.basename(file_path))
+                    unified = unify_chunk(chunk, schema)
+
+                    is_new = ~unified["content_hash"].isin(seen_hashes) & ~unified["content_hash"].duplicated()
+                    duplicates_dropped += int((~is_new).sum())
+                    unified = unified[is_new]
+
+                    writer.append(unified)
+                    seen_hashes.update(unified["content_hash"])
+                    file_rows += len(unified)
+            except Exception as e:
+                print(f"❌ Error reading {file_path} after {file_rows} rows: {e}")
+
+            rows_written += file_rows
+            metrics.counter("combine_rows_written_total", "Rows written per input file").inc(
+                file_rows, file=os.path.basename(file_path))
+            print(f"   ✓ {file_path}: {file_rows} rows written")
+
+    metrics.counter("combine_duplicates_dropped_total", "Rows dropped as duplicates").inc(duplicates_dropped)
+    return rows_written, duplicates_dropped
+
 
 # --- 🚦 MAIN SCRIPT ---
 
 if __name__ == "__main__":
-    print("🚀 Starting CSV combination process...")
+    parser = argparse.ArgumentParser(description="Combine all *_cleaned datasets into one master dataset.")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.profile:
+        profiling.start_profiling("combine", OUTPUT_FOLDER, args.profile)
+
+    print("🚀 Starting dataset combination process...")
 
     # Buat folder output jika belum ada
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-    
+
     all_files_to_combine = []
-    # Cari semua file yang berakhiran '_cleaned.csv' di setiap folder input
+    # Cari semua dataset yang berakhiran '_cleaned' (.parquet atau .csv) di setiap folder input
     for folder in INPUT_FOLDERS:
         if os.path.exists(folder):
-            search_pattern = os.path.join(folder, "*_cleaned.csv")
-            found_files = glob.glob(search_pattern)
+            found_files = find_datasets(folder, "_cleaned")
             all_files_to_combine.extend(found_files)
             print(f"📁 Found {len(found_files)} cleaned files in '{folder}'.")
         else:
             print(f"⚠️  Warning: Folder '{folder}' not found, skipping.")
 
     if not all_files_to_combine:
-        print("❌ ERROR: No '*_cleaned.csv' files found to combine.")
+        print("❌ ERROR: No '*_cleaned' datasets found to combine.")
         print("Please run gemini.py on your raw data files first.")
-        exit()
-
-    # Buat list untuk menampung semua dataframe
-    list_of_dataframes = []
-
-    # Baca setiap file dan tambahkan ke dalam list
-    for f in all_files_to_combine:
-        try:
-            df = pd.read_csv(f)
-            list_of_dataframes.append(df)
-        except Exception as e:
-            print(f"❌ Error reading {f}: {e}")
-
-    # Gabungkan semua dataframe menjadi satu
-    if list_of_dataframes:
-        print("\n🖇️  Combining all dataframes into a single master file...")
-        combined_df = pd.concat(list_of_dataframes, ignore_index=True)
-
-        # Simpan file master
-        try:
-            combined_df.to_csv(COMBINED_CSV_FILE, index=False, encoding='utf-8')
-            print(f"\n✅ Success! All data has been combined.")
-            print(f"📊 Total rows combined: {len(combined_df)}")
-            print(f"💾 Master file saved to: '{COMBINED_CSV_FILE}'")
-        except Exception as e:
-            print(f"❌ Error saving combined file: {e}")
+        exit(1)
+
+    # Gabungkan semua file secara streaming ke satu file master
+    print("\n🖇️  Streaming all files into a single master file...")
+    try:
+        total_rows, duplicates = combine_sources(all_files_to_combine, COMBINED_DATASET)
+    except Exception as e:
+        print(f"❌ Error saving combined file: {e}")
+        exit(1)
+
+    if total_rows:
+        print(f"\n✅ Success! All data has been combined.")
+        print(f"📊 Total rows combined: {total_rows} ({duplicates} duplicates dropped)")
+        print(f"💾 Master file saved to: '{COMBINED_DATASET}'")
     else:
-        print("No dataframes were loaded. Cannot combine.")
+        print("No rows were loaded. Cannot combine.")
+
+    metrics_file = metrics.export_metrics("combine")
+    print(f"📈 Metrics saved to {metrics_file}")
+    if not total_rows:
+        exit(1)
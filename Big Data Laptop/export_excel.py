@@ -0,0 +1,183 @@
+import argparse
+import os
+import time
+from collections import Counter, defaultdict
+
+import pandas as pd
+import xlsxwriter
+from storage import find_dataset, iter_dataset
+
+# --- 📜 CONFIGURATION ---
+
+# Dataset hasil sentimen (output dari indobert_process.py), tanpa ekstensi
+INPUT_DATASET = "combined_data/final_sentiment_results"
+OUTPUT_XLSX_FILE = "combined_data/final_sentiment_results.xlsx"
+
+# Batas Excel
+EXCEL_MAX_CELL_CHARS = 32767
+EXCEL_MAX_ROWS = 1048576
+EXCEL_SHEET_NAME_CHARS = 31
+
+SENTIMENT_LABELS = ["positive", "neutral", "negative", "error"]
+BATCH_SIZE = 5000
+
+
+def safe_sheet_name(name, used_names):
+    """
+    Returns a valid, unique Excel sheet name (max 31 chars, no []:*?/\\ characters).
+    """
+    cleaned = "".join("_" if ch in '[]:*?/\\' else ch for ch in str(name)).strip() or "Sheet"
+    cleaned = cleaned[:EXCEL_SHEET_NAME_CHARS]
+    candidate = cleaned
+    suffix = 2
+    while candidate.lower() in used_names:
+        tail = f" ({suffix})"
+        candidate = cleaned[:EXCEL_SHEET_NAME_CHARS - len(tail)] + tail
+        suffix += 1
+    used_names.add(candidate.lower())
+    return candidate
+
+
+def prepare_batch(batch):
+    """
+    Converts a batch into plain Python rows: datetimes as text, missing values as None,
+    and long text truncated to Excel's cell limit.
+    """
+    batch = batch.copy()
+    for col in batch.columns:
+        series = batch[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            batch[col] = series.dt.strftime("%Y-%m-%d %H:%M:%S")
+        elif pd.api.types.is_string_dtype(series) or series.dtype == object:
+            batch[col] = series.astype("string").str.slice(0, EXCEL_MAX_CELL_CHARS)
+    batch = batch.astype(object).where(batch.notna(), None)
+    return batch.itertuples(index=False, name=None)
+
+
+class SheetStream:
+    """
+    Writes rows sequentially into a worksheet (required by constant_memory mode) and rolls
+    over to a new sheet when Excel's row limit is reached.
+    """
+
+    def __init__(self, workbook, base_name, header, header_format, used_names):
+        self.workbook = workbook
+        self.base_name = base_name
+        self.header = header
+        self.header_format = header_format
+        self.used_names = used_names
+        self.worksheet = None
+        self.row = 0
+        self.rows_written = 0
+
+    def _new_sheet(self):
+        name = safe_sheet_name(self.base_name, self.used_names)
+        self.worksheet = self.workbook.add_worksheet(name)
+        self.worksheet.write_row(0, 0, self.header, self.header_format)
+        self.worksheet.freeze_panes(1, 0)
+        self.row = 1
+
+    def write(self, values):
+        if self.worksheet is None or self.row >= EXCEL_MAX_ROWS:
+            self._new_sheet()
+        self.worksheet.write_row(self.row, 0, values)
+        self.row += 1
+        self.rows_written += 1
+
+
+def write_summary(worksheet, header_format, percent_format, overall_counts, counts_by_source):
+    """
+    Writes the sentiment_label counts (overall and per source) with their shares.
+    """
+    labels = [label for label in SENTIMENT_LABELS if overall_counts.get(label)] or SENTIMENT_LABELS[:3]
+    header = ["source"] + labels + ["total"] + [f"{label} %" for label in labels]
+    worksheet.write_row(0, 0, header, header_format)
+
+    rows = [("ALL", overall_counts)] + sorted(counts_by_source.items())
+    for row_idx, (source, counts) in enumerate(rows, start=1):
+        total = sum(counts.values())
+        worksheet.write(row_idx, 0, source)
+        for col_idx, label in enumerate(labels, start=1):
+            worksheet.write_number(row_idx, col_idx, counts.get(label, 0))
+        worksheet.write_number(row_idx, len(labels) + 1, total)
+        for col_idx, label in enumerate(labels, start=len(labels) + 2):
+            worksheet.write_number(row_idx, col_idx, counts.get(label, 0) / total if total else 0, percent_format)
+    worksheet.set_column(0, 0, 18)
+
+
+def export_results(input_file, output_file, per_source=True, batch_size=BATCH_SIZE):
+    """
+    Streams the sentiment results into an XLSX workbook in constant-memory mode.
+    Returns the number of data rows written.
+    """
+    workbook = xlsxwriter.Workbook(output_file, {
+        "constant_memory": True,
+        # Teks artikel tidak perlu diperiksa sebagai URL/rumus; ini mempercepat penulisan
+        "strings_to_urls": False,
+        "strings_to_formulas": False,
+        "strings_to_numbers": False,
+    })
+    header_format = workbook.add_format({"bold": True})
+    percent_format = workbook.add_format({"num_format": "0.0%"})
+    used_names = set()
+
+    # Sheet ringkasan dibuat pertama agar muncul paling depan, tapi diisi paling akhir
+    summary_sheet = workbook.add_worksheet(safe_sheet_name("Summary", used_names))
+
+    overall_counts = Counter()
+    counts_by_source = defaultdict(Counter)
+    streams = {}
+    total_rows = 0
+
+    for batch in iter_dataset(input_file, batch_size=batch_size):
+        header = list(batch.columns)
+        labels = batch["sentiment_label"].fillna("error") if "sentiment_label" in batch.columns else None
+        sources = batch["source"].fillna("unknown") if "source" in batch.columns else None
+
+        if labels is not None:
+            overall_counts.update(labels)
+            if sources is not None:
+                pairs = pd.DataFrame({"source": sources, "label": labels}).value_counts()
+                for (source, label), count in pairs.items():
+                    counts_by_source[source][label] += int(count)
+
+        rows = prepare_batch(batch)
+        if per_source and sources is not None:
+            for source, values in zip(sources, rows):
+                if source not in streams:
+                    streams[source] = SheetStream(workbook, source, header, header_format, used_names)
+                streams[source].write(values)
+        else:
+            if "all" not in streams:
+                streams["all"] = SheetStream(workbook, "Results", header, header_format, used_names)
+            for values in rows:
+                streams["all"].write(values)
+        total_rows += len(batch)
+
+    write_summary(summary_sheet, header_format, percent_format, overall_counts, counts_by_source)
+    workbook.close()
+    return total_rows
+
+
+# --- 🚦 MAIN SCRIPT ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export final sentiment results to Excel.")
+    parser.add_argument("--input", default=INPUT_DATASET,
+                        help="Dataset base name or file (default: %(default)s)")
+    parser.add_argument("--output", default=OUTPUT_XLSX_FILE, help="XLSX output file (default: %(default)s)")
+    parser.add_argument("--single-sheet", action="store_true",
+                        help="Write all rows to one 'Results' sheet instead of one sheet per source")
+    args = parser.parse_args()
+
+    input_file = args.input if os.path.splitext(args.input)[1] else find_dataset(args.input)
+    if input_file is None or not os.path.exists(input_file):
+        print(f"❌ ERROR: Sentiment results not found at '{args.input}'.")
+        print("Please run indobert_process.py first.")
+        exit(1)
+
+    print(f"📖 Exporting '{input_file}' → '{args.output}'...")
+    start_time = time.time()
+    rows = export_results(input_file, args.output, per_source=not args.single_sheet)
+    print(f"✅ Exported {rows} rows in {time.time() - start_time:.1f}s")
+    print(f"💾 Excel file saved to: '{args.output}'")
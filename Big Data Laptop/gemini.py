@@ -1,42 +1,51 @@
 import sys
 
+import argparse
 import time
 import os
+import numpy as np
 import pandas as pd
 import google.generativeai as genai
 from dotenv import load_dotenv
+from storage import dataset_path, find_dataset, read_dataset, write_dataset
+import metrics
+import profiling
+import near_dedup
+import relevance
 
 # Load .env file
 load_dotenv()
 
+logger = metrics.get_logger("gemini")
+
 # --- 📜 KONFIGURASI ---
 
 # Konfigurasi kunci API Gemini
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     print("❌ ERROR: GEMINI_API_KEY not found in .env file.")
-    exit()
+    exit(1)
 
 try:
     genai.configure(api_key=GEMINI_API_KEY)
 except Exception as e:
     print(f"❌ ERROR: Failed to configure Gemini AI. Check your API key. Details: {e}")
-    exit()
+    exit(1)
 
 # <<< REVISI: Konfigurasi untuk setiap file yang akan diproses >>>
 # Anda bisa menambahkan file baru di sini di masa depan (misal: instagram.csv)
 FILE_CONFIGS = [
     {
         "name": "News Articles (Detik)",
-        "input_file": "news_portal/news_detik.csv",
-        "output_file": "news_portal/news_detik_cleaned.csv",
+        "input_dataset": "news_portal/news_detik",
+        "output_dataset": "news_portal/news_detik_cleaned",
         "content_column": "content", # Kolom yang berisi teks untuk diproses
         "type": "news" # Tipe konten untuk memilih prompt yang tepat
     },
     {
         "name": "YouTube Comments",
-        "input_file": "social_media/youtube.csv",
-        "output_file": "social_media/youtube_cleaned.csv",
+        "input_dataset": "social_media/youtube",
+        "output_dataset": "social_media/youtube_cleaned",
         "content_column": "comment_text",
         "type": "comment"
     }
@@ -85,57 +94,112 @@ def format_text_with_gemini(content: str, content_type: str) -> str:
     prompt = prompt_template.format(content=content)
     
     try:
-        response = model.generate_content(prompt)
+        with metrics.timer("llm_request_seconds", "LLM request latency", type=content_type):
+            response = model.generate_content(prompt)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            tokens = metrics.counter("llm_tokens_total", "LLM tokens by kind")
+            tokens.inc(getattr(usage, "prompt_token_count", 0) or 0, type=content_type, kind="prompt")
+            tokens.inc(getattr(usage, "candidates_token_count", 0) or 0, type=content_type, kind="completion")
+        metrics.counter("llm_requests_total", "LLM requests by outcome").inc(type=content_type, outcome="ok")
         time.sleep(1)  # Menghormati batas rate API
         return response.text.strip()
     except Exception as e:
-        print(f"❌ An error occurred with the Gemini API: {e}")
+        metrics.counter("llm_requests_total", "LLM requests by outcome").inc(type=content_type, outcome="failed")
+        logger.error("gemini api error", error=str(e))
         return "Error: Could not generate summary."
 
 
 # --- 🚦 MAIN ORCHESTRATOR ---
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean and summarise crawled data with Gemini.")
+    parser.add_argument("--only", choices=[config["type"] for config in FILE_CONFIGS],
+                        help="Only process the file config of this content type")
+    parser.add_argument("--relevance", choices=relevance.RELEVANCE_MODES, default=relevance.RELEVANCE_DEFAULT_MODE,
+                        help="Rows below the keyword relevance score: drop them, process them last, or no filter "
+                             "(default: %(default)s)")
+    parser.add_argument("--no-near-dedup", action="store_true",
+                        help="Send every row to the LLM, even near-duplicates of an earlier row")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+
+    if args.profile:
+        selected = [config for config in FILE_CONFIGS if not args.only or config["type"] == args.only]
+        profiling.start_profiling(f"clean_{args.only or 'all'}",
+                                  profiling.common_output_dir([config["output_dataset"] for config in selected]),
+                                  args.profile)
+
     print("🚀 Memulai proses pembersihan dan pemformatan data dengan Gemini AI...")
 
-    # Loop melalui setiap konfigurasi file
+    # Loop melalui setiap konfigurasi file; file yang gagal membuat skrip keluar dengan kode 1
+    failed = []
     for config in FILE_CONFIGS:
+        if args.only and config["type"] != args.only:
+            continue
+
         print("\n" + "="*70)
         print(f"Processing: {config['name']}")
         print("="*70)
         
-        input_file = config["input_file"]
-        output_file = config["output_file"]
+        input_file = find_dataset(config["input_dataset"])
+        output_file = dataset_path(config["output_dataset"])
         content_column = config["content_column"]
         content_type = config["type"]
 
         # Periksa apakah file input ada
-        if not os.path.exists(input_file):
-            print(f"❌ ERROR: Input file not found at '{input_file}'. Skipping.")
+        if input_file is None:
+            print(f"❌ ERROR: Input dataset not found at '{config['input_dataset']}'. Skipping.")
+            if args.only:
+                failed.append(config["name"])
             continue
 
         # Baca data menggunakan pandas
         print(f"📖 Membaca data dari {input_file}...")
-        df = pd.read_csv(input_file)
+        df = read_dataset(input_file)
 
-        # Buat kolom baru untuk hasil yang sudah dibersihkan
-        df['gemini_summary'] = ''
+        # Record yang tidak relevan dengan keyword tidak perlu dikirim ke LLM
+        if args.relevance != "off":
+            total = len(df)
+            df, below = relevance.apply_relevance(df, content_type, args.relevance)
+            action = "dropped" if total > len(df) else "processed last"
+            metrics.counter("relevance_below_threshold_total", "Rows below the relevance threshold").inc(
+                below, type=content_type)
+            print(f"🎯 Filter relevansi: {below} dari {total} baris di bawah skor {relevance.RELEVANCE_MIN_SCORE} ({action})")
 
+        # Buat kolom baru untuk hasil yang sudah dibersihkan
         print(f"🤖 Memproses {len(df)} baris dengan Gemini AI. Ini mungkin memakan waktu...")
 
-        # Loop melalui setiap baris di DataFrame
-        for index, row in df.iterrows():
-            print(f"   -> Memproses baris {index + 1}/{len(df)}...")
-            
-            content = row[content_column]
-            
+        # Near-duplicate (artikel sindikasi, komentar copy-paste) hanya dikirim sekali ke LLM
+        if args.no_near_dedup:
+            representatives = np.arange(len(df))
+        else:
+            representatives = near_dedup.find_representatives(df[content_column], content_type)
+            unique, collapsed, largest = near_dedup.describe_clusters(representatives)
+            metrics.counter("near_duplicates_collapsed_total", "Rows reusing a near-duplicate's LLM output").inc(
+                collapsed, type=content_type)
+            logger.info("near-duplicates collapsed", rows=len(df), unique=unique, collapsed=collapsed,
+                        largest_cluster=largest)
+
+        # Kolom konten dibaca sekali sebagai list dan hasil dikumpulkan di array, tanpa Series per baris
+        # (iterrows) atau tulis per sel (df.at); hanya perwakilan near-duplicate yang dikunjungi
+        contents = df[content_column].tolist()
+        summaries = np.empty(len(df), dtype=object)
+        for position in np.flatnonzero(representatives == np.arange(len(df))):
+            logger.info("memproses baris", row=int(position) + 1, of=len(df), type=content_type)
+            content = contents[position]
             if pd.notna(content) and len(str(content)) > 10:
-                summary = format_text_with_gemini(str(content), content_type)
-                df.at[index, 'gemini_summary'] = summary
+                summaries[position] = format_text_with_gemini(str(content), content_type)
             else:
-                df.at[index, 'gemini_summary'] = "Content too short or invalid."
+                summaries[position] = "Content too short or invalid."
+
+        # Salin hasil perwakilan ke semua anggota kelompok near-duplicate
+        df['gemini_summary'] = summaries[representatives]
+
+        # Urutan baris input dipulihkan; skor relevansi hanya dipakai untuk urutan pemrosesan
+        df = df.sort_index().drop(columns=relevance.RELEVANCE_COLUMNS, errors="ignore")
 
-        # Simpan DataFrame yang baru ke file CSV baru
+        # Simpan DataFrame yang baru ke file dataset baru
         print(f"\n💾 Menyimpan data yang sudah dibersihkan ke {output_file}...")
         try:
             # Pindahkan kolom gemini_summary ke depan untuk visibilitas
@@ -144,10 +208,16 @@ if __name__ == "__main__":
                 cols.insert(cols.index(content_column), cols.pop(cols.index('gemini_summary')))
                 df = df[cols]
 
-            df.to_csv(output_file, index=False, encoding='utf-8')
+            write_dataset(df, output_file)
             print(f"✅ Selesai! Data bersih Anda ada di '{output_file}'.")
         except Exception as e:
-            print(f"❌ Error saat menyimpan ke CSV: {e}")
+            print(f"❌ Error saat menyimpan dataset: {e}")
+            failed.append(config["name"])
 
+    metrics_file = metrics.export_metrics(f"clean_{args.only or 'all'}")
+    print(f"\n📈 Metrik disimpan di {metrics_file}")
     print("\n🏁 Semua proses selesai.")
+    if failed:
+        print(f"❌ Gagal: {', '.join(failed)}")
+        exit(1)
 
@@ -1,22 +1,55 @@
 import sys
+import argparse
 
+import numpy as np
 import pandas as pd
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import os
+import json
+import hashlib
+import sqlite3
+import time
+from collections import Counter
+from storage import dataset_columns, dataset_path, find_dataset, read_dataset, iter_dataset, DatasetWriter
+import metrics
+import profiling
+import near_dedup
+from records import SentimentResult
 
 
 # Model IndoBERT yang telah di-fine-tune khusus untuk analisis sentimen 3 kelas (positive, neutral, negative)
 MODEL_NAME = "mdhugol/indonesia-bert-sentiment-classification"
+# Revisi model di Hugging Face. Sebaiknya di-pin ke commit hash agar cache tetap valid;
+# mengganti nilai ini otomatis membuat semua entri cache lama tidak terpakai.
+MODEL_REVISION = "main"
 
-# File input (output dari combine_csv.py)
-INPUT_CSV_FILE = "combined_data/combined_all_sources_cleaned.csv"
-# File output akhir dengan hasil sentimen
-OUTPUT_CSV_FILE = "combined_data/final_sentiment_results.csv"
+# Dataset input (output dari csv_combiner.py), tanpa ekstensi
+INPUT_DATASET = "combined_data/combined_all_sources_cleaned"
+# Dataset output akhir dengan hasil sentimen
+OUTPUT_DATASET = dataset_path("combined_data/final_sentiment_results")
 
 # Kolom yang akan dianalisis
 TEXT_COLUMN_TO_ANALYZE = "gemini_summary"
 
+# Nilai kolom 'source' yang berisi komentar; teks sumber lain di-shingle sebagai berita (near_dedup.py)
+COMMENT_SOURCES = {"youtube"}
+
+# Cache hasil sentimen per teks, supaya run harian hanya menilai baris baru
+SENTIMENT_CACHE_FILE = "combined_data/sentiment_cache.sqlite"
+
+# Mode chunked: teks panjang dipecah menjadi jendela token yang saling tumpang tindih
+# (bukan dipotong di 512 token), lalu probabilitas tiap jendela digabung per dokumen.
+CHUNK_WINDOW_TOKENS = 512      # Panjang jendela, termasuk token [CLS]/[SEP]
+CHUNK_STRIDE_TOKENS = 128      # Jumlah token yang tumpang tindih antar jendela
+CHUNK_BATCH_SIZE = 32          # Jumlah jendela per forward pass
+CHUNK_AGGREGATIONS = ("mean", "max_confidence", "length_weighted")
+
+# Bucket histogram throughput inferensi (baris per detik)
+THROUGHPUT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+logger = metrics.get_logger("indobert")
+
 # --- FUNGSI HELPER ---
 
 def map_label_to_readable(label):
@@ -37,11 +70,115 @@ def map_label_to_readable(label):
     }
     return label_map.get(label, label)
 
+# --- FUNGSI CACHE SENTIMEN ---
+
+def get_model_tag(aggregation=None):
+    """
+    Identitas model yang ikut di-hash ke dalam key cache (nama + revisi).
+    Pada mode chunked, parameter jendela dan agregasi ikut masuk ke tag karena
+    hasilnya berbeda dari mode biasa.
+    """
+    tag = f"{MODEL_NAME}@{MODEL_REVISION}"
+    if aggregation:
+        tag += f"|chunked:{aggregation}:{CHUNK_WINDOW_TOKENS}:{CHUNK_STRIDE_TOKENS}"
+    return tag
+
+
+def make_cache_key(text, model_tag):
+    """
+    Key cache = sha256(model tag + teks), sehingga hasil lama tidak tercampur
+    dengan hasil dari model atau revisi yang berbeda.
+    """
+    return hashlib.sha256(f"{model_tag}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def open_sentiment_cache(cache_file):
+    """
+    Membuka (atau membuat) database SQLite untuk cache sentimen.
+    """
+    os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+    conn = sqlite3.connect(cache_file)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sentiment_cache (
+            cache_key TEXT PRIMARY KEY,
+            model_tag TEXT NOT NULL,
+            sentiment_label TEXT NOT NULL,
+            sentiment_score REAL NOT NULL,
+            probabilities TEXT NOT NULL
+        )
+        """
+    )
+    return conn
+
+
+def load_cached_results(conn, cache_keys):
+    """
+    Mengambil hasil yang sudah ada di cache untuk key yang diminta.
+    Mengembalikan dict {cache_key: SentimentResult}; vektor probabilitas tidak dimuat
+    (hanya dibutuhkan saat menyimpan hasil baru).
+    """
+    cached = {}
+    keys = list(cache_keys)
+    # SQLite membatasi jumlah parameter per query, jadi lookup dilakukan per potongan
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT cache_key, sentiment_label, sentiment_score "
+            f"FROM sentiment_cache WHERE cache_key IN ({placeholders})",
+            chunk,
+        )
+        for cache_key, label, score in rows:
+            cached[cache_key] = SentimentResult(label, score)
+    return cached
+
+
+def store_results(conn, model_tag, keyed_results):
+    """
+    Menyimpan hasil prediksi baru ke cache. Hasil 'error' tidak disimpan
+    supaya teks tersebut dicoba lagi pada run berikutnya.
+    """
+    rows = [
+        (key, model_tag, result.sentiment_label, result.sentiment_score, json.dumps(result.sentiment_probs))
+        for key, result in keyed_results
+        if result.sentiment_label != "error"
+    ]
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO sentiment_cache VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
 # --- FUNGSI UNTUK PREDIKSI SENTIMEN ---
 
+def load_model():
+    """
+    Memuat tokenizer dan model IndoBERT (mode evaluasi).
+    """
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, revision=MODEL_REVISION)
+    model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME, revision=MODEL_REVISION)
+    model.eval()  # Set model ke mode evaluasi
+    return tokenizer, model
+
+
+def record_inference(rows, seconds, mode, batch_size):
+    """
+    Mencatat durasi dan throughput satu forward pass, dipisah per mode dan ukuran batch.
+    """
+    metrics.histogram("inference_batch_seconds", "IndoBERT forward pass latency").observe(
+        seconds, mode=mode, batch_size=batch_size)
+    metrics.counter("inference_rows_total", "Texts or windows scored").inc(rows, mode=mode)
+    if seconds > 0:
+        metrics.histogram("inference_rows_per_second", "IndoBERT throughput per forward pass",
+                          buckets=THROUGHPUT_BUCKETS).observe(rows / seconds, mode=mode, batch_size=batch_size)
+
+
 def predict_sentiment(texts, model, tokenizer):
     """
-    Menerima daftar teks dan mengembalikan daftar label sentimen dan skor kepercayaan.
+    Menerima daftar teks dan mengembalikan daftar SentimentResult: label sentimen, skor kepercayaan,
+    dan vektor probabilitas lengkap (urutan sesuai model.config.id2label).
     """
     results = []
     # Menggunakan 'no_grad' untuk mempercepat proses karena kita tidak melakukan training
@@ -49,14 +186,16 @@ def predict_sentiment(texts, model, tokenizer):
         for i, text in enumerate(texts):
             # Memberi tahu pengguna tentang progres
             if (i + 1) % 10 == 0:
-                print(f"   Processing text {i+1}/{len(texts)}...")
+                logger.info("processing text", text=i + 1, of=len(texts))
             
             try:
+                start = time.perf_counter()
                 # Tokenisasi: mengubah teks menjadi format yang dimengerti model
                 inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
                 
                 # Prediksi: memasukkan input ke model
                 outputs = model(**inputs)
+                record_inference(1, time.perf_counter() - start, "single", 1)
                 
                 # Mendapatkan probabilitas sentimen dengan softmax
                 scores = torch.nn.functional.softmax(outputs.logits, dim=-1)
@@ -71,80 +210,297 @@ def predict_sentiment(texts, model, tokenizer):
                 # Map ke format yang mudah dibaca (positive/neutral/negative)
                 label = map_label_to_readable(raw_label)
                 
-                results.append({"sentiment_label": label, "sentiment_score": confidence_score})
+                results.append(SentimentResult(label, confidence_score, tuple(scores[0].tolist())))
             except Exception as e:
-                print(f"   ⚠️  Skipping text due to error: {e}")
-                results.append({"sentiment_label": "error", "sentiment_score": 0.0})
+                metrics.counter("inference_errors_total", "Texts that failed to score").inc()
+                logger.warning("skipping text due to error", error=str(e))
+                results.append(SentimentResult("error", 0.0))
 
     return results
 
+
+def predict_sentiment_batch(texts, model, tokenizer, batch_size=16):
+    """
+    Sama seperti predict_sentiment (dipotong di 512 token), tetapi beberapa teks diproses
+    sekaligus dalam satu forward pass. Dipakai untuk micro-batch pada mode streaming.
+    """
+    results = []
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            try:
+                batch_start = time.perf_counter()
+                inputs = tokenizer(batch, return_tensors="pt", truncation=True, padding=True, max_length=512)
+                outputs = model(**inputs)
+                record_inference(len(batch), time.perf_counter() - batch_start, "batch", batch_size)
+                scores = torch.nn.functional.softmax(outputs.logits, dim=-1)
+                for probs in scores:
+                    predicted_class_id = torch.argmax(probs).item()
+                    results.append(SentimentResult(
+                        map_label_to_readable(model.config.id2label[predicted_class_id]),
+                        probs[predicted_class_id].item(),
+                        tuple(probs.tolist()),
+                    ))
+            except Exception as e:
+                metrics.counter("inference_errors_total", "Texts that failed to score").inc(len(batch))
+                logger.warning("skipping batch due to error", texts=len(batch), error=str(e))
+                results.extend(SentimentResult("error", 0.0) for _ in batch)
+    return results
+
+
+def aggregate_window_probs(window_probs, window_lengths, aggregation):
+    """
+    Menggabungkan probabilitas semua jendela milik satu dokumen menjadi satu vektor.
+    - mean            : rata-rata biasa
+    - max_confidence  : jendela dengan probabilitas tertinggi yang dipakai
+    - length_weighted : rata-rata berbobot jumlah token tiap jendela
+    """
+    probs = torch.stack(window_probs)
+    if aggregation == "max_confidence":
+        return probs[torch.argmax(probs.max(dim=-1).values)]
+    if aggregation == "length_weighted":
+        weights = torch.tensor(window_lengths, dtype=probs.dtype).unsqueeze(-1)
+        return (probs * weights).sum(dim=0) / weights.sum()
+    return probs.mean(dim=0)
+
+
+def predict_sentiment_chunked(texts, model, tokenizer, aggregation="mean",
+                              window_size=CHUNK_WINDOW_TOKENS, stride=CHUNK_STRIDE_TOKENS,
+                              batch_size=CHUNK_BATCH_SIZE):
+    """
+    Versi predict_sentiment untuk teks panjang (misalnya kolom 'content').
+    Setiap teks dipecah menjadi jendela token yang tumpang tindih, semua jendela dari
+    semua dokumen diproses bersama dalam batch, lalu probabilitasnya digabung per dokumen.
+    Membutuhkan fast tokenizer (untuk overflow_to_sample_mapping). Dokumen dengan jendela
+    yang gagal dinilai diberi label 'error'.
+    """
+    if aggregation not in CHUNK_AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation '{aggregation}', choose from {CHUNK_AGGREGATIONS}")
+
+    # Tokenisasi sekali untuk semua teks; overflow menghasilkan jendela tambahan
+    encodings = tokenizer(
+        texts,
+        truncation=True,
+        max_length=window_size,
+        stride=stride,
+        return_overflowing_tokens=True,
+    )
+    window_ids = encodings["input_ids"]
+    window_to_text = encodings["overflow_to_sample_mapping"]
+    logger.info("texts split into windows", texts=len(texts), windows=len(window_ids))
+
+    # Urutkan jendela berdasarkan panjang agar padding per batch minimal
+    order = sorted(range(len(window_ids)), key=lambda i: len(window_ids[i]))
+    window_probs = [None] * len(window_ids)
+
+    with torch.no_grad():
+        for start in range(0, len(order), batch_size):
+            batch_idx = order[start:start + batch_size]
+            try:
+                batch_start = time.perf_counter()
+                batch = tokenizer.pad(
+                    {key: [encodings[key][i] for i in batch_idx]
+                     for key in ("input_ids", "attention_mask", "token_type_ids") if key in encodings},
+                    return_tensors="pt",
+                )
+                outputs = model(**batch)
+                record_inference(len(batch_idx), time.perf_counter() - batch_start, "chunked", batch_size)
+                scores = torch.nn.functional.softmax(outputs.logits, dim=-1)
+                for i, probs in zip(batch_idx, scores):
+                    window_probs[i] = probs
+            except Exception as e:
+                # Jendela batch ini tetap None; dokumennya diberi label 'error' di bawah
+                logger.warning("skipping window batch due to error", windows=len(batch_idx), error=str(e))
+
+            done = min(start + batch_size, len(order))
+            if (start // batch_size + 1) % 10 == 0 or done == len(order):
+                logger.info("processing window", window=done, of=len(order))
+
+    # Kelompokkan jendela per dokumen
+    probs_per_text = [[] for _ in texts]
+    lengths_per_text = [[] for _ in texts]
+    for i, text_idx in enumerate(window_to_text):
+        probs_per_text[text_idx].append(window_probs[i])
+        lengths_per_text[text_idx].append(len(window_ids[i]))
+
+    results = []
+    for probs, lengths in zip(probs_per_text, lengths_per_text):
+        if not probs or any(window is None for window in probs):
+            metrics.counter("inference_errors_total", "Texts that failed to score").inc()
+            results.append(SentimentResult("error", 0.0))
+            continue
+        doc_probs = aggregate_window_probs(probs, lengths, aggregation)
+        predicted_class_id = torch.argmax(doc_probs).item()
+        results.append(SentimentResult(
+            map_label_to_readable(model.config.id2label[predicted_class_id]),
+            doc_probs[predicted_class_id].item(),
+            tuple(doc_probs.tolist()),
+        ))
+
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Analisis sentimen IndoBERT untuk data gabungan.")
+    parser.add_argument("--column", default=TEXT_COLUMN_TO_ANALYZE,
+                        help="Kolom teks yang dianalisis (misalnya 'text' untuk isi artikel penuh).")
+    parser.add_argument("--chunked", action="store_true",
+                        help="Pecah teks panjang menjadi jendela token yang tumpang tindih alih-alih memotong di 512 token.")
+    parser.add_argument("--aggregation", choices=CHUNK_AGGREGATIONS, default="mean",
+                        help="Cara menggabungkan probabilitas antar jendela pada mode --chunked.")
+    parser.add_argument("--no-near-dedup", action="store_true",
+                        help="Nilai setiap teks unik, termasuk yang hampir identik dengan teks lain.")
+    profiling.add_profile_argument(parser)
+    return parser.parse_args()
+
+
 # --- 🚦 SKRIP UTAMA ---
 
 if __name__ == "__main__":
+    args = parse_args()
+    text_column = args.column
+    aggregation = args.aggregation if args.chunked else None
+    if args.profile:
+        profiling.start_profiling("sentiment", os.path.dirname(OUTPUT_DATASET), args.profile)
+
     print("🚀 Memulai proses analisis sentimen dengan IndoBERT...")
     print(f"MODEL: {MODEL_NAME}")
+    if aggregation:
+        print(f"MODE: chunked ({CHUNK_WINDOW_TOKENS} token, stride {CHUNK_STRIDE_TOKENS}, agregasi '{aggregation}')")
 
-    # 1. Cek apakah file input ada
-    if not os.path.exists(INPUT_CSV_FILE):
-        print(f"❌ KESALAHAN: File input tidak ditemukan di '{INPUT_CSV_FILE}'.")
-        print("Silakan jalankan combine_csv.py terlebih dahulu untuk menggabungkan data.")
-        exit()
+    # 1. Cek apakah dataset input ada
+    input_file = find_dataset(INPUT_DATASET)
+    if input_file is None:
+        print(f"❌ KESALAHAN: Dataset input tidak ditemukan di '{INPUT_DATASET}'.")
+        print("Silakan jalankan csv_combiner.py terlebih dahulu untuk menggabungkan data.")
+        exit(1)
 
-    # 2. Muat data yang sudah digabungkan
-    print(f"📖 Membaca data dari '{INPUT_CSV_FILE}'...")
-    df = pd.read_csv(INPUT_CSV_FILE)
+    # 2. Muat hanya kolom teks yang dianalisis dan sumbernya (kolom lain dibaca per batch saat menyimpan)
+    print(f"📖 Membaca kolom '{text_column}' dari '{input_file}'...")
+    try:
+        text_df = read_dataset(input_file, columns=[column for column in dataset_columns(input_file)
+                                                    if column in (text_column, "source")])
+    except (OSError, ValueError) as e:
+        # File rusak, format/engine salah, atau CSV tidak bisa di-parse (ParserError, ArrowInvalid)
+        print(f"❌ KESALAHAN: Gagal membaca '{input_file}': {e}")
+        exit(1)
 
     # Pastikan kolom teks ada
-    if TEXT_COLUMN_TO_ANALYZE not in df.columns:
-        print(f"❌ KESALAHAN: Kolom '{TEXT_COLUMN_TO_ANALYZE}' tidak ditemukan di CSV.")
-        exit()
-        
-    # Hapus baris dengan ringkasan yang kosong atau tidak valid
-    df.dropna(subset=[TEXT_COLUMN_TO_ANALYZE], inplace=True)
-
-    # 3. Muat model dan tokenizer IndoBERT dari Hugging Face
-    print("🤖 Memuat model dan tokenizer IndoBERT... (Mungkin perlu waktu saat pertama kali)")
-    try:
-        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
-        model.eval()  # Set model ke mode evaluasi
-    except Exception as e:
-        print(f"❌ KESALAHAN: Tidak bisa memuat model. Periksa koneksi internet atau nama model. Detail: {e}")
-        exit()
+    if text_column not in text_df.columns:
+        print(f"❌ KESALAHAN: Kolom '{text_column}' tidak ditemukan di dataset.")
+        exit(1)
 
-    # 4. Lakukan prediksi sentimen
-    print(f"\n✍️  Menganalisis sentimen pada kolom '{TEXT_COLUMN_TO_ANALYZE}'...")
-    
-    texts_to_analyze = df[TEXT_COLUMN_TO_ANALYZE].tolist()
-    sentiment_results = predict_sentiment(texts_to_analyze, model, tokenizer)
-    
-    # Buat DataFrame baru dari hasil sentimen
-    sentiment_df = pd.DataFrame(sentiment_results)
-    
-    # Gabungkan DataFrame asli dengan hasil sentimen
-    # Pastikan indexnya sesuai
-    df.reset_index(drop=True, inplace=True)
-    sentiment_df.reset_index(drop=True, inplace=True)
-    df_final = pd.concat([df, sentiment_df], axis=1)
-
-    # 5. Simpan hasil akhir
-    print(f"\n💾 Menyimpan hasil akhir ke '{OUTPUT_CSV_FILE}'...")
+    # Baris dengan ringkasan yang kosong atau tidak valid dilewati
+    text_df = text_df.dropna(subset=[text_column])
+    texts = text_df[text_column].astype(str).tolist()
+    # Jenis konten menentukan shingle near-duplicate: komentar per kata, berita per karakter
+    sources = text_df["source"] if "source" in text_df.columns else pd.Series("", index=text_df.index)
+    content_types = np.where(sources.fillna("").astype(str).str.lower().isin(COMMENT_SOURCES),
+                             "comment", "news").tolist()
+    del text_df
+
+    # 3. Cek cache: hanya teks yang belum pernah dinilai yang dikirim ke model
+    model_tag = get_model_tag(aggregation)
+    cache_keys = [make_cache_key(text, model_tag) for text in texts]
+
+    cache_conn = open_sentiment_cache(SENTIMENT_CACHE_FILE)
+    cached_results = load_cached_results(cache_conn, set(cache_keys))
+
+    # Teks yang sama cukup dinilai sekali
+    texts_to_analyze, types_to_analyze = {}, {}
+    for key, text, content_type in zip(cache_keys, texts, content_types):
+        if key not in cached_results and key not in texts_to_analyze:
+            texts_to_analyze[key] = text
+            types_to_analyze[key] = content_type
+
+    cache_hits = sum(1 for key in cache_keys if key in cached_results)
+    cache_lookups = metrics.counter("sentiment_cache_lookups_total", "Sentiment cache lookups by result")
+    cache_lookups.inc(cache_hits, result="hit")
+    cache_lookups.inc(len(texts) - cache_hits, result="miss")
+    print(f"🗃️  Cache: {cache_hits}/{len(texts)} baris sudah ada, "
+          f"{len(texts_to_analyze)} teks unik baru perlu dinilai.")
+
+    if texts_to_analyze:
+        # 4. Muat model dan tokenizer IndoBERT dari Hugging Face
+        print("🤖 Memuat model dan tokenizer IndoBERT... (Mungkin perlu waktu saat pertama kali)")
+        try:
+            tokenizer, model = load_model()
+        except Exception as e:
+            print(f"❌ KESALAHAN: Tidak bisa memuat model. Periksa koneksi internet atau nama model. Detail: {e}")
+            exit(1)
+
+        # Teks yang hampir identik (near-duplicate) cukup dinilai lewat satu perwakilan;
+        # berita dan komentar dikelompokkan terpisah, masing-masing dengan shingle jenisnya
+        keys_to_analyze = list(texts_to_analyze.keys())
+        representatives = np.arange(len(keys_to_analyze))
+        if not args.no_near_dedup:
+            for content_type in sorted(set(types_to_analyze.values())):
+                positions = np.array([position for position, key in enumerate(keys_to_analyze)
+                                      if types_to_analyze[key] == content_type])
+                group_representatives = near_dedup.find_representatives(
+                    [texts_to_analyze[keys_to_analyze[position]] for position in positions], content_type)
+                representatives[positions] = positions[group_representatives]
+            unique, collapsed, _ = near_dedup.describe_clusters(representatives)
+            metrics.counter("near_duplicates_collapsed_total", "Texts reusing a near-duplicate's result").inc(
+                collapsed, type="sentiment")
+            print(f"🔍 {collapsed} teks hampir identik memakai hasil perwakilannya, {unique} teks dinilai.")
+        rep_keys = [key for position, key in enumerate(keys_to_analyze) if representatives[position] == position]
+
+        # Lakukan prediksi sentimen hanya untuk teks baru
+        print(f"\n✍️  Menganalisis sentimen pada kolom '{text_column}'...")
+        rep_texts = [texts_to_analyze[key] for key in rep_keys]
+        if aggregation:
+            new_results = predict_sentiment_chunked(rep_texts, model, tokenizer, aggregation)
+        else:
+            new_results = predict_sentiment(rep_texts, model, tokenizer)
+
+        # Anggota kelompok near-duplicate memakai hasil perwakilannya dan ikut disimpan di cache
+        # dengan key sendiri, sehingga run berikutnya tidak perlu menilai (atau memuat model) lagi
+        rep_results = dict(zip(rep_keys, new_results))
+        keyed_results = [(key, rep_results[keys_to_analyze[representatives[position]]])
+                         for position, key in enumerate(keys_to_analyze)]
+        stored = store_results(cache_conn, model_tag, keyed_results)
+        print(f"🗃️  {stored} hasil baru disimpan ke cache '{SENTIMENT_CACHE_FILE}'.")
+
+        # Hasil error tetap dipakai untuk run ini, tapi tidak disimpan di cache
+        cached_results.update(keyed_results)
+
+    cache_conn.close()
+
+    # 5. Susun hasil akhir dari cache, batch demi batch, dan simpan
+    print(f"\n💾 Menyimpan hasil akhir ke '{OUTPUT_DATASET}'...")
+    sentiment_counts = Counter()
+    save_failed = False
     try:
-        df_final.to_csv(OUTPUT_CSV_FILE, index=False, encoding='utf-8')
+        position = 0
+        output_columns = [column for column in dataset_columns(input_file)
+                          if column not in ('sentiment_label', 'sentiment_score')]
+        output_columns += ['sentiment_label', 'sentiment_score']
+        with DatasetWriter(OUTPUT_DATASET, columns=output_columns) as writer:
+            for batch in iter_dataset(input_file):
+                batch = batch.dropna(subset=[text_column])
+                batch_keys = cache_keys[position:position + len(batch)]
+                position += len(batch)
+
+                batch_results = [cached_results[key] for key in batch_keys]
+                batch['sentiment_label'] = [result.sentiment_label for result in batch_results]
+                batch['sentiment_score'] = [result.sentiment_score for result in batch_results]
+                sentiment_counts.update(batch['sentiment_label'])
+                writer.append(batch)
+
         print("✅ Proses analisis sentimen selesai!")
-        print(f"📊 Total baris yang diproses: {len(df_final)}")
-        print(f"💾 File hasil akhir Anda siap di: '{OUTPUT_CSV_FILE}'")
+        print(f"📊 Total baris yang diproses: {writer.rows_written}")
+        print(f"💾 File hasil akhir Anda siap di: '{OUTPUT_DATASET}'")
     except Exception as e:
-        print(f"❌ Kesalahan saat menyimpan file CSV akhir: {e}")
+        print(f"❌ Kesalahan saat menyimpan dataset akhir: {e}")
+        save_failed = True
 
     # --- TAMBAHAN: Tampilkan Ringkasan Sentimen ---
     print("\n" + "="*50)
     print("📊 Ringkasan Hasil Analisis Sentimen:")
     print("="*50)
 
-    # Hitung jumlah setiap label sentimen
-    sentiment_counts = df_final['sentiment_label'].value_counts()
-
+    # Jumlah setiap label sentimen sudah dihitung saat menyimpan
     positive_count = sentiment_counts.get('positive', 0)
     neutral_count = sentiment_counts.get('neutral', 0)
     negative_count = sentiment_counts.get('negative', 0)
@@ -157,4 +513,12 @@ if __name__ == "__main__":
     if error_count > 0:
         print(f"⚠️  Error   : {error_count} berita (gagal diproses)")
 
-    print("="*50)
\ No newline at end of file
+    print("="*50)
+
+    label_counter = metrics.counter("sentiment_labels_total", "Rows written by sentiment label")
+    for label, count in sentiment_counts.items():
+        label_counter.inc(count, label=label)
+    metrics_file = metrics.export_metrics("sentiment")
+    print(f"📈 Metrik disimpan di {metrics_file}")
+    if save_failed:
+        exit(1)
\ No newline at end of file
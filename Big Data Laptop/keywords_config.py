@@ -53,11 +53,41 @@ YOUTUBE_KEYWORDS = [
     "Kampanye anti hoax Indonesia",
 ]
 
+# --- RELEVANCE FILTER (relevance.py) ---
+# Variasi penulisan per keyword. Keyword utama dan variasinya dicatat sebagai keyword yang cocok.
+KEYWORD_VARIANTS = {
+    "Wujudkan Indonesia Damai": ["wujudkanindonesiadamai", "mewujudkan indonesia damai"],
+    "Indonesia Damai": ["indonesia yang damai", "indonesia rukun dan damai", "indonesiadamai"],
+    "Kampanye Damai": ["kampanye yang damai", "kampanye sejuk", "deklarasi kampanye damai"],
+    "jaga persatuan bangsa": ["menjaga persatuan", "jaga persatuan", "persatuan bangsa", "keutuhan nkri"],
+    "persatuan dan kesatuan": ["persatuan kesatuan", "bhinneka tunggal ika"],
+    "rekonsiliasi nasional": ["rekonsiliasi"],
+    "anti provokasi": ["provokasi", "jangan terprovokasi", "tidak terprovokasi"],
+    "stop adu domba": ["adu domba", "politik identitas", "polarisasi"],
+    "toleransi beragama": ["toleransi antar umat", "toleransi", "intoleransi"],
+    "kerukunan umat beragama": ["kerukunan antar umat", "kerukunan", "rukun"],
+    "dialog lintas agama": ["lintas agama", "dialog antarumat", "antarumat beragama"],
+    "moderasi beragama": ["moderasi"],
+    "anti hoax": ["hoax", "hoaks", "anti hoaks", "lawan hoaks", "disinformasi", "misinformasi"],
+    "anti berita bohong": ["berita bohong", "berita palsu", "fitnah"],
+    "ciptakan suasana sejuk": ["suasana sejuk", "suasana kondusif", "kondusif"],
+    "pemilu damai": ["pemilu yang damai", "pilkada damai", "pemilu 2024 damai"],
+    "pendinginan pasca pemilu": ["pasca pemilu", "usai pemilu", "setelah pemilu"],
+}
+
+# Istilah tema umum: menambah skor relevansi, tapi lebih rendah dari keyword dan variasinya
+RELEVANCE_TERMS = [
+    "damai", "perdamaian", "persatuan", "kesatuan", "kebangsaan", "kebhinekaan", "keberagaman",
+    "ujaran kebencian", "radikalisme", "ekstremisme", "terorisme", "pemilu", "pilpres", "pilkada",
+    "kampanye", "deklarasi", "bawaslu", "kpu", "kemenag", "kominfo", "polri", "tokoh agama",
+]
+
 SCRAPING_LIMITS = {    
     # YouTube limits
     "youtube_videos_per_keyword": 3,          # How many videos to scrape per keyword
     "youtube_comments_per_video": 50,         # How many comments to collect per video
     "youtube_max_scroll_attempts": 10,        # How many times to scroll for comments
+    "youtube_reply_quota_budget": 2000,       # Max API units per run for fetching truncated reply threads
     
     # News portal limits
     "news_articles_per_keyword": 5,           # How many articles to scrape per keyword
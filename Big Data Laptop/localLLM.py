@@ -1,32 +1,70 @@
 import sys
+import argparse
+import json
 import time
 import os
+import threading
+import numpy as np
 import pandas as pd
 import requests
 from dotenv import load_dotenv
+from storage import dataset_path, find_dataset, read_dataset, write_dataset
+import metrics
+import profiling
+import near_dedup
+import relevance
 
 # Load .env file
 load_dotenv()
 
+logger = metrics.get_logger("localLLM")
+
 # --- KONFIGURASI ---
 
 # Konfigurasi untuk LM Studio (local LLM)
 LM_STUDIO_URL = "http://127.0.0.1:1234/v1/chat/completions"
 MODEL_NAME = "google/gemma-3-12b"  # Sesuaikan dengan model yang Anda load di LM Studio
 
+# Streaming (SSE): token dibaca begitu dihasilkan, sehingga generasi yang kebablasan bisa dihentikan
+# lebih awal (koneksi ditutup → LM Studio berhenti generate) dan hasil parsial tidak hilang saat timeout
+LLM_STREAM = True
+MAX_TOKENS = 500
+
+# Batas max_tokens saat streaming diturunkan dari batas karakter: karakter per token awalnya
+# CHARS_PER_TOKEN, lalu diukur dari usage yang dilaporkan server setelah cukup banyak token.
+# Headroom membuat batas token selalu lebih longgar dari batas karakter, yang memotong dengan rapi.
+CHARS_PER_TOKEN = 3.5
+CHARS_PER_TOKEN_MIN_SAMPLE = 500   # Token minimum sebelum rasio terukur dipakai
+TOKEN_CAP_HEADROOM = 1.5
+LLM_CONNECT_TIMEOUT = 5   # Detik untuk membuka koneksi
+LLM_READ_TIMEOUT = 60     # Detik maksimum menunggu token berikutnya
+
+# Teks yang menandakan jawaban sudah selesai (model mulai mengulang format prompt)
+STOP_SEQUENCES = {
+    "news": ["\n---", "Berikut adalah konten artikelnya", "Ringkasan:"],
+    "comment": ["\n---", "Berikut adalah komentarnya", "Komentar yang sudah dibersihkan:"],
+}
+
+# Batas panjang output per tipe (karakter): max(min_chars, ratio × panjang input), maksimal max_chars.
+# Komentar yang ditulis ulang tidak pernah perlu jauh lebih panjang dari aslinya.
+LENGTH_CAPS = {
+    "news": {"ratio": 1.0, "min_chars": 400, "max_chars": 1500},
+    "comment": {"ratio": 3.0, "min_chars": 120, "max_chars": 1000},
+}
+
 # Konfigurasi file yang akan diproses
 FILE_CONFIGS = [
     {
         "name": "News Articles (Detik)",
-        "input_file": "news_portal/news_detik.csv",
-        "output_file": "news_portal/news_detik_cleaned.csv",
+        "input_dataset": "news_portal/news_detik",
+        "output_dataset": "news_portal/news_detik_cleaned",
         "content_column": "content",
         "type": "news"
     },
     {
         "name": "YouTube Comments",
-        "input_file": "social_media/youtube.csv",
-        "output_file": "social_media/youtube_cleaned.csv",
+        "input_dataset": "social_media/youtube",
+        "output_dataset": "social_media/youtube_cleaned",
         "content_column": "comment_text",
         "type": "comment"
     }
@@ -64,6 +102,136 @@ PROMPT_TEMPLATES = {
 }
 
 
+def record_llm_usage(usage, content_type):
+    """
+    Records prompt/completion token counts reported by the OpenAI-compatible API.
+    """
+    if not usage:
+        return
+    tokens = metrics.counter("llm_tokens_total", "LLM tokens by kind")
+    tokens.inc(usage.get("prompt_tokens", 0), type=content_type, kind="prompt")
+    tokens.inc(usage.get("completion_tokens", 0), type=content_type, kind="completion")
+
+
+_token_ratio_lock = threading.Lock()
+_token_ratio = {}  # {content_type: [karakter, token]} dari completion yang dilaporkan server
+
+
+def observe_chars_per_token(text, usage, content_type):
+    """
+    Adds a completion's length and server-reported token count to the measured ratio.
+    """
+    tokens = (usage or {}).get("completion_tokens")
+    if not tokens or not text:
+        return
+    with _token_ratio_lock:
+        totals = _token_ratio.setdefault(content_type, [0, 0])
+        totals[0] += len(text)
+        totals[1] += tokens
+
+
+def chars_per_token(content_type):
+    """
+    Measured characters per completion token for this type, or CHARS_PER_TOKEN until enough
+    tokens have been seen.
+    """
+    with _token_ratio_lock:
+        chars, tokens = _token_ratio.get(content_type, (0, 0))
+    return chars / tokens if tokens >= CHARS_PER_TOKEN_MIN_SAMPLE else CHARS_PER_TOKEN
+
+
+def token_cap(max_chars, content_type):
+    """
+    max_tokens for a streamed request: enough tokens for max_chars characters, with headroom.
+    """
+    return min(MAX_TOKENS, int(TOKEN_CAP_HEADROOM * max_chars / chars_per_token(content_type)) + 1)
+
+
+def length_cap(content, content_type):
+    """
+    Maximum number of output characters for this input, from LENGTH_CAPS.
+    """
+    cap = LENGTH_CAPS.get(content_type, LENGTH_CAPS["comment"])
+    return int(min(cap["max_chars"], max(cap["min_chars"], cap["ratio"] * len(content))))
+
+
+def trim_partial(text):
+    """
+    Cuts a partial generation back to its last complete sentence, or its last whole word.
+    """
+    text = text.rstrip()
+    sentence_end = max(text.rfind(mark) for mark in (". ", "! ", "? ", ".\n"))
+    if sentence_end >= len(text) // 2:
+        return text[:sentence_end + 1]
+    if text.endswith((".", "!", "?")) or " " not in text:
+        return text
+    return text.rsplit(" ", 1)[0]
+
+
+def iter_sse_events(response):
+    """
+    Yields the JSON payload of every 'data:' event of an OpenAI-compatible SSE stream.
+    """
+    for line in response.iter_lines():
+        if not line.startswith(b"data:"):
+            continue
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            return
+        yield json.loads(data.decode("utf-8"))
+
+
+def read_streamed_completion(response, content_type, stop_sequences, max_chars, start_time):
+    """
+    Consumes a streamed completion until it ends, a stop sequence appears or max_chars is
+    exceeded, then closes the connection. Returns (text, finish reason). A read timeout after
+    some text arrived returns the partial text instead of raising.
+    """
+    text = ""
+    chunks = 0
+    usage = None
+    reason = "stop"
+    try:
+        for event in iter_sse_events(response):
+            usage = event.get("usage") or usage
+            choice = (event.get("choices") or [{}])[0]
+            delta = (choice.get("delta") or {}).get("content") or ""
+            if delta:
+                if not text:
+                    metrics.histogram("llm_time_to_first_token_seconds", "Time until the first LLM token").observe(
+                        time.perf_counter() - start_time, type=content_type)
+                text += delta
+                chunks += 1
+
+                # Stop sequence dicari hanya di bagian akhir teks yang baru bertambah
+                window_start = max(0, len(text) - len(delta) - max(map(len, stop_sequences), default=0))
+                positions = [text.find(stop, window_start) for stop in stop_sequences]
+                positions = [position for position in positions if position > 0]
+                if positions:
+                    text, reason = text[:min(positions)], "stop_sequence"
+                    break
+                if len(text) > max_chars:
+                    text, reason = trim_partial(text[:max_chars]), "length_cap"
+                    break
+            if choice.get("finish_reason"):
+                reason = choice["finish_reason"]
+    except requests.exceptions.RequestException:
+        if not text.strip():
+            raise
+        text, reason = trim_partial(text), "timeout"
+    finally:
+        response.close()
+
+    if reason in ("stop_sequence", "length_cap", "timeout"):
+        metrics.counter("llm_early_stops_total", "Streamed generations cut off by the client").inc(
+            type=content_type, reason=reason)
+    # Saat dihentikan lebih awal server tidak sempat mengirim usage: jumlah chunk ≈ jumlah token
+    record_llm_usage(usage or {"completion_tokens": chunks}, content_type)
+    if usage and reason not in ("stop_sequence", "length_cap"):
+        observe_chars_per_token(text, usage, content_type)
+    return text.strip(), reason
+
+
 def format_text_with_local_llm(content: str, content_type: str) -> str:
     """
     Mengirim teks ke LM Studio (local LLM) dan meminta pemformatan berdasarkan tipenya.
@@ -73,6 +241,9 @@ def format_text_with_local_llm(content: str, content_type: str) -> str:
     prompt_template = PROMPT_TEMPLATES.get(content_type, PROMPT_TEMPLATES["comment"])
     prompt = prompt_template.format(content=content)
     
+    max_chars = length_cap(content, content_type)
+    stop_sequences = STOP_SEQUENCES.get(content_type, STOP_SEQUENCES["comment"])
+
     # Buat request body untuk OpenAI-compatible API
     payload = {
         "model": MODEL_NAME,
@@ -83,92 +254,165 @@ def format_text_with_local_llm(content: str, content_type: str) -> str:
             }
         ],
         "temperature": 0.7,
-        "max_tokens": 500,
-        "stream": False
+        "max_tokens": MAX_TOKENS,
+        "stream": LLM_STREAM
     }
+    # --no-stream mengirim request lama apa adanya; batas panjang dan stop sequence hanya saat streaming
+    if LLM_STREAM:
+        payload["max_tokens"] = token_cap(max_chars, content_type)
+        payload["stop"] = stop_sequences
     
     max_retries = 3
     retry_delay = 1  # <<< CHANGE: Wait time is now 1 second >>>
 
     for attempt in range(max_retries):
         try:
-            response = requests.post(
-                LM_STUDIO_URL,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=60  # Timeout per request
-            )
-            
-            if response.status_code == 200:
+            with metrics.timer("llm_request_seconds", "LLM request latency", type=content_type):
+                start_time = time.perf_counter()
+                response = requests.post(
+                    LM_STUDIO_URL,
+                    json=payload,
+                    headers={"Content-Type": "application/json"},
+                    stream=LLM_STREAM,
+                    timeout=(LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT)
+                )
+                if response.status_code == 200 and LLM_STREAM:
+                    text, reason = read_streamed_completion(response, content_type, stop_sequences, max_chars,
+                                                            start_time)
+
+            if response.status_code == 200 and LLM_STREAM:
+                outcome = "partial" if reason == "timeout" else "ok"
+                metrics.counter("llm_requests_total", "LLM requests by outcome").inc(type=content_type, outcome=outcome)
+                return text
+            elif response.status_code == 200:
                 result = response.json()
-                return result['choices'][0]['message']['content'].strip()
+                record_llm_usage(result.get("usage"), content_type)
+                text = result['choices'][0]['message']['content']
+                observe_chars_per_token(text, result.get("usage"), content_type)
+                metrics.counter("llm_requests_total", "LLM requests by outcome").inc(type=content_type, outcome="ok")
+                return text.strip()
             else:
-                # Error dari server, akan coba lagi
-                print(f"      Attempt {attempt + 1}/{max_retries} failed with HTTP {response.status_code}: {response.text}")
+                # Error dari server, akan coba lagi; response stream ditutup agar koneksinya tidak bocor
+                with response:
+                    logger.warning("llm attempt failed", attempt=attempt + 1, max_retries=max_retries,
+                                   status=response.status_code, body=response.text[:200])
 
         except requests.exceptions.RequestException as e:
             # Error koneksi, akan coba lagi
-            print(f"      Attempt {attempt + 1}/{max_retries} failed: Could not connect to LM Studio. Error: {e}")
+            logger.warning("llm attempt failed: could not connect to LM Studio", attempt=attempt + 1,
+                           max_retries=max_retries, error=str(e))
         
         except Exception as e:
             # Error tak terduga lainnya, akan coba lagi
-            print(f"      Attempt {attempt + 1}/{max_retries} failed with an unexpected error: {e}")
+            logger.warning("llm attempt failed with an unexpected error", attempt=attempt + 1,
+                           max_retries=max_retries, error=str(e))
 
         # Tunggu sebelum mencoba lagi, kecuali ini adalah percobaan terakhir
         if attempt < max_retries - 1:
-            print(f"      Retrying in {retry_delay} second(s)...")
+            metrics.counter("llm_retries_total", "LLM request retries").inc(type=content_type)
             time.sleep(retry_delay)
 
     # Jika semua percobaan gagal
-    print(f"      Skipping row after {max_retries} failed attempts.")
+    metrics.counter("llm_requests_total", "LLM requests by outcome").inc(type=content_type, outcome="failed")
+    logger.error("skipping row after failed attempts", max_retries=max_retries)
     return "Error: Failed to process after multiple retries."
 
 
 # --- MAIN ORCHESTRATOR ---
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean and summarise crawled data with a local LLM.")
+    parser.add_argument("--only", choices=[config["type"] for config in FILE_CONFIGS],
+                        help="Only process the file config of this content type")
+    parser.add_argument("--relevance", choices=relevance.RELEVANCE_MODES, default=relevance.RELEVANCE_DEFAULT_MODE,
+                        help="Rows below the keyword relevance score: drop them, process them last, or no filter "
+                             "(default: %(default)s)")
+    parser.add_argument("--no-near-dedup", action="store_true",
+                        help="Send every row to the LLM, even near-duplicates of an earlier row")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Wait for complete responses instead of streaming tokens (no early stop)")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    LLM_STREAM = not args.no_stream
+
+    if args.profile:
+        selected = [config for config in FILE_CONFIGS if not args.only or config["type"] == args.only]
+        profiling.start_profiling(f"clean_{args.only or 'all'}",
+                                  profiling.common_output_dir([config["output_dataset"] for config in selected]),
+                                  args.profile)
+
     print("Starting data cleaning with Local LLM (LM Studio)...")
     print(f"Connecting to: {LM_STUDIO_URL}")
     print(f"Model: {MODEL_NAME}")
     print("="*70)
     
-    # Loop melalui setiap konfigurasi file
+    # Loop melalui setiap konfigurasi file; file yang gagal membuat skrip keluar dengan kode 1
+    failed = []
     for config in FILE_CONFIGS:
+        if args.only and config["type"] != args.only:
+            continue
+
         print(f"\nProcessing: {config['name']}")
         print("="*70)
         
-        input_file = config["input_file"]
-        output_file = config["output_file"]
+        input_file = find_dataset(config["input_dataset"])
+        output_file = dataset_path(config["output_dataset"])
         content_column = config["content_column"]
         content_type = config["type"]
 
         # Periksa apakah file input ada
-        if not os.path.exists(input_file):
-            print(f"ERROR: Input file not found at '{input_file}'. Skipping.")
+        if input_file is None:
+            print(f"ERROR: Input dataset not found at '{config['input_dataset']}'. Skipping.")
+            if args.only:
+                failed.append(config["name"])
             continue
 
         # Baca data menggunakan pandas
         print(f"Reading data from {input_file}...")
-        df = pd.read_csv(input_file)
+        df = read_dataset(input_file)
 
-        # Buat kolom baru untuk hasil yang sudah dibersihkan
-        df['gemini_summary'] = ''
+        # Record yang tidak relevan dengan keyword tidak perlu dikirim ke LLM
+        if args.relevance != "off":
+            total = len(df)
+            df, below = relevance.apply_relevance(df, content_type, args.relevance)
+            action = "dropped" if total > len(df) else "processed last"
+            metrics.counter("relevance_below_threshold_total", "Rows below the relevance threshold").inc(
+                below, type=content_type)
+            print(f"Relevance filter: {below} of {total} rows below score {relevance.RELEVANCE_MIN_SCORE} ({action})")
 
+        # Buat kolom baru untuk hasil yang sudah dibersihkan
         print(f"Processing {len(df)} rows with Local LLM...")
 
-        # Loop melalui setiap baris di DataFrame
-        for index, row in df.iterrows():
-            print(f"    -> Processing row {index + 1}/{len(df)}...")
-            
-            content = row[content_column]
-            
+        # Near-duplicate (artikel sindikasi, komentar copy-paste) hanya dikirim sekali ke LLM
+        if args.no_near_dedup:
+            representatives = np.arange(len(df))
+        else:
+            representatives = near_dedup.find_representatives(df[content_column], content_type)
+            unique, collapsed, largest = near_dedup.describe_clusters(representatives)
+            metrics.counter("near_duplicates_collapsed_total", "Rows reusing a near-duplicate's LLM output").inc(
+                collapsed, type=content_type)
+            logger.info("near-duplicates collapsed", rows=len(df), unique=unique, collapsed=collapsed,
+                        largest_cluster=largest)
+
+        # Kolom konten dibaca sekali sebagai list dan hasil dikumpulkan di array, tanpa Series per baris
+        # (iterrows) atau tulis per sel (df.at); hanya perwakilan near-duplicate yang dikunjungi
+        contents = df[content_column].tolist()
+        summaries = np.empty(len(df), dtype=object)
+        for position in np.flatnonzero(representatives == np.arange(len(df))):
+            logger.info("processing row", row=int(position) + 1, of=len(df), type=content_type)
+            content = contents[position]
             if pd.notna(content) and len(str(content)) > 10:
-                summary = format_text_with_local_llm(str(content), content_type)
-                df.at[index, 'gemini_summary'] = summary
+                summaries[position] = format_text_with_local_llm(str(content), content_type)
             else:
-                df.at[index, 'gemini_summary'] = "Content too short or invalid."
+                summaries[position] = "Content too short or invalid."
+
+        # Salin hasil perwakilan ke semua anggota kelompok near-duplicate
+        df['gemini_summary'] = summaries[representatives]
+
+        # Urutan baris input dipulihkan; skor relevansi hanya dipakai untuk urutan pemrosesan
+        df = df.sort_index().drop(columns=relevance.RELEVANCE_COLUMNS, errors="ignore")
 
-        # Simpan DataFrame yang baru ke file CSV baru
+        # Simpan DataFrame yang baru ke file dataset baru
         print(f"\nSaving cleaned data to {output_file}...")
         try:
             # Pindahkan kolom gemini_summary ke depan untuk visibilitas
@@ -177,9 +421,15 @@ if __name__ == "__main__":
                 cols.insert(cols.index(content_column), cols.pop(cols.index('gemini_summary')))
                 df = df[cols]
 
-            df.to_csv(output_file, index=False, encoding='utf-8')
+            write_dataset(df, output_file)
             print(f"Done! Clean data saved to '{output_file}'.")
         except Exception as e:
-            print(f"Error saving to CSV: {e}")
+            print(f"Error saving dataset: {e}")
+            failed.append(config["name"])
 
-    print("\nAll processes complete.")
\ No newline at end of file
+    metrics_file = metrics.export_metrics(f"clean_{args.only or 'all'}")
+    print(f"\n📈 Metrics saved to {metrics_file}")
+    print("\nAll processes complete.")
+    if failed:
+        print(f"ERROR: Failed: {', '.join(failed)}")
+        exit(1)
\ No newline at end of file
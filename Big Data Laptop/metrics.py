@@ -0,0 +1,353 @@
+import sys
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- 📜 CONFIGURATION ---
+
+# Folder tempat snapshot metrik setiap tahap disimpan (Prometheus textfile + JSON + riwayat)
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+METRICS_HISTORY_FILE = "history.jsonl"
+# Riwayat dibatasi per tahap agar file (dibaca planner.py setiap crawl dimulai) tidak tumbuh tanpa batas;
+# harus >= planner.HISTORY_RUNS
+METRICS_HISTORY_RUNS = 20
+
+# Format log: "text" (key=value) atau "json" (satu objek JSON per baris)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Bucket default histogram (detik)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Jumlah sampel yang disimpan per seri untuk menghitung persentil (reservoir sampling)
+RESERVOIR_SIZE = 2048
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(label_key):
+    if not label_key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in label_key) + "}"
+
+
+class Counter:
+    """
+    Monotonic counter with optional labels, e.g. http_bytes_total{host="news.detik.com"}.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def series(self):
+        with self._lock:
+            return dict(self._values)
+
+    def snapshot(self):
+        return [{"labels": dict(key), "value": value} for key, value in self.series().items()]
+
+    def prometheus_lines(self):
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self.series().items()]
+
+
+class _HistogramSeries:
+    __slots__ = ("count", "total", "minimum", "maximum", "bucket_counts", "samples")
+
+    def __init__(self, bucket_count):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.bucket_counts = [0] * bucket_count
+        self.samples = []
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets (for Prometheus) plus a small reservoir of samples
+    so that p50/p95 can be reported directly.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            series.count += 1
+            series.total += value
+            series.minimum = value if series.minimum is None else min(series.minimum, value)
+            series.maximum = value if series.maximum is None else max(series.maximum, value)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series.bucket_counts[i] += 1
+                    break
+            if len(series.samples) < RESERVOIR_SIZE:
+                series.samples.append(value)
+            else:
+                slot = random.randrange(series.count)
+                if slot < RESERVOIR_SIZE:
+                    series.samples[slot] = value
+
+    def quantile(self, q, **labels):
+        series = self._series.get(_label_key(labels))
+        if series is None or not series.samples:
+            return None
+        return _quantile(series.samples, q)
+
+    def snapshot(self):
+        result = []
+        with self._lock:
+            for key, series in self._series.items():
+                result.append({
+                    "labels": dict(key),
+                    "count": series.count,
+                    "sum": series.total,
+                    "min": series.minimum,
+                    "max": series.maximum,
+                    "p50": _quantile(series.samples, 0.5),
+                    "p95": _quantile(series.samples, 0.95),
+                })
+        return result
+
+    def summary(self):
+        """
+        Count, sum, p50 and p95 over all label series combined.
+        """
+        with self._lock:
+            samples = [value for series in self._series.values() for value in series.samples]
+            count = sum(series.count for series in self._series.values())
+            total = sum(series.total for series in self._series.values())
+        return {"count": count, "sum": total, "p50": _quantile(samples, 0.5), "p95": _quantile(samples, 0.95)}
+
+    def prometheus_lines(self):
+        lines = []
+        with self._lock:
+            for key, series in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, series.bucket_counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series.count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series.total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series.count}")
+        return lines
+
+
+def _quantile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def _get_or_create(cls, name, description, **kwargs):
+    metric = _registry.get(name)
+    if metric is None:
+        with _registry_lock:
+            metric = _registry.get(name)
+            if metric is None:
+                metric = _registry[name] = cls(name, description, **kwargs)
+    return metric
+
+
+def counter(name, description=""):
+    """
+    Returns the registered counter `name`, creating it on first use.
+    """
+    return _get_or_create(Counter, name, description)
+
+
+def histogram(name, description="", buckets=DEFAULT_BUCKETS):
+    """
+    Returns the registered histogram `name`, creating it on first use.
+    """
+    return _get_or_create(Histogram, name, description, buckets=buckets)
+
+
+@contextmanager
+def timer(name, description="", **labels):
+    """
+    Times the with-block and records the duration (seconds) in histogram `name`.
+    """
+    metric = histogram(name, description)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric.observe(time.perf_counter() - start, **labels)
+
+
+def snapshot():
+    """
+    Returns all metrics as a JSON-serialisable dict.
+    """
+    return {
+        name: {"type": metric.kind, "description": metric.description, "series": metric.snapshot()}
+        for name, metric in sorted(_registry.items())
+    }
+
+
+def prometheus_text():
+    """
+    Renders all metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for name, metric in sorted(_registry.items()):
+        if metric.description:
+            lines.append(f"# HELP {name} {metric.description}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        lines.extend(metric.prometheus_lines())
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """
+    Clears every registered metric (used between benchmark runs).
+    """
+    with _registry_lock:
+        _registry.clear()
+
+
+def export_metrics(stage_name, metrics_dir=None):
+    """
+    Writes <stage>.prom (Prometheus textfile collector) and <stage>.json snapshots,
+    and appends the JSON snapshot to the run history used for planning.
+    """
+    metrics_dir = metrics_dir or METRICS_DIR
+    os.makedirs(metrics_dir, exist_ok=True)
+    data = snapshot()
+
+    prom_file = os.path.join(metrics_dir, f"{stage_name}.prom")
+    with open(prom_file + ".tmp", "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(prom_file + ".tmp", prom_file)
+
+    json_file = os.path.join(metrics_dir, f"{stage_name}.json")
+    record = {"stage": stage_name, "finished_at": datetime.now().isoformat(timespec="seconds"), "metrics": data}
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+
+    history_file = os.path.join(metrics_dir, METRICS_HISTORY_FILE)
+    with open(history_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    trim_history(history_file)
+    return json_file
+
+
+def trim_history(history_file, runs=METRICS_HISTORY_RUNS):
+    """
+    Keeps only the last `runs` runs of every stage in the history file.
+    """
+    with open(history_file, encoding="utf-8") as f:
+        lines = f.readlines()
+    stages = []
+    for line in lines:
+        try:
+            stages.append(json.loads(line).get("stage"))
+        except json.JSONDecodeError:
+            stages.append(None)
+
+    kept, seen = [], {}
+    for line, stage in zip(reversed(lines), reversed(stages)):
+        seen[stage] = seen.get(stage, 0) + 1
+        if seen[stage] <= runs:
+            kept.append(line)
+    if len(kept) == len(lines):
+        return
+
+    tmp_file = f"{history_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.writelines(reversed(kept))
+    os.replace(tmp_file, history_file)
+
+
+# --- STRUCTURED LOGGING ---
+
+class _StructuredFormatter(logging.Formatter):
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        timestamp = datetime.fromtimestamp(record.created).isoformat(timespec="seconds")
+        if LOG_FORMAT == "json":
+            return json.dumps({"ts": timestamp, "level": record.levelname, "logger": record.name,
+                               "event": record.getMessage(), **fields}, ensure_ascii=False, default=str)
+        rendered = " ".join(f"{key}={json.dumps(value, ensure_ascii=False, default=str)}"
+                            for key, value in fields.items())
+        return f"{timestamp} {record.levelname:<7} {record.name}: {record.getMessage()} {rendered}".rstrip()
+
+
+class StructuredLogger:
+    """
+    Thin wrapper around logging.Logger: logger.info("event", key=value, ...).
+    """
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    def _log(self, level, event, fields):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, event, extra={"fields": fields})
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        self._log(logging.ERROR, event, fields)
+
+
+_logging_configured = False
+
+
+def get_logger(name):
+    """
+    Returns a structured logger writing to stdout in the configured format.
+    """
+    global _logging_configured
+    if not _logging_configured:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(_StructuredFormatter())
+        root = logging.getLogger("pipeline")
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL.upper())
+        root.propagate = False
+        _logging_configured = True
+    return StructuredLogger(logging.getLogger(f"pipeline.{name}"))
@@ -0,0 +1,172 @@
+import argparse
+import os
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from storage import find_dataset, read_dataset
+
+# --- 📜 CONFIGURATION ---
+
+# Near-duplicate detection (MinHash + LSH): artikel detik yang dimuat ulang di URL/subdomain lain dan
+# komentar copy-paste dari banyak akun dikelompokkan, lalu hanya satu perwakilan per kelompok yang
+# dikirim ke LLM / IndoBERT. Hasilnya disalin kembali ke semua anggota kelompok.
+NEAR_DUP_THRESHOLD = 0.85   # Perkiraan kemiripan Jaccard minimum antar shingle
+NUM_PERMUTATIONS = 128      # Panjang signature MinHash
+LSH_BANDS = 16              # 16 band × 8 baris: pasangan dengan kemiripan ≳ 0.7 hampir pasti jadi kandidat
+MINHASH_SEED = 1
+MAX_SHINGLES_PER_CHUNK = 50000  # Batas memori saat menghitung signature (shingle × permutasi)
+
+# Jenis shingle per tipe konten: kata untuk artikel panjang, karakter untuk komentar pendek
+SHINGLE_SETTINGS = {
+    "news": {"shingle": "word", "k": 3},
+    "comment": {"shingle": "char", "k": 5},
+}
+
+_PRIME = np.uint64(4294967291)  # Bilangan prima terbesar di bawah 2^32
+_MULTIPLIER = np.uint64(1000003)
+
+
+def normalise(text):
+    return " ".join(str(text).lower().split())
+
+
+def shingle_hashes(text, shingle="char", k=5):
+    """
+    Returns the unique 32-bit hashes of the text's k-shingles (characters or words),
+    computed with a vectorised polynomial hash over a sliding window.
+    """
+    text = normalise(text)
+    if shingle == "word":
+        tokens = np.array([zlib.crc32(word.encode("utf-8")) for word in text.split()], dtype=np.uint64)
+    else:
+        tokens = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(tokens) == 0:
+        return np.empty(0, dtype=np.uint64)
+    if len(tokens) < k:
+        k = len(tokens)
+
+    windows = np.lib.stride_tricks.sliding_window_view(tokens, k)
+    powers = _MULTIPLIER ** np.arange(k, dtype=np.uint64)  # Overflow uint64 disengaja (hash modulo 2^64)
+    hashes = (windows * powers).sum(axis=1, dtype=np.uint64)
+    hashes = (hashes ^ (hashes >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+    return np.unique(hashes)
+
+
+def minhash_signatures(texts, shingle="char", k=5, num_perm=NUM_PERMUTATIONS, seed=MINHASH_SEED):
+    """
+    MinHash signatures (len(texts) × num_perm) using universal hashing (a·x + b) mod p.
+    Texts without shingles get an all-max signature and never match anything.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+    shingles = [shingle_hashes(text, shingle, k) for text in texts]
+    signatures = np.full((len(texts), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+
+    # Dokumen diproses per potongan agar matriks shingle × permutasi tetap kecil
+    start = 0
+    while start < len(texts):
+        end, total = start, 0
+        while end < len(texts) and (end == start or total + len(shingles[end]) <= MAX_SHINGLES_PER_CHUNK):
+            total += len(shingles[end])
+            end += 1
+        docs = [i for i in range(start, end) if len(shingles[i])]
+        if docs:
+            values = np.concatenate([shingles[i] for i in docs]) % _PRIME
+            hashed = (values[:, None] * a[None, :] + b[None, :]) % _PRIME
+            offsets = np.cumsum([0] + [len(shingles[i]) for i in docs[:-1]])
+            signatures[docs] = np.minimum.reduceat(hashed, offsets, axis=0)
+        start = end
+    return signatures
+
+
+def lsh_representatives(signatures, threshold=NEAR_DUP_THRESHOLD, bands=LSH_BANDS):
+    """
+    Groups documents whose signatures collide in at least one LSH band and whose estimated
+    Jaccard similarity reaches the threshold. Returns, for every document, the position of its
+    cluster representative (the first member), so work scales with the number of candidates
+    rather than all pairs.
+    """
+    n_docs, num_perm = signatures.shape
+    rows = num_perm // bands
+    parent = np.arange(n_docs)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    valid = signatures[:, 0] != np.iinfo(np.uint64).max
+    for band in range(bands):
+        band_values = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = band_values.view(np.dtype((np.void, band_values.dtype.itemsize * rows))).ravel()
+        _, buckets = np.unique(keys, return_inverse=True)
+        buckets = np.where(valid, buckets.ravel(), -1 - np.arange(n_docs))
+
+        order = np.argsort(buckets, kind="stable")
+        sorted_buckets = buckets[order]
+        starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        for start, end in zip(starts, ends):
+            if end - start < 2:
+                continue
+            members = order[start:end]
+            anchor = members[0]
+            similarity = (signatures[members[1:]] == signatures[anchor]).mean(axis=1)
+            for member in members[1:][similarity >= threshold]:
+                root_a, root_b = find(anchor), find(member)
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    return np.array([find(i) for i in range(n_docs)])
+
+
+def find_representatives(texts, content_type="comment", threshold=NEAR_DUP_THRESHOLD):
+    """
+    Returns an array with, for every text, the position of the text that represents its
+    near-duplicate cluster (itself if it is unique). Missing texts are never clustered.
+    """
+    texts = ["" if pd.isna(text) else str(text) for text in texts]
+    settings = SHINGLE_SETTINGS.get(content_type, SHINGLE_SETTINGS["comment"])
+    signatures = minhash_signatures(texts, settings["shingle"], settings["k"])
+    return lsh_representatives(signatures, threshold)
+
+
+def describe_clusters(representatives):
+    """
+    Returns (unique texts, collapsed texts, largest cluster size).
+    """
+    _, sizes = np.unique(representatives, return_counts=True)
+    return len(sizes), len(representatives) - len(sizes), int(sizes.max()) if len(sizes) else 0
+
+
+# --- 🚦 MAIN SCRIPT ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report near-duplicate clusters in a dataset column.")
+    parser.add_argument("dataset", help="Dataset base name or file, e.g. social_media/youtube")
+    parser.add_argument("--column", required=True, help="Text column, e.g. content or comment_text")
+    parser.add_argument("--type", choices=sorted(SHINGLE_SETTINGS), default="comment",
+                        help="Shingle settings to use (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUP_THRESHOLD)
+    parser.add_argument("--show", type=int, default=5, help="Number of largest clusters to print")
+    args = parser.parse_args()
+
+    input_file = args.dataset if os.path.splitext(args.dataset)[1] else find_dataset(args.dataset)
+    if input_file is None or not os.path.exists(input_file):
+        print(f"❌ ERROR: Dataset not found at '{args.dataset}'.")
+        exit(1)
+
+    texts = read_dataset(input_file, columns=[args.column])[args.column]
+    start_time = time.perf_counter()
+    representatives = find_representatives(texts, args.type, args.threshold)
+    unique, collapsed, largest = describe_clusters(representatives)
+    print(f"🔍 {len(texts)} texts → {unique} clusters ({collapsed} near-duplicates, largest cluster {largest}) "
+          f"in {time.perf_counter() - start_time:.2f}s")
+
+    clusters = pd.Series(representatives).value_counts()
+    for representative, size in clusters[clusters > 1].head(args.show).items():
+        print(f"\n   {size}× {str(texts.iloc[representative])[:120]!r}")
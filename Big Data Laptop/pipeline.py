@@ -0,0 +1,419 @@
+import sys
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from storage import dataset_path, find_dataset
+
+# --- 📜 CONFIGURATION ---
+
+# File state berisi fingerprint setiap tahap dari run terakhir yang berhasil
+STATE_FILE = ".pipeline_state.json"
+
+# Output harus ditulis ulang oleh run tahap itu sendiri; toleransi untuk resolusi mtime file system yang kasar
+OUTPUT_MTIME_TOLERANCE_SECONDS = 2
+
+# Definisi DAG pipeline. Path tanpa ekstensi adalah dataset (.parquet atau .csv, lihat storage.py).
+# Inputs hanya berisi data; skrip tahap dan semua modul lokal yang di-import-nya (langsung, lewat modul
+# lain, atau di dalam fungsi) ditambahkan otomatis oleh local_modules().
+# Ketergantungan antar tahap diturunkan dari inputs/outputs: tahap yang membaca output
+# tahap lain akan menunggu tahap tersebut selesai.
+STAGES = [
+    {
+        "name": "crawl_news",
+        "script": "crawler_berita.py",
+        "args": [],
+        "inputs": [],
+        "outputs": ["news_portal/news_detik"],
+    },
+    {
+        "name": "crawl_youtube",
+        "script": "crawler_sosmedYT.py",
+        "args": [],
+        "inputs": [],
+        "outputs": ["social_media/youtube"],
+    },
+    {
+        "name": "clean_news",
+        "script": "{cleaner}",
+        "args": ["--only", "news"],
+        "inputs": ["news_portal/news_detik"],
+        "outputs": ["news_portal/news_detik_cleaned"],
+    },
+    {
+        "name": "clean_youtube",
+        "script": "{cleaner}",
+        "args": ["--only", "comment"],
+        "inputs": ["social_media/youtube"],
+        "outputs": ["social_media/youtube_cleaned"],
+    },
+    {
+        "name": "combine",
+        "script": "csv_combiner.py",
+        "args": [],
+        "inputs": ["news_portal/news_detik_cleaned", "social_media/youtube_cleaned"],
+        "outputs": ["combined_data/combined_all_sources_cleaned"],
+    },
+    {
+        "name": "sentiment",
+        "script": "indobert_process.py",
+        "args": [],
+        "inputs": ["combined_data/combined_all_sources_cleaned"],
+        "outputs": ["combined_data/final_sentiment_results"],
+    },
+    {
+        "name": "export_excel",
+        "script": "export_excel.py",
+        "args": [],
+        "inputs": ["combined_data/final_sentiment_results"],
+        "outputs": ["combined_data/final_sentiment_results.xlsx"],
+    },
+    {
+        "name": "corpus",
+        "script": "corpus_store.py",
+        "args": ["load"],
+        "inputs": ["combined_data/final_sentiment_results"],
+        "outputs": ["combined_data/corpus.sqlite"],
+    },
+    {
+        "name": "analytics",
+        "script": "analytics.py",
+        "args": ["refresh"],
+        "inputs": ["combined_data/final_sentiment_results"],
+        "outputs": ["combined_data/analytics.sqlite"],
+    },
+]
+
+CLEANER_SCRIPTS = {"local": "localLLM.py", "gemini": "gemini.py"}
+
+_print_lock = threading.Lock()
+
+
+def log(message):
+    with _print_lock:
+        print(message, flush=True)
+
+
+def resolve_path(path):
+    """
+    Resolves a stage input/output to a file path. Paths without an extension are datasets.
+    """
+    if os.path.splitext(path)[1]:
+        return path
+    return find_dataset(path) or dataset_path(path)
+
+
+def local_modules(script):
+    """
+    Returns the local modules (*.py next to the script) that the script imports, directly or
+    through other local modules, including imports inside functions. Sorted, without the script.
+    """
+    found, pending = set(), [script]
+    while pending:
+        path = pending.pop()
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module = os.path.join(os.path.dirname(path), name.split(".")[0] + ".py")
+                if os.path.exists(module) and module not in found:
+                    found.add(module)
+                    pending.append(module)
+    found.discard(script)
+    return sorted(found)
+
+
+def build_stages(cleaner):
+    """
+    Returns the stage list with the cleaner script filled in and the script itself
+    (plus every local module it imports) added to each stage's inputs.
+    """
+    stages = {}
+    for stage in STAGES:
+        script = stage["script"].format(cleaner=CLEANER_SCRIPTS[cleaner])
+        stages[stage["name"]] = {
+            **stage,
+            "script": script,
+            "inputs": [script] + local_modules(script) + stage["inputs"],
+        }
+
+    # Ketergantungan: tahap lain yang menghasilkan salah satu input tahap ini
+    producers = {output: stage["name"] for stage in stages.values() for output in stage["outputs"]}
+    for stage in stages.values():
+        stage["deps"] = sorted({producers[path] for path in stage["inputs"] if path in producers})
+    return stages
+
+
+def upstream_closure(stages, targets):
+    """
+    Returns the target stages together with everything they depend on.
+    """
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(stages[name]["deps"])
+    return selected
+
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {"files": {}, "stages": {}}
+
+
+def save_state(state):
+    tmp_file = STATE_FILE + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, STATE_FILE)
+
+
+def file_digest(path, state):
+    """
+    Content hash of a file. The hash is cached in the state by (size, mtime) so that
+    unchanged files are not re-read on every run.
+    """
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    cached = state["files"].get(path)
+    if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+        return cached["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    state["files"][path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+    return digest.hexdigest()
+
+
+def stage_fingerprint(stage, state):
+    """
+    Fingerprint of a stage: its command plus the content hash of every input.
+    """
+    fingerprint = hashlib.sha256(json.dumps([stage["script"]] + stage["args"]).encode("utf-8"))
+    for path in stage["inputs"]:
+        resolved = resolve_path(path)
+        fingerprint.update(f"\x00{path}\x00{file_digest(resolved, state)}".encode("utf-8"))
+    return fingerprint.hexdigest()
+
+
+def outputs_intact(stage, state):
+    """
+    True if every output exists and still has the content recorded after the last run.
+    """
+    recorded = state["stages"].get(stage["name"], {}).get("outputs", {})
+    for path in stage["outputs"]:
+        resolved = resolve_path(path)
+        if not os.path.exists(resolved) or recorded.get(path) != file_digest(resolved, state):
+            return False
+    return True
+
+
+def stage_reason(stage, state, force):
+    """
+    Returns why a stage has to run, or None if it is up to date.
+    """
+    if stage["name"] in force:
+        return "forced"
+    previous = state["stages"].get(stage["name"])
+    if previous is None:
+        return "never run"
+    if previous["fingerprint"] != stage_fingerprint(stage, state):
+        return "inputs changed"
+    if not outputs_intact(stage, state):
+        return "outputs missing or modified"
+    return None
+
+
+def plan(stages, selected, state, force):
+    """
+    Decides which selected stages run. A stage also runs when any upstream stage runs.
+    Returns {name: reason or None} in dependency order.
+    """
+    decisions = {}
+    remaining = set(selected)
+    while remaining:
+        ready = sorted(name for name in remaining if all(dep in decisions or dep not in selected
+                                                         for dep in stages[name]["deps"]))
+        for name in ready:
+            reason = stage_reason(stages[name], state, force)
+            if reason is None and any(decisions.get(dep) for dep in stages[name]["deps"]):
+                reason = "upstream rebuilt"
+            decisions[name] = reason
+            remaining.discard(name)
+    return decisions
+
+
+def record_stage(stage, state):
+    """
+    Stores the stage's current fingerprint and output hashes as its last successful run.
+    """
+    state["stages"][stage["name"]] = {
+        "fingerprint": stage_fingerprint(stage, state),
+        "outputs": {path: file_digest(resolve_path(path), state) for path in stage["outputs"]},
+        "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def output_written_since(path, start_time):
+    """
+    True if the output exists and was modified after start_time.
+    """
+    resolved = resolve_path(path)
+    if not os.path.exists(resolved):
+        return False
+    return os.path.getmtime(resolved) >= start_time - OUTPUT_MTIME_TOLERANCE_SECONDS
+
+
+def run_stage(stage):
+    """
+    Runs a stage script as a subprocess, prefixing its output with the stage name.
+    Returns True if the process exited cleanly and every declared output was written by this run
+    (a stale output left by an earlier run does not count).
+    """
+    command = [sys.executable, stage["script"]] + stage["args"]
+    log(f"▶️  [{stage['name']}] {' '.join(command[1:])}")
+    start_time = time.time()
+
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        env={**os.environ, "PYTHONUNBUFFERED": "1", "PYTHONIOENCODING": "utf-8"},
+    )
+    for line in process.stdout:
+        log(f"   [{stage['name']}] {line.rstrip()}")
+    process.wait()
+
+    missing = [path for path in stage["outputs"] if not output_written_since(path, start_time)]
+    elapsed = time.time() - start_time
+    if process.returncode != 0 or missing:
+        detail = f"exit code {process.returncode}" if process.returncode else f"outputs not written {missing}"
+        log(f"❌ [{stage['name']}] failed after {elapsed:.1f}s ({detail})")
+        return False
+
+    log(f"✅ [{stage['name']}] done in {elapsed:.1f}s")
+    return True
+
+
+def execute(stages, decisions, state, jobs):
+    """
+    Runs the planned stages, starting each one as soon as its dependencies have finished.
+    Independent branches (news and YouTube) run in parallel. Returns the failed stage names.
+    """
+    to_run = [name for name, reason in decisions.items() if reason]
+    finished, failed = set(), set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while to_run or running:
+            for name in list(to_run):
+                deps = [dep for dep in stages[name]["deps"] if dep in decisions and decisions[dep]]
+                if any(dep in failed for dep in deps):
+                    log(f"⏭️  [{name}] skipped because an upstream stage failed")
+                    failed.add(name)
+                    to_run.remove(name)
+                elif all(dep in finished for dep in deps):
+                    to_run.remove(name)
+                    # Upstream sudah jalan tapi outputnya tidak berubah: tahap ini tidak perlu diulang
+                    if decisions[name] == "upstream rebuilt" and stage_reason(stages[name], state, set()) is None:
+                        log(f"⏭️  [{name}] up to date (upstream output unchanged)")
+                        finished.add(name)
+                        continue
+                    running[executor.submit(run_stage, stages[name])] = name
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                stage = stages[name]
+                if future.result():
+                    finished.add(name)
+                    record_stage(stage, state)
+                    save_state(state)
+                else:
+                    failed.add(name)
+    return failed
+
+
+# --- 🚦 MAIN SCRIPT ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the crawl → clean → combine → sentiment pipeline incrementally.")
+    parser.add_argument("targets", nargs="*",
+                        help="Stages to bring up to date, with their upstream stages (default: all)")
+    parser.add_argument("--dry-run", action="store_true", help="Only show which stages would run and why")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE",
+                        help="Run these stages even if up to date ('all' for every stage)")
+    parser.add_argument("--mark-done", nargs="+", default=[], metavar="STAGE",
+                        help="Record these stages as up to date with their current outputs and exit")
+    parser.add_argument("--jobs", type=int, default=2, help="Maximum number of stages running in parallel")
+    parser.add_argument("--cleaner", choices=sorted(CLEANER_SCRIPTS), default="local",
+                        help="LLM cleaning script to use (default: %(default)s)")
+    args = parser.parse_args()
+
+    stages = build_stages(args.cleaner)
+    unknown = [name for name in args.targets + args.force + args.mark_done
+               if name not in stages and name != "all"]
+    if unknown:
+        print(f"❌ ERROR: Unknown stage(s): {', '.join(unknown)}. Available: {', '.join(stages)}")
+        exit(2)
+
+    force = set(stages) if "all" in args.force else set(args.force)
+    selected = upstream_closure(stages, args.targets or list(stages))
+
+    state = load_state()
+    if args.mark_done:
+        for name in args.mark_done:
+            record_stage(stages[name], state)
+            print(f"📌 Marked '{name}' as up to date")
+        save_state(state)
+        exit()
+
+    decisions = plan(stages, selected, state, force)
+
+    print("📋 Pipeline plan:")
+    for name, reason in decisions.items():
+        marker = "RUN " if reason else "skip"
+        print(f"   {marker} {name:<14} {reason or 'up to date'}")
+
+    if args.dry_run:
+        save_state(state)
+        exit()
+
+    if not any(decisions.values()):
+        save_state(state)
+        print("✅ Everything is up to date.")
+        exit()
+
+    start_time = time.time()
+    failed = execute(stages, decisions, state, max(1, args.jobs))
+    print(f"\n🏁 Pipeline finished in {time.time() - start_time:.1f}s")
+    if failed:
+        print(f"❌ Failed or skipped stages: {', '.join(sorted(failed))}")
+        exit(1)
@@ -0,0 +1,395 @@
+import argparse
+import json
+import math
+import os
+import metrics
+
+# --- 📜 CONFIGURATION ---
+
+# Perencana biaya dan durasi: membaca keywords_config.py (lewat konstanta crawler) dan riwayat metrik
+# run sebelumnya (metrics/history.jsonl), lalu memperkirakan jumlah request, kuota YouTube, token LLM,
+# durasi per tahap dan cache hit rate sebelum crawl dijalankan.
+HISTORY_RUNS = 5  # Jumlah run terakhir per tahap yang dipakai sebagai dasar perkiraan
+
+# Nilai awal saat belum ada riwayat metrik (ditandai "default" di output)
+DEFAULT_ESTIMATES = {
+    "http_request_seconds": 0.8,
+    "article_parse_seconds": 0.05,
+    "search_results_per_page": 20,
+    "search_page_yield": 0.6,          # Bagian hasil pencarian yang baru dan relevan
+    "youtube_api_seconds": 0.4,
+    "video_skip_rate": 0.2,            # Video yang dilewati filter relevansi
+    "comment_fill_rate": 0.8,          # Komentar yang benar-benar ada vs. batas per video
+    "replies_per_comment": 0.3,
+    "truncated_thread_rate": 0.05,     # Thread dengan lebih dari 5 balasan (perlu comments.list)
+    "relevance_drop_rate": 0.15,
+    "near_dup_rate": 0.1,
+    "llm_seconds": {"news": 20.0, "comment": 4.0},
+    "llm_tokens": {"news": 1200, "comment": 250},
+    "sentiment_cache_hit_rate": 0.0,
+    "inference_rows_per_second": 8.0,
+}
+
+YOUTUBE_DAILY_QUOTA = 10000            # Kuota harian default YouTube Data API v3 (unit)
+MAX_SUGGESTED_CONCURRENCY = 16         # Batas saran worker crawl / request LLM paralel
+
+
+class MetricsHistory:
+    """
+    Counters and histograms of the last `runs` runs per stage from metrics/history.jsonl.
+    """
+
+    def __init__(self, path=None, runs=HISTORY_RUNS):
+        self.path = path or os.path.join(metrics.METRICS_DIR, metrics.METRICS_HISTORY_FILE)
+        by_stage = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    by_stage.setdefault(record.get("stage"), []).append(record)
+        self.records = [record for records in by_stage.values() for record in records[-runs:]]
+        self.stages = sorted(stage for stage in by_stage if stage)
+
+    def _series(self, name, labels):
+        for record in self.records:
+            for series in record["metrics"].get(name, {}).get("series", []):
+                if all(str(series["labels"].get(key)) == str(value) for key, value in labels.items()):
+                    yield series
+
+    def total(self, name, **labels):
+        """
+        Counter value summed over all matching series and runs.
+        """
+        return sum(series["value"] for series in self._series(name, labels))
+
+    def mean(self, name, **labels):
+        """
+        Mean of a histogram over all matching series and runs, or None without samples.
+        """
+        count = total = 0
+        for series in self._series(name, labels):
+            count += series["count"]
+            total += series["sum"]
+        return total / count if count else None
+
+
+class Estimator:
+    """
+    Looks up a value in the history and remembers whether it fell back to the default.
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self.defaults_used = set()
+
+    def value(self, key, measured, subkey=None, scope=None):
+        """
+        The measured value, or DEFAULT_ESTIMATES[key] (or [key][subkey]) if nothing was measured.
+        `scope` only names the estimate in the report, e.g. relevance_drop_rate[news].
+        """
+        if measured is not None:
+            return measured
+        scope = scope or subkey
+        self.defaults_used.add(key if scope is None else f"{key}[{scope}]")
+        default = DEFAULT_ESTIMATES[key]
+        return default[subkey] if subkey is not None else default
+
+    def ratio(self, key, numerator, denominator, scope=None):
+        return self.value(key, numerator / denominator if denominator else None, scope=scope)
+
+
+def plan_news(keywords, sites, articles_per_keyword, target_total, delays, estimator, host_interval=0.0):
+    """
+    Estimates search pages, article requests and crawl time for crawler_berita.py.
+    Returns a dict; queue_seconds(workers) gives the time in work-queue mode with that many workers.
+    """
+    history = estimator.history
+    results_per_page = estimator.ratio("search_results_per_page", history.total("search_results_total"),
+                                       history.total("search_pages_total"))
+    page_yield = estimator.ratio("search_page_yield", history.total("search_results_total", outcome="new"),
+                                 history.total("search_results_total"))
+    links_per_page = max(results_per_page * page_yield, 1e-9)
+    latency = estimator.value("http_request_seconds", history.mean("http_request_seconds"))
+    parse = estimator.value("article_parse_seconds", history.mean("article_parse_seconds"))
+
+    pages = articles = 0
+    for site_config in sites.values():
+        site_pages = min(site_config.get("max_pages", 5), math.ceil(articles_per_keyword / links_per_page))
+        pages += site_pages * len(keywords)
+        articles += min(articles_per_keyword, int(site_pages * links_per_page)) * len(keywords)
+    articles = min(articles, target_total)
+    requests = pages + articles
+    work = requests * latency + articles * parse
+    sequential = (work + pages * delays.get("search_page", 0) + articles * delays.get("article", 0)
+                  + len(keywords) * len(sites) * delays.get("site", 0))
+    return {
+        "stage": "crawl_news", "items": articles, "unit": "articles", "requests": requests,
+        "seconds": sequential, "rate_limit_seconds": requests * host_interval,
+        "queue_seconds": lambda workers: max(work / workers, requests * host_interval),
+    }
+
+
+def plan_youtube(keywords, videos_per_keyword, comments_per_video, include_replies, reply_quota_budget,
+                 quota_costs, estimator, host_interval=0.0, skip_videos=False):
+    """
+    Estimates API requests, quota units, comments and crawl time for crawler_sosmedYT.py.
+    skip_videos: the crawl skips off-topic videos (--min-video-relevance).
+    """
+    history = estimator.history
+    searches = history.total("youtube_api_requests_total", method="search.list")
+    skip_rate = 0.0
+    if skip_videos:
+        skip_rate = estimator.ratio("video_skip_rate", history.total("youtube_videos_skipped_total"),
+                                    searches * videos_per_keyword)
+    thread_requests = history.total("youtube_api_requests_total", method="commentThreads.list")
+    comments_per_request = history.total("youtube_comments_total") / thread_requests if thread_requests else None
+    fill_rate = estimator.value("comment_fill_rate", min(1.0, comments_per_request / min(100, comments_per_video))
+                                if comments_per_request else None)
+    latency = estimator.value("youtube_api_seconds", history.mean("youtube_api_seconds"))
+
+    videos = round(len(keywords) * videos_per_keyword * (1 - skip_rate))
+    comments = round(videos * comments_per_video * fill_rate)
+    thread_pages = videos * max(1, math.ceil(comments / max(videos, 1) / 100))
+    quota = len(keywords) * quota_costs["search.list"] + thread_pages * quota_costs["commentThreads.list"]
+    requests = len(keywords) + thread_pages
+    replies = 0
+    if include_replies:
+        history_comments = history.total("youtube_comments_total")
+        replies = round(comments * estimator.ratio("replies_per_comment", history.total("youtube_replies_total"),
+                                                   history_comments))
+        # Thread dengan balasan terpotong perlu comments.list, dibatasi anggaran kuota balasan
+        truncated = comments * estimator.ratio("truncated_thread_rate",
+                                               history.total("youtube_reply_threads_expanded_total"),
+                                               history_comments)
+        reply_requests = min(reply_quota_budget // quota_costs["comments.list"], math.ceil(truncated))
+        quota += reply_requests * quota_costs["comments.list"]
+        requests += reply_requests
+    work = requests * latency
+    return {
+        "stage": "crawl_youtube", "items": comments + replies, "unit": "comments", "requests": requests,
+        "quota": quota, "seconds": work, "rate_limit_seconds": requests * host_interval,
+        "queue_seconds": lambda workers: max(work / workers, requests * host_interval),
+    }
+
+
+def plan_cleaning(rows_by_type, estimator, relevance_mode="last"):
+    """
+    Estimates LLM requests, tokens and time for localLLM.py after the relevance filter and
+    near-duplicate collapsing. Only relevance_mode 'drop' removes rows before the LLM.
+    seconds(concurrency) assumes LM Studio serves that many requests in parallel.
+    """
+    history = estimator.history
+    plans = []
+    for content_type, rows in rows_by_type.items():
+        below = history.total("relevance_below_threshold_total", type=content_type)
+        collapsed = history.total("near_duplicates_collapsed_total", type=content_type)
+        sent = history.total("llm_requests_total", type=content_type)
+        drop_rate = 0.0
+        if relevance_mode == "drop":
+            drop_rate = estimator.ratio("relevance_drop_rate", below, below + collapsed + sent, content_type)
+        dup_rate = estimator.ratio("near_dup_rate", collapsed, collapsed + sent, content_type)
+        tokens = history.total("llm_tokens_total", type=content_type)
+        tokens_per_request = estimator.value("llm_tokens", tokens / sent if tokens and sent else None, content_type)
+        latency = estimator.value("llm_seconds", history.mean("llm_request_seconds", type=content_type), content_type)
+
+        requests = round(rows * (1 - drop_rate) * (1 - dup_rate))
+        plans.append({
+            "stage": f"clean_{content_type}", "items": rows, "unit": "rows", "requests": requests,
+            "tokens": round(requests * tokens_per_request), "seconds": requests * latency,
+            "relevance_drop_rate": drop_rate, "near_dup_rate": dup_rate,
+            "parallel_seconds": lambda concurrency, work=requests * latency: work / concurrency,
+        })
+    return plans
+
+
+def plan_sentiment(rows, estimator):
+    """
+    Estimates the IndoBERT stage: cache hit rate, texts to score and time at the best measured batch size.
+    """
+    history = estimator.history
+    hits = history.total("sentiment_cache_lookups_total", result="hit")
+    hit_rate = estimator.ratio("sentiment_cache_hit_rate", hits,
+                               hits + history.total("sentiment_cache_lookups_total", result="miss"))
+
+    # Throughput per ukuran batch dari riwayat (rows / detik forward pass)
+    throughput = {}
+    for record in history.records:
+        for series in record["metrics"].get("inference_batch_seconds", {}).get("series", []):
+            batch_size = series["labels"].get("batch_size")
+            seconds, scored = throughput.get(batch_size, (0.0, 0))
+            rows_scored = series["count"] * (int(batch_size) if str(batch_size).isdigit() else 1)
+            throughput[batch_size] = (seconds + series["sum"], scored + rows_scored)
+    rates = {size: scored / seconds for size, (seconds, scored) in throughput.items() if seconds}
+    best_batch = max(rates, key=rates.get) if rates else None
+    rows_per_second = estimator.value("inference_rows_per_second", rates.get(best_batch))
+
+    to_score = round(rows * (1 - hit_rate))
+    return {
+        "stage": "sentiment", "items": rows, "unit": "rows", "requests": to_score,
+        "seconds": to_score / rows_per_second, "cache_hit_rate": hit_rate, "best_batch_size": best_batch,
+    }
+
+
+def wall_clock(news, youtube, cleaning, sentiment, crawl_workers=None, llm_concurrency=1):
+    """
+    Pipeline wall-clock: the crawls run in parallel, the cleaning stages share one LLM server.
+    crawl_workers=None means the normal (sequential) crawlers, a number means --queue with that many workers.
+    """
+    if crawl_workers is None:
+        crawl = max(news["seconds"], youtube["seconds"])
+    else:
+        crawl = max(news["queue_seconds"](crawl_workers), youtube["queue_seconds"](crawl_workers))
+    clean = sum(plan["parallel_seconds"](llm_concurrency) for plan in cleaning)
+    return crawl + clean + sentiment["seconds"]
+
+
+def suggest_settings(news, youtube, cleaning, sentiment, deadline):
+    """
+    Greedily raises crawl workers and LLM concurrency, one step at a time on the knob that
+    saves the most time, until the estimated wall-clock fits the deadline.
+    Returns (crawl workers, LLM concurrency, estimated seconds, deadline met?).
+    """
+    workers, concurrency = 1, 1
+    total = wall_clock(news, youtube, cleaning, sentiment, workers, concurrency)
+    while total > deadline:
+        options = []
+        if workers < MAX_SUGGESTED_CONCURRENCY:
+            options.append((wall_clock(news, youtube, cleaning, sentiment, workers + 1, concurrency), "workers"))
+        if concurrency < MAX_SUGGESTED_CONCURRENCY:
+            options.append((wall_clock(news, youtube, cleaning, sentiment, workers, concurrency + 1), "llm"))
+        if not options or min(options)[0] >= total:
+            break
+        total, knob = min(options)
+        if knob == "workers":
+            workers += 1
+        else:
+            concurrency += 1
+    return workers, concurrency, total, total <= deadline
+
+
+def parse_duration(text):
+    """
+    '90m', '2h', '1h30m', '45s' or a plain number of minutes → seconds.
+    """
+    text = str(text).strip().lower()
+    if text.replace(".", "", 1).isdigit():
+        return float(text) * 60
+    seconds, number = 0.0, ""
+    for char in text:
+        if char.isdigit() or char == ".":
+            number += char
+        elif char in "hms" and number:
+            seconds += float(number) * {"h": 3600, "m": 60, "s": 1}[char]
+            number = ""
+        else:
+            raise ValueError(f"invalid duration '{text}'")
+    if number:
+        raise ValueError(f"invalid duration '{text}' (missing unit)")
+    return seconds
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def build_plan(history_path=None, runs=HISTORY_RUNS, include_replies=None):
+    """
+    Collects the crawl configuration from keywords_config.py and the crawler modules and
+    returns (news, youtube, cleaning, sentiment, estimator).
+    """
+    import crawl_queue
+    import crawler_berita
+    import crawler_sosmedYT
+    import relevance
+
+    estimator = Estimator(MetricsHistory(history_path, runs))
+    news = plan_news(crawler_berita.NEWS_KEYWORDS, crawler_berita.NEWS_SITES,
+                     crawler_berita.MAX_ARTICLES_PER_KEYWORD, crawler_berita.TARGET_TOTAL_ARTICLES,
+                     crawler_berita.CRAWL_DELAYS, estimator,
+                     crawl_queue.HOST_MIN_INTERVALS.get("detik.com", crawl_queue.DEFAULT_HOST_INTERVAL))
+    youtube = plan_youtube(crawler_sosmedYT.ALL_YOUTUBE_KEYWORDS, crawler_sosmedYT.YOUTUBE_VIDEOS_PER_KEYWORD,
+                           crawler_sosmedYT.YOUTUBE_COMMENTS_PER_VIDEO,
+                           crawler_sosmedYT.EXPAND_REPLIES if include_replies is None else include_replies,
+                           crawler_sosmedYT.REPLY_QUOTA_BUDGET, crawler_sosmedYT.YOUTUBE_QUOTA_COSTS, estimator,
+                           crawl_queue.HOST_MIN_INTERVALS.get("googleapis.com", crawl_queue.DEFAULT_HOST_INTERVAL),
+                           skip_videos=crawler_sosmedYT.MIN_VIDEO_RELEVANCE is not None)
+    cleaning = plan_cleaning({"news": news["items"], "comment": youtube["items"]}, estimator,
+                             relevance.RELEVANCE_DEFAULT_MODE)
+    sentiment = plan_sentiment(round(sum(plan["items"] * (1 - plan["relevance_drop_rate"]) for plan in cleaning)),
+                               estimator)
+    return news, youtube, cleaning, sentiment, estimator
+
+
+# --- 🚦 MAIN SCRIPT ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate requests, quota, LLM tokens and duration of the "
+                                                 "configured crawl, and suggest settings for a deadline.")
+    parser.add_argument("--deadline", help="Target wall-clock for the whole pipeline, e.g. 90m, 2h, 1h30m")
+    parser.add_argument("--history", help="Metrics history file (default: metrics/history.jsonl)")
+    parser.add_argument("--runs", type=int, default=HISTORY_RUNS,
+                        help="Most recent runs per stage to base the estimates on (default: %(default)s)")
+    parser.add_argument("--replies", action="store_true", default=None,
+                        help="Plan the YouTube crawl with reply expansion (crawler_sosmedYT.py --replies)")
+    args = parser.parse_args()
+
+    try:
+        deadline = parse_duration(args.deadline) if args.deadline else None
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        exit(1)
+
+    news, youtube, cleaning, sentiment, estimator = build_plan(args.history, args.runs, args.replies)
+    history = estimator.history
+    print(f"📚 History: {len(history.records)} run(s) of {len(history.stages)} stage(s) from '{history.path}'")
+
+    print(f"\n{'stage':<16}{'items':>9}  {'unit':<9}{'requests':>10}{'quota':>8}{'tokens':>11}{'time':>11}")
+    print("-" * 74)
+    for plan in [news, youtube] + cleaning + [sentiment]:
+        quota = plan.get("quota")
+        tokens = plan.get("tokens")
+        print(f"{plan['stage']:<16}{plan['items']:>9}  {plan['unit']:<9}{plan['requests']:>10}"
+              f"{quota if quota is not None else '-':>8}{tokens if tokens is not None else '-':>11}"
+              f"{format_duration(plan['seconds']):>11}")
+    print("-" * 74)
+    total_tokens = sum(plan["tokens"] for plan in cleaning)
+    current = wall_clock(news, youtube, cleaning, sentiment)
+    print(f"Total: {news['requests']} detik requests, {youtube['quota']} YouTube quota units, "
+          f"{total_tokens} LLM tokens, ~{format_duration(current)} wall-clock (crawls in parallel)")
+
+    if youtube["quota"] > YOUTUBE_DAILY_QUOTA:
+        print(f"⚠️  The YouTube crawl needs more than the default daily quota of {YOUTUBE_DAILY_QUOTA} units.")
+
+    print("\n🗃️  Cache and filter rates:")
+    for plan in cleaning:
+        print(f"   {plan['stage']}: {plan['relevance_drop_rate']:.0%} dropped by relevance, "
+              f"{plan['near_dup_rate']:.0%} near-duplicates reuse a result")
+    print(f"   sentiment: {sentiment['cache_hit_rate']:.0%} sentiment cache hits")
+
+    if estimator.defaults_used:
+        print(f"\nℹ️  No history for {', '.join(sorted(estimator.defaults_used))}; using DEFAULT_ESTIMATES.")
+
+    if deadline is not None:
+        workers, concurrency, total, met = suggest_settings(news, youtube, cleaning, sentiment, deadline)
+        print(f"\n🎯 Deadline {format_duration(deadline)}: "
+              f"{'met' if met else 'NOT met'} with ~{format_duration(total)} using")
+        print(f"   - {workers} crawl worker(s): crawler_berita.py / crawler_sosmedYT.py --queue worker "
+              f"(per-host rate limits from crawl_queue.HOST_MIN_INTERVALS apply)")
+        print(f"   - {concurrency} parallel LLM request(s) (streaming_pipeline.LLM_WORKERS; "
+              f"LM Studio needs as many parallel slots)")
+        for plan in (news, youtube):
+            if plan["queue_seconds"](workers) <= plan["rate_limit_seconds"]:
+                print(f"   ({plan['stage']} is bound by the per-host rate limit: "
+                      f"~{format_duration(plan['rate_limit_seconds'])} however many workers run)")
+        if sentiment["best_batch_size"] is not None:
+            print(f"   - IndoBERT batch size {sentiment['best_batch_size']} (highest measured throughput)")
+        if not met:
+            print("   Lower the limits in keywords_config.py or SCRAPING_LIMITS to fit the deadline.")
@@ -0,0 +1,197 @@
+import sys
+
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# --- 📜 CONFIGURATION ---
+
+# Mode profiling untuk opsi --profile:
+# - cprofile : cProfile (deterministik, semua fungsi di main thread) + sampler untuk flamegraph
+# - sampling : hanya sampler (overhead rendah, semua thread)
+PROFILE_MODES = ("cprofile", "sampling")
+PROFILE_SAMPLE_INTERVAL = 0.005  # Detik antar sampel stack
+PROFILE_TOP_N = 25               # Jumlah hotspot di ringkasan
+PROFILE_TRACEMALLOC_FRAMES = 1   # Kedalaman traceback per alokasi (lebih dalam = lebih lambat)
+
+
+def add_profile_argument(parser):
+    """
+    Adds the shared --profile [cprofile|sampling] option to an entry point's argument parser.
+    """
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=PROFILE_MODES,
+                        help="Profile this run (CPU hotspots, flamegraph stacks, memory peak) and write the "
+                             "results next to the output files (default mode: cprofile)")
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of all threads at a fixed interval. The samples are written
+    as folded stacks ("thread;outer;...;inner count"), the input format of flamegraph.pl,
+    speedscope and inferno.
+    """
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded_lines(self):
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+
+    def hotspots(self, top_n):
+        """
+        Returns [(frame, self samples, total samples)] sorted by self samples.
+        """
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+        return [(frame, count, total_counts[frame]) for frame, count in self_counts.most_common(top_n)]
+
+
+class StageProfiler:
+    """
+    Profiles one pipeline run: CPU (cProfile and/or stack sampling) plus the tracemalloc peak.
+    """
+
+    def __init__(self, stage_name, output_dir, mode="cprofile", top_n=PROFILE_TOP_N):
+        self.stage_name = stage_name
+        self.output_dir = output_dir or "."
+        self.mode = mode
+        self.top_n = top_n
+        self.sampler = StackSampler()
+        self.cprofile = cProfile.Profile() if mode == "cprofile" else None
+        self.start_time = None
+        self.stopped = False
+
+    def output_path(self, suffix):
+        return os.path.join(self.output_dir, f"{self.stage_name}_profile{suffix}")
+
+    def start(self):
+        tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        self.start_time = time.perf_counter()
+        self.sampler.start()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+        return self
+
+    def stop(self):
+        """
+        Stops profiling and writes <stage>_profile.folded, <stage>_profile.txt and,
+        in cprofile mode, <stage>_profile.prof (for snakeviz / pstats).
+        """
+        if self.stopped:
+            return None
+        self.stopped = True
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        self.sampler.stop()
+        elapsed = time.perf_counter() - self.start_time
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        allocations = tracemalloc.take_snapshot().statistics("lineno")[:self.top_n]
+        tracemalloc.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self.output_path(".folded"), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.sampler.folded_lines()) + "\n")
+
+        lines = [
+            f"Profile of stage '{self.stage_name}' ({self.mode})",
+            f"Wall time            : {elapsed:.2f}s",
+            f"Stack samples        : {self.sampler.samples} (every {self.sampler.interval * 1000:.0f} ms)",
+            f"Python memory peak   : {peak_memory / 1024 / 1024:.1f} MiB (tracemalloc)",
+            f"Python memory at end : {current_memory / 1024 / 1024:.1f} MiB",
+        ]
+        peak_rss = _peak_rss_mib()
+        if peak_rss is not None:
+            lines.append(f"Process peak RSS     : {peak_rss:.1f} MiB (includes native memory, e.g. torch)")
+
+        lines += ["", f"Top {self.top_n} hotspots by self time (sampled, all threads):",
+                  f"{'self %':>7} {'total %':>8}  frame"]
+        total_samples = max(1, sum(self.sampler.stacks.values()))
+        for frame, self_count, total_count in self.sampler.hotspots(self.top_n):
+            lines.append(f"{self_count / total_samples:>7.1%} {total_count / total_samples:>8.1%}  {frame}")
+
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(self.output_path(".prof"))
+            for sort_key in ("tottime", "cumulative"):
+                stream = io.StringIO()
+                pstats.Stats(self.cprofile, stream=stream).sort_stats(sort_key).print_stats(self.top_n)
+                lines += ["", f"cProfile (main thread), top {self.top_n} by {sort_key}:", stream.getvalue().strip()]
+
+        lines += ["", f"Top {self.top_n} allocation sites still alive at the end (tracemalloc):"]
+        lines += [str(stat) for stat in allocations]
+
+        with open(self.output_path(".txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+        print(f"🔬 Profile written to '{self.output_path('.txt')}' (flamegraph stacks: "
+              f"'{self.output_path('.folded')}', peak Python memory {peak_memory / 1024 / 1024:.1f} MiB)")
+        return self.output_path(".txt")
+
+
+def _peak_rss_mib():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss dalam KiB di Linux, dalam byte di macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def common_output_dir(paths):
+    """
+    Folder shared by all output files of a run, or the working folder if they differ.
+    """
+    folders = {os.path.dirname(path) or "." for path in paths}
+    return folders.pop() if len(folders) == 1 else "."
+
+
+def start_profiling(stage_name, output_dir, mode="cprofile", top_n=PROFILE_TOP_N):
+    """
+    Starts profiling the rest of the run. The results are written when the process exits,
+    including on exit() from an error branch, so entry points need no restructuring.
+    """
+    profiler = StageProfiler(stage_name, output_dir, mode, top_n).start()
+    atexit.register(profiler.stop)
+    return profiler
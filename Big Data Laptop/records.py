@@ -0,0 +1,76 @@
+import dataclasses
+from dataclasses import dataclass
+import pandas as pd
+
+# Record bertipe yang dipakai crawler, cleaner dan scorer. Dataclass dengan __slots__ tidak membawa
+# __dict__ per objek, sehingga puluhan ribu record jauh lebih hemat memori daripada dict, dan
+# records_to_frame menyusun DataFrame per kolom tanpa membuat Series per baris.
+
+
+@dataclass(slots=True)
+class NewsArticle:
+    """One scraped news article (one row of news_portal/news_<site>)."""
+    timestamp: str
+    title: str
+    url: str
+    content: str
+    paragraph_count: int
+    source: str
+    keyword: str = ""
+
+
+@dataclass(slots=True)
+class YouTubeComment:
+    """One top-level comment or reply (one row of social_media/youtube)."""
+    timestamp: str
+    keyword: str
+    source: str
+    video_url: str
+    video_title: str
+    comment_id: str
+    parent_id: str
+    commenter_name: str
+    comment_text: str
+    comment_date: str
+
+
+@dataclass(slots=True)
+class SentimentResult:
+    """IndoBERT output for one text; probabilities only for fresh (not cached) predictions."""
+    sentiment_label: str
+    sentiment_score: float
+    sentiment_probs: tuple = ()
+
+
+# Urutan kolom di file dataset (berbeda dari urutan field NewsArticle)
+NEWS_COLUMNS = ["timestamp", "keyword", "source", "title", "url", "content", "paragraph_count"]
+COMMENT_COLUMNS = [field.name for field in dataclasses.fields(YouTubeComment)]
+
+
+def records_to_frame(records, columns):
+    """
+    Builds a DataFrame column by column from typed records (or dicts, e.g. from the crawl queue).
+    """
+    records = list(records)
+    if not records:
+        return pd.DataFrame(columns=columns)
+    if isinstance(records[0], dict):
+        return pd.DataFrame.from_records(records, columns=columns)
+    return pd.DataFrame({column: [getattr(record, column) for record in records] for column in columns},
+                        columns=columns)
+
+
+def record_value(record, name, default=None):
+    """
+    Field of a typed record or a dict record.
+    """
+    if isinstance(record, dict):
+        return record.get(name, default)
+    return getattr(record, name, default)
+
+
+def as_dict(record):
+    """
+    Plain dict of a typed record (for JSON, e.g. the crawl queue); dicts are returned unchanged.
+    """
+    return dataclasses.asdict(record) if dataclasses.is_dataclass(record) else record
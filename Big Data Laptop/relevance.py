@@ -0,0 +1,226 @@
+import argparse
+import bisect
+import os
+import re
+from collections import deque
+import pandas as pd
+from keywords_config import NEWS_KEYWORDS, YOUTUBE_KEYWORDS, KEYWORD_VARIANTS, RELEVANCE_TERMS
+from storage import find_dataset, read_dataset
+
+# --- 📜 CONFIGURATION ---
+
+# Filter relevansi sebelum tahap LLM: semua keyword, variasi dan istilah tema dari keywords_config.py
+# digabung dalam satu automaton Aho-Corasick, sehingga setiap record cukup dipindai sekali.
+RELEVANCE_MIN_SCORE = 2.0
+
+# Bobot per jenis pola: keyword lengkap > variasi > istilah tema
+PATTERN_WEIGHTS = {"keyword": 3.0, "variant": 2.0, "term": 1.0}
+
+# Bobot per kolom: kecocokan di judul lebih bermakna daripada di isi
+FIELD_WEIGHTS = {"title": 2.0, "video_title": 1.5, "content": 1.0, "comment_text": 1.0, "description": 0.5}
+
+# Kolom yang dinilai per tipe konten (kolom yang tidak ada dilewati)
+RELEVANCE_FIELDS = {
+    "news": ["title", "content"],
+    "comment": ["video_title", "comment_text"],
+}
+
+# Kolom konteks yang wajib ada sebelum record boleh dibuang: komentar jarang menyebut keyword sendiri,
+# relevansinya terutama berasal dari judul video
+REQUIRED_CONTEXT_FIELDS = {"comment": "video_title"}
+
+# Mode filter: drop = buang record di bawah ambang, last = proses paling akhir, off = tanpa filter
+RELEVANCE_MODES = ("drop", "last", "off")
+# Default cleaner: tidak ada baris yang dibuang tanpa diminta (--relevance drop)
+RELEVANCE_DEFAULT_MODE = "last"
+# Kolom yang ditambahkan score_dataframe; tidak ikut disimpan di output cleaner
+RELEVANCE_COLUMNS = ["relevance_score", "matched_keywords"]
+
+_FIELD_SEPARATOR = "\x01"
+
+
+def normalise(text):
+    """
+    Lowercases and replaces every non-alphanumeric run by one space, with a space at both
+    ends, so that patterns only match whole words (" pemilu damai ").
+    """
+    return " " + re.sub(r"[\W_]+", " ", str(text).lower()).strip() + " "
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton: finds all occurrences of many patterns in one pass over the text.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(pattern_id)
+
+        # Fail link per state (BFS), output state mewarisi output dari fail link-nya
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def iter_matches(self, text):
+        """
+        Yields (end position, pattern id) for every match, including overlapping ones.
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                yield position, pattern_id
+
+
+class RelevanceScorer:
+    """
+    Scores records against the keyword configuration and reports which keywords matched.
+    """
+
+    def __init__(self, keywords=None, variants=None, terms=None):
+        keywords = keywords if keywords is not None else list(dict.fromkeys(NEWS_KEYWORDS + YOUTUBE_KEYWORDS))
+        variants = variants if variants is not None else KEYWORD_VARIANTS
+        terms = terms if terms is not None else RELEVANCE_TERMS
+
+        # {pola ternormalisasi: (label, bobot)}; pola yang sama dari beberapa sumber memakai bobot tertinggi
+        entries = {}
+
+        def add(pattern, label, kind):
+            key = normalise(pattern)
+            if key.strip() and (key not in entries or entries[key][1] < PATTERN_WEIGHTS[kind]):
+                entries[key] = (label, PATTERN_WEIGHTS[kind])
+
+        for term in terms:
+            add(term, term, "term")
+        for keyword, keyword_variants in variants.items():
+            for variant in keyword_variants:
+                add(variant, keyword, "variant")
+        for keyword in keywords:
+            add(keyword, keyword, "keyword")
+
+        self.labels = [label for label, _ in entries.values()]
+        self.weights = [weight for _, weight in entries.values()]
+        self.automaton = KeywordAutomaton(entries.keys())
+
+    def score(self, fields):
+        """
+        Scores {field name: text} in a single pass over all fields. Every pattern counts once
+        per field, weighted by pattern kind and field. Returns (score, matched labels).
+        """
+        parts, starts, names = [], [], []
+        offset = 0
+        for name, text in fields.items():
+            if text is None or (isinstance(text, float) and text != text):
+                continue
+            part = normalise(text)
+            parts.append(part)
+            starts.append(offset)
+            names.append(name)
+            offset += len(part) + len(_FIELD_SEPARATOR)
+        if not parts:
+            return 0.0, []
+
+        text = _FIELD_SEPARATOR.join(parts)
+        seen = set()
+        score = 0.0
+        matched = {}
+        for position, pattern_id in self.automaton.iter_matches(text):
+            field = names[bisect.bisect_right(starts, position) - 1]
+            if (field, pattern_id) in seen:
+                continue
+            seen.add((field, pattern_id))
+            score += self.weights[pattern_id] * FIELD_WEIGHTS.get(field, 1.0)
+            matched[self.labels[pattern_id]] = None
+        return score, list(matched)
+
+
+def score_dataframe(df, content_type, scorer=None):
+    """
+    Adds 'relevance_score' and 'matched_keywords' ('; '-separated) columns.
+    """
+    scorer = scorer or RelevanceScorer()
+    columns = [column for column in RELEVANCE_FIELDS.get(content_type, []) if column in df.columns]
+    scores, matches = [], []
+    for values in zip(*(df[column].tolist() for column in columns)) if columns else [()] * len(df):
+        score, matched = scorer.score(dict(zip(columns, values)))
+        scores.append(score)
+        matches.append("; ".join(matched))
+    df = df.copy()
+    df["relevance_score"] = scores
+    df["matched_keywords"] = matches
+    return df
+
+
+def apply_relevance(df, content_type, mode="drop", min_score=RELEVANCE_MIN_SCORE, scorer=None):
+    """
+    Scores the rows and, depending on the mode, drops the rows below min_score ('drop') or
+    moves them to the end so they are processed last ('last'). The index labels are kept, so
+    callers restore the input order with sort_index(). Returns (df, rows below threshold).
+    """
+    if mode == "off":
+        return df, 0
+    context_field = REQUIRED_CONTEXT_FIELDS.get(content_type)
+    if mode == "drop" and context_field and context_field not in df.columns:
+        print(f"⚠️  Column '{context_field}' not found (crawled before the relevance filter existed); "
+              f"low-scoring rows are processed last instead of dropped.")
+        mode = "last"
+    df = score_dataframe(df, content_type, scorer)
+    below = df["relevance_score"] < min_score
+    if mode == "drop":
+        df = df[~below]
+    else:
+        df = pd.concat([df[~below], df[below]])
+    return df, int(below.sum())
+
+
+# --- 🚦 MAIN SCRIPT ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a crawled dataset for keyword relevance.")
+    parser.add_argument("dataset", help="Dataset base name or file, e.g. news_portal/news_detik")
+    parser.add_argument("--type", choices=sorted(RELEVANCE_FIELDS), default="news")
+    parser.add_argument("--min-score", type=float, default=RELEVANCE_MIN_SCORE)
+    parser.add_argument("--show", type=int, default=5, help="Number of lowest-scoring rows to print")
+    args = parser.parse_args()
+
+    input_file = args.dataset if os.path.splitext(args.dataset)[1] else find_dataset(args.dataset)
+    if input_file is None or not os.path.exists(input_file):
+        print(f"❌ ERROR: Dataset not found at '{args.dataset}'.")
+        exit(1)
+
+    scored = score_dataframe(read_dataset(input_file), args.type)
+    below = scored["relevance_score"] < args.min_score
+    print(f"📊 {len(scored)} rows, {int(below.sum())} below relevance score {args.min_score}")
+    print(scored["relevance_score"].describe().to_string())
+
+    keyword_counts = scored["matched_keywords"].str.split("; ").explode()
+    print("\n🔑 Most matched keywords:")
+    print(keyword_counts[keyword_counts != ""].value_counts().head(15).to_string())
+
+    text_column = RELEVANCE_FIELDS[args.type][0]
+    if text_column in scored.columns:
+        print("\n⬇️  Lowest scoring rows:")
+        for _, row in scored.nsmallest(args.show, "relevance_score").iterrows():
+            print(f"   {row['relevance_score']:.1f}  {str(row[text_column])[:100]}")
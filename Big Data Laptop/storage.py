@@ -0,0 +1,252 @@
+import argparse
+import glob
+import os
+import pandas as pd
+
+# --- 📜 CONFIGURATION ---
+
+# Format penyimpanan antar tahap pipeline: "parquet" (default) atau "csv".
+# Parquet menyimpan kolom bertipe + terkompresi dan bisa dibaca per kolom,
+# sehingga tahap berikutnya tidak perlu mem-parsing ulang seluruh teks artikel.
+DATA_FORMAT = os.getenv("PIPELINE_DATA_FORMAT", "parquet")
+PARQUET_COMPRESSION = "zstd"
+
+SUPPORTED_FORMATS = ("parquet", "csv")
+
+# Tipe kolom yang diketahui; kolom lain disimpan sebagai string
+DATETIME_COLUMNS = {"timestamp"}
+UTC_DATETIME_COLUMNS = {"published_at", "comment_date"}
+INTEGER_COLUMNS = {"paragraph_count"}
+FLOAT_COLUMNS = {"sentiment_score", "relevance_score"}
+
+
+def dataset_path(base_path, data_format=None):
+    """
+    Returns the file path for a dataset base name (without extension) in the configured format.
+    """
+    return f"{base_path}.{data_format or DATA_FORMAT}"
+
+
+def find_dataset(base_path):
+    """
+    Returns an existing file for a dataset base name, preferring the configured format and
+    falling back to the other one (e.g. CSV files written before the switch to Parquet).
+    Returns None if no file exists.
+    """
+    formats = [DATA_FORMAT] + [f for f in SUPPORTED_FORMATS if f != DATA_FORMAT]
+    for data_format in formats:
+        path = dataset_path(base_path, data_format)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def find_datasets(folder, suffix):
+    """
+    Finds all datasets in a folder whose base name ends with `suffix`, one path per dataset.
+    """
+    base_paths = set()
+    for data_format in SUPPORTED_FORMATS:
+        for path in glob.glob(os.path.join(folder, f"*{suffix}.{data_format}")):
+            base_paths.add(os.path.splitext(path)[0])
+    return [find_dataset(base) for base in sorted(base_paths)]
+
+
+def coerce_types(df):
+    """
+    Applies the pipeline's column types so every Parquet file has a stable, typed schema.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col in DATETIME_COLUMNS:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif col in UTC_DATETIME_COLUMNS:
+            df[col] = pd.to_datetime(df[col], errors="coerce", utc=True)
+        elif col in INTEGER_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int32")
+        elif col in FLOAT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        else:
+            df[col] = df[col].astype("string")
+    return df
+
+
+def _arrow_schema(df):
+    import pyarrow as pa
+
+    fields = []
+    for col in df.columns:
+        if col in DATETIME_COLUMNS:
+            arrow_type = pa.timestamp("us")
+        elif col in UTC_DATETIME_COLUMNS:
+            arrow_type = pa.timestamp("us", tz="UTC")
+        elif col in INTEGER_COLUMNS:
+            arrow_type = pa.int32()
+        elif col in FLOAT_COLUMNS:
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(col, arrow_type))
+    return pa.schema(fields)
+
+
+def _format_of(path):
+    data_format = os.path.splitext(path)[1].lstrip(".").lower()
+    if data_format not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported dataset format for '{path}' (expected {SUPPORTED_FORMATS})")
+    return data_format
+
+
+def dataset_columns(path):
+    """
+    Column names of a dataset, without reading its rows.
+    """
+    if _format_of(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(path).names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_dataset(path, columns=None):
+    """
+    Reads a whole dataset. `columns` limits the read to those columns (column projection);
+    for Parquet only those columns are decoded from disk.
+    """
+    if _format_of(path) == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    if columns is None:
+        return pd.read_csv(path)
+    return pd.read_csv(path, usecols=lambda col: col in columns)
+
+
+def iter_dataset(path, columns=None, batch_size=2000):
+    """
+    Yields a dataset as DataFrames of at most `batch_size` rows.
+    """
+    if _format_of(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        usecols = None if columns is None else (lambda col: col in columns)
+        yield from pd.read_csv(path, chunksize=batch_size, usecols=usecols)
+
+
+class DatasetWriter:
+    """
+    Appends DataFrame batches to a dataset file. The data is written to a temporary file
+    and moved into place on close(), so an interrupted run never leaves a half-written output.
+    With incremental=True (CSV only) every batch is appended to the target file itself and is
+    readable as soon as append() returns; an interrupted run keeps the rows written so far.
+    If no batch was appended, close() writes an empty dataset with `columns` (or, without
+    columns, removes the target) so no output of an earlier run is left behind.
+    """
+
+    def __init__(self, path, incremental=False, columns=None):
+        self.path = path
+        self.data_format = _format_of(path)
+        if incremental and self.data_format != "csv":
+            # Parquet baru bisa dibaca setelah footer ditulis di close()
+            raise ValueError(f"Incremental writes need a .csv file, got '{path}'")
+        self.incremental = incremental
+        self.tmp_path = path if incremental else path + ".tmp"
+        self.rows_written = 0
+        self._parquet_writer = None
+        self._schema = None
+        self._columns = None
+        self.columns = list(columns) if columns is not None else None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def append(self, df):
+        if self._columns is None:
+            self._columns = list(df.columns)
+        df = coerce_types(df.reindex(columns=self._columns))
+
+        if self.data_format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._parquet_writer is None:
+                self._schema = _arrow_schema(df)
+                self._parquet_writer = pq.ParquetWriter(
+                    self.tmp_path, self._schema, compression=PARQUET_COMPRESSION
+                )
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(
+                self.tmp_path,
+                mode="a" if self.rows_written else "w",
+                header=not self.rows_written,
+                index=False,
+                encoding="utf-8",
+            )
+        self.rows_written += len(df)
+
+    def close(self):
+        if self._columns is None:
+            if self.columns is None:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            self.append(pd.DataFrame(columns=self.columns))
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if not self.incremental and os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Jangan timpa output lama dengan hasil parsial
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+            if not self.incremental and os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+def write_dataset(df, path):
+    """
+    Writes a whole DataFrame to `path` (format taken from the extension).
+    """
+    with DatasetWriter(path) as writer:
+        writer.append(df)
+
+
+def export_dataset(source_path, dest_path):
+    """
+    Exports a dataset to CSV or XLSX for analysts and tools that cannot read Parquet.
+    """
+    df = read_dataset(source_path)
+    if dest_path.endswith(".xlsx"):
+        # Excel tidak mendukung datetime dengan timezone
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.DatetimeTZDtype):
+                df[col] = df[col].dt.tz_localize(None)
+        df.to_excel(dest_path, index=False)
+    else:
+        df.to_csv(dest_path, index=False, encoding="utf-8")
+    return len(df)
+
+
+# --- 🚦 MAIN SCRIPT ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a pipeline dataset to CSV or XLSX.")
+    parser.add_argument("source", help="Dataset file (.parquet or .csv), e.g. combined_data/final_sentiment_results.parquet")
+    parser.add_argument("dest", help="Output file (.csv or .xlsx)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: Dataset not found at '{args.source}'.")
+        exit(1)
+
+    rows = export_dataset(args.source, args.dest)
+    print(f"💾 Exported {rows} rows from '{args.source}' to '{args.dest}'")
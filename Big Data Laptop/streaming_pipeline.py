@@ -0,0 +1,339 @@
+import argparse
+import queue
+import threading
+import time
+import pandas as pd
+from dotenv import load_dotenv
+from storage import dataset_path, DatasetWriter
+from csv_combiner import SOURCE_SCHEMAS, UNIFIED_COLUMNS, content_hash
+import metrics
+import relevance
+from records import record_value, SentimentResult
+
+load_dotenv()
+
+# --- 📜 CONFIGURATION ---
+
+# Mode streaming: record mengalir crawl → LLM → IndoBERT → dataset lewat antrian berukuran terbatas,
+# sehingga jaringan, LLM, dan inferensi CPU berjalan bersamaan dan hasil pertama muncul lebih cepat.
+# Output selalu CSV: setiap micro-batch langsung ditambahkan ke file dan bisa dibaca saat run masih jalan.
+OUTPUT_DATASET = dataset_path("combined_data/streaming_sentiment_results", "csv")
+
+RAW_QUEUE_SIZE = 64           # Record mentah yang menunggu dibersihkan LLM
+CLEAN_QUEUE_SIZE = 64         # Record bersih yang menunggu dinilai IndoBERT
+SINK_QUEUE_SIZE = 8           # Micro-batch yang menunggu ditulis
+LLM_WORKERS = 2               # Request paralel ke LM Studio
+SCORING_BATCH_SIZE = 16       # Ukuran micro-batch IndoBERT
+SCORING_MAX_WAIT_SECONDS = 2  # Batch yang belum penuh tetap dinilai setelah jeda ini
+
+# Sumber yang bisa di-stream: tipe prompt LLM, pemetaan ke skema gabungan, dan kolom teks mentah
+SOURCES = {
+    "news": {"type": "news", "schema": SOURCE_SCHEMAS["news_"], "content_column": "content"},
+    "youtube": {"type": "comment", "schema": SOURCE_SCHEMAS["youtube"], "content_column": "comment_text"},
+}
+
+RESULT_COLUMNS = UNIFIED_COLUMNS + ["sentiment_label", "sentiment_score"]
+
+_STOP = object()
+
+
+class StreamStats:
+    """
+    Thread-safe counters for the streaming run.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+        self.first_result_time = None
+        self.counts = {"crawled": 0, "duplicates": 0, "irrelevant": 0, "cleaned": 0, "scored": 0,
+                       "written": 0, "failed": 0}
+
+    def add(self, name, amount=1):
+        with self.lock:
+            self.counts[name] += amount
+
+    def mark_first_result(self):
+        with self.lock:
+            if self.first_result_time is None:
+                self.first_result_time = time.time() - self.start_time
+                return True
+        return False
+
+
+def to_unified(record, schema):
+    """
+    Maps one raw crawler record (records.NewsArticle / YouTubeComment) onto the unified schema
+    used by csv_combiner.py.
+    """
+    unified = {column: None for column in UNIFIED_COLUMNS}
+    for unified_col, source_col in schema.items():
+        unified[unified_col] = record_value(record, source_col)
+    unified["content_hash"] = content_hash(unified["text"] or "", unified["author"] or "",
+                                           unified["source"] or "", unified["url"] or "")
+    return unified
+
+
+def produce(source_name, records, raw_queue, stats):
+    """
+    Pushes crawler records into the raw queue. put() blocks when the queue is full,
+    which slows the crawler down to the speed of the LLM step.
+    """
+    try:
+        for record in records:
+            raw_queue.put((source_name, record))
+            stats.add("crawled")
+    except Exception as e:
+        print(f"❌ [{source_name}] crawler stopped with an error: {e}")
+
+
+def clean_worker(raw_queue, clean_queue, seen_hashes, seen_lock, stats, clean_text, relevance_scorer=None):
+    """
+    Takes raw records, drops content that was already seen or is off-topic, and adds the LLM summary.
+    A record that raises is counted as failed; the worker keeps going so the queues never stall.
+    """
+    while True:
+        item = raw_queue.get()
+        if item is _STOP:
+            break
+        source_name, record = item
+        try:
+            source = SOURCES[source_name]
+            unified = to_unified(record, source["schema"])
+
+            with seen_lock:
+                if unified["content_hash"] in seen_hashes:
+                    stats.add("duplicates")
+                    continue
+                seen_hashes.add(unified["content_hash"])
+
+            if relevance_scorer is not None:
+                fields = {column: record_value(record, column) for column in relevance.RELEVANCE_FIELDS[source["type"]]}
+                score, _ = relevance_scorer.score(fields)
+                if score < relevance.RELEVANCE_MIN_SCORE:
+                    stats.add("irrelevant")
+                    continue
+
+            content = record_value(record, source["content_column"])
+            if content is not None and len(str(content)) > 10:
+                unified["gemini_summary"] = clean_text(str(content), source["type"])
+            else:
+                unified["gemini_summary"] = "Content too short or invalid."
+        except Exception as e:
+            print(f"❌ [{source_name}] could not clean record, skipping it. Details: {e}")
+            stats.add("failed")
+            continue
+
+        clean_queue.put(unified)
+        stats.add("cleaned")
+
+
+def score_batch(records, cache_conn, model_tag, model, tokenizer):
+    """
+    Scores a micro-batch with IndoBERT, reusing cached results from indobert_process.py.
+    """
+    import indobert_process as indobert
+
+    keys = [indobert.make_cache_key(str(record["gemini_summary"]), model_tag) for record in records]
+    results = indobert.load_cached_results(cache_conn, set(keys))
+
+    missing = {}
+    for key, record in zip(keys, records):
+        if key not in results:
+            missing[key] = str(record["gemini_summary"])
+
+    if missing and model is None:
+        results.update((key, SentimentResult("error", 0.0)) for key in missing)
+    elif missing:
+        new_results = indobert.predict_sentiment_batch(list(missing.values()), model, tokenizer,
+                                                       batch_size=SCORING_BATCH_SIZE)
+        keyed_results = list(zip(missing.keys(), new_results))
+        indobert.store_results(cache_conn, model_tag, keyed_results)
+        results.update(keyed_results)
+
+    for key, record in zip(keys, records):
+        record["sentiment_label"] = results[key].sentiment_label
+        record["sentiment_score"] = results[key].sentiment_score
+    return records
+
+
+def score_worker(clean_queue, sink_queue, stats):
+    """
+    Collects cleaned records into micro-batches (full batch or max wait reached) and scores them.
+    _STOP is always passed on to the sink, also when the setup (import, cache) fails.
+    """
+    cache_conn = None
+    finished = False
+    try:
+        try:
+            import indobert_process as indobert
+            # Koneksi SQLite dibuat di thread yang memakainya
+            cache_conn = indobert.open_sentiment_cache(indobert.SENTIMENT_CACHE_FILE)
+            model_tag = indobert.get_model_tag()
+        except Exception as e:
+            # Antrian tetap dikuras agar tahap sebelumnya tidak macet
+            print(f"❌ Could not start IndoBERT scoring, dropping cleaned records. Details: {e}")
+            while clean_queue.get() is not _STOP:
+                stats.add("failed")
+            return
+
+        try:
+            tokenizer, model = indobert.load_model()
+        except Exception as e:
+            # Antrian tetap dikuras agar tahap sebelumnya tidak macet; teks baru diberi label 'error'
+            print(f"❌ Could not load IndoBERT model, new texts will be labelled 'error'. Details: {e}")
+            tokenizer, model = None, None
+
+        while not finished:
+            batch = []
+            deadline = time.time() + SCORING_MAX_WAIT_SECONDS
+            while len(batch) < SCORING_BATCH_SIZE:
+                try:
+                    item = clean_queue.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    finished = True
+                    break
+                batch.append(item)
+
+            if not batch:
+                continue
+            try:
+                sink_queue.put(score_batch(batch, cache_conn, model_tag, model, tokenizer))
+                stats.add("scored", len(batch))
+            except Exception as e:
+                # Batch tetap ditulis dengan label 'error', sama seperti predict_sentiment
+                print(f"❌ Error scoring micro-batch, labelling it 'error'. Details: {e}")
+                for record in batch:
+                    record["sentiment_label"], record["sentiment_score"] = "error", 0.0
+                sink_queue.put(batch)
+                stats.add("failed", len(batch))
+    finally:
+        if cache_conn is not None:
+            cache_conn.close()
+        sink_queue.put(_STOP)
+
+
+def sink_worker(sink_queue, writer, stats):
+    """
+    Appends scored micro-batches to the output dataset as they arrive. Each batch is readable
+    once append() returns, so the first-result time is measured after that flush.
+    """
+    while True:
+        batch = sink_queue.get()
+        if batch is _STOP:
+            break
+        try:
+            writer.append(pd.DataFrame.from_records(batch, columns=RESULT_COLUMNS))
+        except Exception as e:
+            print(f"❌ Could not write micro-batch of {len(batch)} records. Details: {e}")
+            stats.add("failed", len(batch))
+            continue
+        stats.add("written", len(batch))
+        if stats.mark_first_result():
+            print(f"🟢 First results written after {stats.first_result_time:.1f}s")
+
+
+def build_producers(source_names):
+    """
+    Returns {source_name: record iterator} for the requested sources.
+    """
+    producers = {}
+    if "news" in source_names:
+        from crawler_berita import iter_news_articles
+        producers["news"] = iter_news_articles()
+    if "youtube" in source_names:
+        import crawler_sosmedYT
+        if crawler_sosmedYT.YOUTUBE_API_KEY:
+            producers["youtube"] = crawler_sosmedYT.iter_youtube_comments(crawler_sosmedYT.build_client())
+        else:
+            print("⚠️  YOUTUBE_API_KEY not found in .env file, skipping YouTube.")
+    return producers
+
+
+def run_streaming(producers, output_file, clean_text, llm_workers=LLM_WORKERS, relevance_filter=True):
+    """
+    Runs crawl → clean → score → write with bounded queues between the steps.
+    Returns the StreamStats of the run.
+    """
+    stats = StreamStats()
+    raw_queue = queue.Queue(maxsize=RAW_QUEUE_SIZE)
+    clean_queue = queue.Queue(maxsize=CLEAN_QUEUE_SIZE)
+    sink_queue = queue.Queue(maxsize=SINK_QUEUE_SIZE)
+    seen_hashes, seen_lock = set(), threading.Lock()
+    relevance_scorer = relevance.RelevanceScorer() if relevance_filter else None
+
+    with DatasetWriter(output_file, incremental=True, columns=RESULT_COLUMNS) as writer:
+        sink = threading.Thread(target=sink_worker, args=(sink_queue, writer, stats), name="sink")
+        scorer = threading.Thread(target=score_worker, args=(clean_queue, sink_queue, stats),
+                                  name="scorer")
+        cleaners = [
+            threading.Thread(target=clean_worker, name=f"cleaner-{i}",
+                             args=(raw_queue, clean_queue, seen_hashes, seen_lock, stats, clean_text,
+                                   relevance_scorer))
+            for i in range(llm_workers)
+        ]
+        crawlers = [
+            threading.Thread(target=produce, args=(name, records, raw_queue, stats), name=f"crawl-{name}")
+            for name, records in producers.items()
+        ]
+
+        # Model IndoBERT dimuat sambil crawler dan LLM sudah mulai bekerja
+        for thread in [sink, scorer] + cleaners + crawlers:
+            thread.daemon = True
+            thread.start()
+
+        for thread in crawlers:
+            thread.join()
+        for _ in cleaners:
+            raw_queue.put(_STOP)
+        for thread in cleaners:
+            thread.join()
+        clean_queue.put(_STOP)
+        scorer.join()
+        sink.join()
+
+    return stats
+
+
+# --- 🚦 MAIN SCRIPT ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming crawl → LLM clean → IndoBERT score pipeline.")
+    parser.add_argument("--sources", nargs="+", choices=sorted(SOURCES), default=sorted(SOURCES),
+                        help="Sources to crawl (default: all)")
+    parser.add_argument("--llm-workers", type=int, default=LLM_WORKERS,
+                        help="Parallel requests to the local LLM (default: %(default)s)")
+    parser.add_argument("--no-relevance", action="store_true",
+                        help="Send every record to the LLM, even when it does not match the keywords")
+    parser.add_argument("--output", default=OUTPUT_DATASET,
+                        help="Output CSV file, appended per micro-batch (default: %(default)s)")
+    args = parser.parse_args()
+    if not args.output.endswith(".csv"):
+        print(f"❌ ERROR: --output must be a .csv file (rows are appended while the run is going), got '{args.output}'.")
+        exit(1)
+
+    from localLLM import format_text_with_local_llm
+
+    print("🚀 Starting streaming pipeline: crawl → clean → score → write")
+    producers = build_producers(args.sources)
+    if not producers:
+        print("❌ ERROR: No sources available to crawl.")
+        exit(1)
+
+    stats = run_streaming(producers, args.output, format_text_with_local_llm, max(1, args.llm_workers),
+                          relevance_filter=not args.no_relevance)
+
+    elapsed = time.time() - stats.start_time
+    print("\n" + "="*70)
+    print(f"✅ Streaming pipeline finished in {elapsed:.1f}s")
+    if stats.first_result_time is not None:
+        print(f"⏱️  Time to first result: {stats.first_result_time:.1f}s")
+    for name, count in stats.counts.items():
+        print(f"   {name:<10}: {count}")
+    print(f"💾 Results saved to: '{args.output}'")
+    print(f"📈 Metrics saved to: '{metrics.export_metrics('streaming')}'")
+    print("="*70)
+    if stats.counts["failed"] and not stats.counts["written"]:
+        exit(1)